@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""弹窗打开延迟与单次打开内存分配基准
+
+分别在不复用（dialog_pool_size=0，相当于改造前每次重建）和启用弹窗池两种配置下，
+反复打开/关闭四种弹窗，统计打开耗时与每次打开分配的内存。
+
+用法:
+    python benchmarks/bench_dialogs.py --iterations 50
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+import headless
+
+DIALOGS = {
+    'message': lambda app: app.show_popup('基准测试', None),
+    'custom': lambda app: app.show_custom_popup(None),
+    'modal': lambda app: app.show_modal_view(None),
+    'bubble': lambda app: app.show_bubble(None),
+}
+
+
+def close_dialog(app, kind):
+    if kind == 'bubble':
+        app.hide_bubble(app.active_bubbles[-1][0])
+    else:
+        from kivy.uix.modalview import ModalView
+        for widget in list(app.root_window.children):
+            if isinstance(widget, ModalView):
+                widget.dismiss(animation=False)
+
+
+def run_kind(app, kind, iterations):
+    opener = DIALOGS[kind]
+    # 预热一次，排除首次导入和字体加载
+    opener(app)
+    headless.pump(2)
+    close_dialog(app, kind)
+    headless.pump(2)
+
+    latencies, allocations = [], []
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        opener(app)
+        headless.pump(1, frame_time=0)
+        latencies.append(time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+        allocations.append(peak - base)
+        close_dialog(app, kind)
+        headless.pump(1, frame_time=0)
+    return {
+        'open_ms_p50': statistics.median(latencies) * 1000,
+        'open_ms_max': max(latencies) * 1000,
+        'alloc_kb_per_open': statistics.mean(allocations) / 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    tracemalloc.start()
+    app = headless.start_app(prewarm_screens=False)
+    app.switch_screen('advanced', None)
+    headless.pump_for(0.6)
+
+    results = {}
+    for label, pool_size in (('rebuild', 0), ('pooled', 2)):
+        for pool in app.dialog_pools.values():
+            pool.max_idle = pool_size
+            pool._idle.clear()
+        results[label] = {kind: run_kind(app, kind, args.iterations) for kind in DIALOGS}
+    headless.stop_app(app)
+
+    print(f"{'弹窗':<10}{'配置':<10}{'打开p50(ms)':>14}{'打开max(ms)':>14}{'分配(KB/次)':>14}")
+    for kind in DIALOGS:
+        for label in results:
+            row = results[label][kind]
+            print(f"{kind:<10}{label:<10}{row['open_ms_p50']:>14.2f}"
+                  f"{row['open_ms_max']:>14.2f}{row['alloc_kb_per_open']:>14.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""虚拟化文件浏览器基准：打开超大目录的首行时间与峰值内存
+
+在临时目录中生成指定数量的空文件，分别测量 FileBrowser（以及可选的
+FileChooserListView 作为对照）从创建到出现第一行、到全部列出的时间，
+以及期间的 Python 峰值内存和进程峰值 RSS。
+tracemalloc 会显著拖慢执行，因此时间与内存分两遍测量。
+
+用法:
+    python benchmarks/bench_file_browser.py --entries 50000
+    python benchmarks/bench_file_browser.py --entries 5000 --baseline
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import headless
+
+
+def make_directory(count):
+    path = tempfile.mkdtemp(prefix='kivyuidemo-bench-')
+    for i in range(count):
+        with open(os.path.join(path, f'file_{i:06d}.txt'), 'w'):
+            pass
+    return path
+
+
+def peak_rss_mb():
+    # Linux 上 ru_maxrss 的单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(create, first_row, done, timeout):
+    window = headless.install_window()
+    start = time.perf_counter()
+    widget = create()
+    window.add_widget(widget)
+    first = None
+    while time.perf_counter() - start < timeout:
+        headless.pump(1, frame_time=0)
+        if first is None and first_row(widget):
+            first = time.perf_counter() - start
+        if done(widget):
+            break
+    total = time.perf_counter() - start
+    window.remove_widget(widget)
+    return first if first is not None else total, total
+
+
+def measure(create, first_row, done, timeout=120):
+    """先不开 tracemalloc 测时间，再单独跑一遍测 Python 峰值内存"""
+    first, total = _run(create, first_row, done, timeout)
+    rss = peak_rss_mb()
+    tracemalloc.start()
+    try:
+        _run(create, first_row, done, timeout)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'first_row_ms': first * 1000,
+        'complete_ms': total * 1000,
+        'peak_py_mb': peak / 1024 / 1024,
+        'peak_rss_mb': rss,
+    }
+
+
+def bench_file_browser(path):
+    from main import FileBrowser, FileRow
+
+    def first_row(browser):
+        return any(isinstance(w, FileRow) and not w.is_dir for w in browser.walk(restrict=True))
+
+    return measure(
+        lambda: FileBrowser(path=path, size_hint=(1, 1)),
+        first_row,
+        lambda browser: not browser.loading,
+    )
+
+
+def bench_file_chooser(path):
+    from kivy.uix.filechooser import FileChooserListView
+
+    def first_row(chooser):
+        return bool(chooser.files) and len(list(chooser.walk(restrict=True))) > 20
+
+    return measure(
+        lambda: FileChooserListView(path=path),
+        first_row,
+        first_row,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=50000)
+    parser.add_argument('--baseline', action='store_true',
+                        help='同时测量 FileChooserListView（条目多时非常慢）')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    headless.install_window()
+    import main as app_module  # noqa: F401  注册字体名等模块级设置
+    from kivy.core.text import LabelBase
+    from kivy.resources import resource_find
+    LabelBase.register(name=app_module.FONT_NAME, fn_regular=resource_find(app_module.DEFAULT_FONT_FILE))
+
+    path = make_directory(args.entries)
+    try:
+        results = {'entries': args.entries, 'file_browser': bench_file_browser(path)}
+        if args.baseline:
+            results['file_chooser'] = bench_file_chooser(path)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    for name in ('file_browser', 'file_chooser'):
+        if name in results:
+            row = results[name]
+            print(f"{name:<14} 首行 {row['first_row_ms']:9.1f}ms  全部 {row['complete_ms']:9.1f}ms  "
+                  f"Python峰值 {row['peak_py_mb']:7.1f}MB  RSS峰值 {row['peak_rss_mb']:7.1f}MB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""空闲屏幕的渲染频率基准：每分钟绘制帧数与主循环唤醒次数
+
+依次切换到各屏幕，等待转场结束后不做任何操作，分别在 continuous（始终按 maxfps
+运行）和 on_demand（RenderGovernor 按需降频）两种模式下运行主循环，
+统计窗口实际绘制（on_draw）的帧数和主循环迭代次数，折算为每分钟。
+主循环不额外 sleep，帧间隔完全由 Clock 的帧率上限决定，与真实运行一致。
+
+用法:
+    python benchmarks/bench_idle.py --seconds 10
+    python benchmarks/bench_idle.py --screens main media --low-power
+"""
+import argparse
+import json
+import sys
+import time
+
+import headless
+from kivy.base import EventLoop
+
+SCREENS = ['main', 'basic_widgets', 'layout', 'input', 'media', 'advanced']
+
+
+def run_loop(window, seconds):
+    """运行主循环 seconds 秒，返回 (绘制帧数, 唤醒次数)"""
+    drawn = [0]
+
+    def on_draw(*args):
+        drawn[0] += 1
+
+    window.fbind('on_draw', on_draw)
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        EventLoop.idle()
+        ticks += 1
+    window.funbind('on_draw', on_draw)
+    return drawn[0], ticks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0, help='每种模式每个屏幕的测量时长')
+    parser.add_argument('--screens', nargs='+', default=SCREENS)
+    parser.add_argument('--low-power', action='store_true', help='on_demand 模式使用低功耗配置')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    app = headless.start_app(prewarm_screens=False, render_mode='continuous')
+    from main import RenderGovernor
+    window = app.root_window
+    governor = RenderGovernor()
+    if args.low_power:
+        governor.set_profile('low_power')
+    scale = 60.0 / args.seconds
+
+    results = {}
+    for name in args.screens:
+        app.switch_screen(name, None)
+        headless.pump_for(1.0)
+        row = results[name] = {}
+        for mode in ('continuous', 'on_demand'):
+            if mode == 'on_demand':
+                governor.attach(window)
+            drawn, ticks = run_loop(window, args.seconds)
+            governor.detach()
+            row[mode] = {'frames_per_min': drawn * scale, 'wakeups_per_min': ticks * scale}
+    headless.stop_app(app)
+
+    print(f"{'屏幕':<16}{'continuous 帧/分':>18}{'唤醒/分':>10}{'on_demand 帧/分':>18}{'唤醒/分':>10}")
+    for name, row in results.items():
+        cont, demand = row['continuous'], row['on_demand']
+        print(f"{name:<16}{cont['frames_per_min']:>18.0f}{cont['wakeups_per_min']:>10.0f}"
+              f"{demand['frames_per_min']:>18.0f}{demand['wakeups_per_min']:>10.0f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""大文件查看器基准：打开、建立行索引、跳转与滚动的耗时和内存
+
+在临时目录中生成指定大小的文本文件，用 LargeFileViewer 打开，测量首屏时间、
+后台行索引耗时、按行号/字节偏移跳转与连续滚动的耗时，以及期间的
+Python 峰值内存和匿名 RSS 增量。文件页由内核按需映射（计入 RssFile 而非 RssAnon），
+因此匿名内存不应随文件大小增长。
+tracemalloc 会显著拖慢执行，因此时间与 Python 内存分两遍测量。
+
+用法:
+    python benchmarks/bench_large_file.py --sizes 64 1024
+    python benchmarks/bench_large_file.py --sizes 1024 --keep /tmp/big.log
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import headless
+
+
+def make_file(path, size_mb):
+    """写入 size_mb MB 的文本，每行长度不同以接近真实日志"""
+    words = ('INFO', 'DEBUG', 'WARNING', 'request', 'handled', 'in', 'ms', 'user', 'cache', 'miss')
+    lines = []
+    for i in range(20000):
+        width = 3 + i % 17
+        lines.append(f'{i:06d} ' + ' '.join(words[(i + k) % len(words)] for k in range(width)))
+    block = ('\n'.join(lines) + '\n').encode('utf-8')
+    target = size_mb * 1024 * 1024
+    with open(path, 'wb') as f:
+        written = 0
+        while written < target:
+            chunk = block[:target - written]
+            f.write(chunk)
+            written += len(chunk)
+
+
+def anon_rss():
+    """匿名常驻内存（字节），不包含文件映射的页"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _run(path, timeout):
+    from main import LargeFileViewer
+
+    window = headless.install_window()
+    viewer = LargeFileViewer(size_hint=(None, None), size=(800, 600))
+    window.add_widget(viewer)
+    headless.pump(1, frame_time=0)
+    result = {}
+
+    start = time.perf_counter()
+    viewer.open(path)
+    headless.pump(1, frame_time=0)
+    result['first_screen_ms'] = (time.perf_counter() - start) * 1000
+
+    # 索引进行中按字节偏移跳转不需要等待索引
+    start = time.perf_counter()
+    viewer.jump_to_offset(viewer.size_bytes * 3 // 4)
+    result['jump_offset_ms'] = (time.perf_counter() - start) * 1000
+
+    while viewer.indexing and time.perf_counter() - start < timeout:
+        headless.pump(1, frame_time=0)
+    result['index_ms'] = (time.perf_counter() - start) * 1000
+    result['lines'] = viewer.index.total_lines
+
+    start = time.perf_counter()
+    viewer.jump_to_line(viewer.index.total_lines // 2)
+    result['jump_line_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(200):
+        viewer.scroll_lines(3)
+    result['scroll_ms_per_step'] = (time.perf_counter() - start) * 1000 / 200
+
+    viewer.close()
+    window.remove_widget(viewer)
+    return result
+
+
+def measure(path, timeout):
+    rss_before = anon_rss()
+    result = _run(path, timeout)
+    result['anon_rss_delta_mb'] = (anon_rss() - rss_before) / 1024 / 1024
+    tracemalloc.start()
+    try:
+        _run(path, timeout)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result['peak_py_mb'] = peak / 1024 / 1024
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 1024], help='文件大小（MB）')
+    parser.add_argument('--keep', help='使用/保留此路径的测试文件（只用于单个大小）')
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    headless.install_window()
+    import main as app_module
+    from kivy.core.text import LabelBase
+    from kivy.resources import resource_find
+    LabelBase.register(name=app_module.FONT_NAME, fn_regular=resource_find(app_module.DEFAULT_FONT_FILE))
+
+    results = {}
+    for size_mb in args.sizes:
+        path = args.keep or os.path.join(tempfile.gettempdir(), f'kivyuidemo-bench-{size_mb}mb.log')
+        if not (os.path.exists(path) and os.path.getsize(path) == size_mb * 1024 * 1024):
+            make_file(path, size_mb)
+        try:
+            results[size_mb] = measure(path, args.timeout)
+        finally:
+            if not args.keep:
+                os.remove(path)
+
+    print(f"{'大小MB':>7}{'行数':>11}{'首屏ms':>9}{'偏移跳转ms':>12}{'索引ms':>10}"
+          f"{'行号跳转ms':>12}{'滚动ms/次':>11}{'Python峰值MB':>14}{'匿名RSS增量MB':>15}")
+    for size_mb, row in results.items():
+        print(f"{size_mb:>7}{row['lines']:>11}{row['first_screen_ms']:>9.1f}{row['jump_offset_ms']:>12.2f}"
+              f"{row['index_ms']:>10.0f}{row['jump_line_ms']:>12.2f}{row['scroll_ms_per_step']:>11.3f}"
+              f"{row['peak_py_mb']:>14.2f}{row['anon_rss_delta_mb']:>15.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
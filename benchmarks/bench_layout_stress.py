@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""布局压力测试基准：朴素布局与虚拟化行在不同 N 下的扩展曲线
+
+驱动应用内“布局压力测试”屏幕（LayoutStressTest），对每种布局依次运行
+朴素实现与虚拟化实现，输出构建耗时、首次布局耗时、每单元内存增量与滚动帧率。
+
+用法:
+    python benchmarks/bench_layout_stress.py --kinds grid box --sizes 100 1000 5000
+    python benchmarks/bench_layout_stress.py --sizes 10000 50000 --no-memory
+"""
+import argparse
+import json
+import sys
+
+import headless
+
+
+def run_plan(app, plan, measure_memory=True, timeout=1800):
+    app.switch_screen('stress', None)
+    headless.pump_for(0.6)
+    from main import LayoutStressTest
+    stress = next(w for w in app.root.get_screen('stress').walk(restrict=True)
+                  if isinstance(w, LayoutStressTest))
+    stress.measure_memory = measure_memory
+    stress.run(plan)
+    frames = 0
+    while stress.running and frames < timeout * 60:
+        headless.pump(1)
+        frames += 1
+    return stress.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kinds', nargs='+', default=['grid', 'box', 'stack', 'float'],
+                        choices=['grid', 'box', 'stack', 'float'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000, 5000])
+    parser.add_argument('--no-memory', action='store_true',
+                        help='跳过内存测量（tracemalloc 下再构建一遍，N 较大时很慢）')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    app = headless.start_app(prewarm_screens=False)
+    plan = [(kind, variant, n) for kind in args.kinds for n in args.sizes
+            for variant in ('naive', 'recycled')]
+    results = run_plan(app, plan, measure_memory=not args.no_memory)
+    headless.stop_app(app)
+
+    print(f"{'布局':<7}{'实现':<10}{'N':>7}{'控件':>7}{'构建ms':>10}{'布局ms':>10}"
+          f"{'B/单元':>9}{'滚动fps':>9}{'最长帧ms':>10}")
+    for r in results:
+        memory = f"{r['bytes_per_cell']:.0f}" if r['bytes_per_cell'] is not None else '-'
+        print(f"{r['kind']:<7}{r['variant']:<10}{r['n']:>7}{r['widgets']:>7}{r['build_ms']:>10.1f}"
+              f"{r['layout_ms']:>10.1f}{memory:>9}{r['scroll_fps']:>9.1f}{r['worst_frame_ms']:>10.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
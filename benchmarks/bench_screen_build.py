@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""屏幕构建基准：当前代码与基线版本的对比
+
+基线版本用 git archive 取出到临时目录，默认是引入 SCREEN_SPECS 之前的提交
+（手写构建代码）。当前代码和基线各在独立的子进程中启动应用，取屏幕管理器中
+登记的工厂完整构建每个演示屏幕 --repeat 次，两者交替运行 --rounds 轮，
+报告构建耗时中位数与控件数；当前代码使用声明式规格时另外报告每个规格的编译耗时。
+控件数在另一次（不计时的）构建后推进两帧再统计：TabbedPanel 等控件在下一帧才
+放入内容，构建刚结束时统计会漏掉它们。
+
+用法:
+    python benchmarks/bench_screen_build.py --repeat 30
+    python benchmarks/bench_screen_build.py --baseline HEAD~3 --screens input media --json result.json
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import headless
+
+SCREENS = ['basic_widgets', 'layout', 'input', 'media', 'advanced']
+
+
+def git(*args):
+    return subprocess.run(['git', *args], cwd=headless.ROOT_DIR, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def default_baseline():
+    """引入 SCREEN_SPECS 的提交的父提交"""
+    commits = git('log', '--format=%H', '--reverse', '-S', 'SCREEN_SPECS', '--', 'main.py').split()
+    if not commits:
+        raise SystemExit('找不到引入 SCREEN_SPECS 的提交，请用 --baseline 指定基线版本')
+    return commits[0] + '^'
+
+
+def export_revision(revision, directory):
+    archive = subprocess.run(['git', 'archive', revision], cwd=headless.ROOT_DIR, check=True,
+                             capture_output=True).stdout
+    subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+
+
+def run_factory(result):
+    """执行工厂（可能是生成器）直到得到屏幕"""
+    if not hasattr(result, 'send'):
+        return result
+    while True:
+        try:
+            next(result)
+        except StopIteration as stop:
+            return stop.value
+
+
+def time_build(factory):
+    gc.collect()
+    start = time.perf_counter()
+    run_factory(factory())
+    return time.perf_counter() - start
+
+
+def count_widgets(factory):
+    """构建后推进两帧，等延迟填充的内容就位再统计控件数"""
+    screen = run_factory(factory())
+    headless.pump(2)
+    return sum(1 for _ in screen.walk(restrict=True))
+
+
+def median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def run_worker(source_dir, screens, repeat):
+    """在 source_dir 中的 main.py 上测量，返回原始样本"""
+    # 导入 main 之前需要先有 Window
+    headless.install_window()
+    sys.path.insert(0, source_dir)
+    import main
+    app = headless.start_app(main.KivyUIDemo, prewarm_screens=False)
+    factories = app.root._factories
+    results = {}
+    for name in screens:
+        factory = factories[name]
+        # 第一次构建包含模块导入，不计入
+        time_build(factory)
+        samples = [time_build(factory) for _ in range(repeat)]
+        row = {'samples': samples, 'widgets': count_widgets(factory)}
+        compile_spec = getattr(main, 'compile_spec', None)
+        if compile_spec is not None and name in getattr(main, 'SCREEN_SPECS', {}):
+            row['compile'] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                compile_spec(main.SCREEN_SPECS[name])
+                row['compile'].append(time.perf_counter() - start)
+        results[name] = row
+    headless.stop_app(app)
+    return results
+
+
+def run_pass(source_dir, screens, repeat):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        out_path = f.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', source_dir, '--raw-output', out_path,
+             '--repeat', str(repeat), '--screens', *screens],
+            check=True, stderr=subprocess.DEVNULL
+        )
+        with open(out_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(out_path)
+
+
+def merge(passes):
+    merged = {}
+    for results in passes:
+        for name, row in results.items():
+            target = merged.setdefault(name, {'samples': [], 'compile': [], 'widgets': row['widgets']})
+            target['samples'].extend(row['samples'])
+            target['compile'].extend(row.get('compile', []))
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', help='基线版本（git 修订号），默认是引入 SCREEN_SPECS 之前的提交')
+    parser.add_argument('--repeat', type=int, default=20, help='每轮中每个屏幕的构建次数')
+    parser.add_argument('--rounds', type=int, default=3, help='基线与当前代码交替运行的轮数')
+    parser.add_argument('--screens', nargs='+', default=SCREENS)
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--raw-output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        results = run_worker(args.worker, args.screens, args.repeat)
+        with open(args.raw_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        return 0
+
+    baseline = args.baseline or default_baseline()
+    label = git('rev-parse', '--short', baseline)
+    with tempfile.TemporaryDirectory() as baseline_dir:
+        export_revision(baseline, baseline_dir)
+        passes = {'baseline': [], 'current': []}
+        for _ in range(args.rounds):
+            passes['baseline'].append(run_pass(baseline_dir, args.screens, args.repeat))
+            passes['current'].append(run_pass(headless.ROOT_DIR, args.screens, args.repeat))
+    base, current = merge(passes['baseline']), merge(passes['current'])
+
+    results = {}
+    for name in args.screens:
+        results[name] = {
+            'baseline_ms': median_ms(base[name]['samples']),
+            'current_ms': median_ms(current[name]['samples']),
+            'compile_ms': median_ms(current[name]['compile']) if current[name]['compile'] else None,
+            'widgets': {'baseline': base[name]['widgets'], 'current': current[name]['widgets']},
+        }
+
+    print(f'基线版本 {label}')
+    print(f"{'屏幕':<16}{'控件数':>8}{'基线ms':>10}{'当前ms':>10}{'加速':>8}{'编译ms':>10}")
+    for name, row in results.items():
+        count = row['widgets']['current']
+        if count != row['widgets']['baseline']:
+            count = f"{row['widgets']['baseline']}/{count}"
+        compile_ms = '-' if row['compile_ms'] is None else f"{row['compile_ms']:.3f}"
+        print(f"{name:<16}{count:>8}{row['baseline_ms']:>10.2f}{row['current_ms']:>10.2f}"
+              f"{row['baseline_ms'] / row['current_ms']:>7.2f}x{compile_ms:>10}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'baseline': label, 'screens': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""转场掉帧基准：导航按钮预热目标屏幕前后的对比
+
+模拟在主页按下导航按钮、按住 --hold 帧后松开，统计转场期间的帧数、掉帧数和最长帧，
+然后返回主页，依次覆盖所有演示屏幕。分别测量：
+    cold  - 不在启动后预构建屏幕（prewarm_screens=False），首次访问时才构建
+    warm  - 启动后在后台分段构建全部屏幕，等构建完成后再开始
+每种情况下比较关闭/开启 prewarm_transitions。文字纹理缓存是进程级的，
+因此每个配置都在独立的子进程中从全新的应用开始。
+
+用法:
+    python benchmarks/bench_transitions.py
+    python benchmarks/bench_transitions.py --hold 3 --json result.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import headless
+
+NAV = {
+    'basic_widgets': '基础组件',
+    'layout': '布局管理',
+    'input': '输入组件',
+    'media': '媒体组件',
+    'advanced': '高级组件',
+}
+
+
+def run_flow(background_build, prewarm, hold):
+    app = headless.start_app(prewarm_screens=background_build, prewarm_transitions=prewarm)
+    manager = app.root
+    headless.pump(3)
+    if background_build:
+        for _ in range(3000):
+            if not manager.building:
+                break
+            headless.pump(1)
+    main_screen = manager.get_screen('main')
+    buttons = {w.text: w for w in main_screen.walk(restrict=True) if hasattr(w, 'trigger_action')}
+
+    results = {}
+    for name, text in NAV.items():
+        button = buttons[text]
+        button.dispatch('on_press')
+        headless.pump(hold)
+        button.dispatch('on_release')
+        headless.pump_for(0.7)
+        stats = manager.last_transition or {}
+        if stats.get('screen') == name:
+            results[name] = stats
+        app.switch_screen('main', None)
+        headless.pump_for(0.7)
+    headless.stop_app(app)
+    return results
+
+
+def run_pass(background_build, prewarm, hold):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        out_path = f.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--hold', str(hold), '--raw-output', out_path,
+             '--pass', f'{int(background_build)}{int(prewarm)}'],
+            check=True, stderr=subprocess.DEVNULL
+        )
+        with open(out_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(out_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hold', type=int, default=6, help='按下到松开之间的帧数（约 100ms）')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    parser.add_argument('--pass', dest='mode', help=argparse.SUPPRESS)
+    parser.add_argument('--raw-output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        results = run_flow(args.mode[0] == '1', args.mode[1] == '1', args.hold)
+        with open(args.raw_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        return 0
+
+    results = {}
+    for case, background_build in (('cold', False), ('warm', True)):
+        results[case] = {
+            'off': run_pass(background_build, False, args.hold),
+            'on': run_pass(background_build, True, args.hold),
+        }
+
+    print(f"{'情况':<6}{'屏幕':<16}{'未预热 掉帧':>12}{'最长帧ms':>10}{'预热 掉帧':>12}{'最长帧ms':>10}")
+    for case, row in results.items():
+        totals = [0, 0]
+        for name in NAV:
+            off, on = row['off'].get(name, {}), row['on'].get(name, {})
+            totals[0] += off.get('dropped', 0)
+            totals[1] += on.get('dropped', 0)
+            print(f"{case:<6}{name:<16}{off.get('dropped', '-'):>12}{off.get('worst_ms', 0):>10.1f}"
+                  f"{on.get('dropped', '-'):>12}{on.get('worst_ms', 0):>10.1f}")
+        print(f"{case:<6}{'合计':<16}{totals[0]:>12}{'':>10}{totals[1]:>12}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
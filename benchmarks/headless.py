@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""无窗口环境下运行 KivyUIDemo 的辅助模块
+
+在导入 kivy 之前配置环境变量，使用 mock GL 后端和一个不创建真实窗口的
+Window 提供者，这样基准测试可以在没有显示器的 Linux 主机/CI 上运行。
+控件树、布局、文字渲染与 Clock 调度都会真实执行，只是不向 GPU 提交绘制。
+
+必须在导入 kivy 或 main 之前导入本模块。
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('KIVY_WINDOW', '')
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from kivy.base import EventLoop  # noqa: E402
+from kivy.clock import Clock  # noqa: E402
+from kivy.core.window import WindowBase  # noqa: E402
+import kivy.core.window  # noqa: E402
+
+
+class HeadlessWindow(WindowBase):
+    """不打开系统窗口的 Window 实现"""
+
+    def create_window(self, *largs):
+        super().create_window(*largs)
+
+    def flip(self):
+        pass
+
+    def mainloop(self):
+        pass
+
+    def _set_window_pos(self, x, y):
+        pass
+
+
+def install_window(size=(720, 1280)):
+    """创建并登记无窗口 Window，返回该实例"""
+    if EventLoop.window is not None:
+        return EventLoop.window
+    window = HeadlessWindow()
+    window.size = size
+    kivy.core.window.Window = window
+    EventLoop.window = window
+    return window
+
+
+def start_app(app_class=None, **attrs):
+    """构建并启动应用（不进入主循环），返回 app 实例
+
+    attrs 会在构建前覆盖应用类属性，例如 prewarm_screens=False。
+    """
+    install_window()
+    if app_class is None:
+        from main import KivyUIDemo as app_class
+    app = app_class()
+    for name, value in attrs.items():
+        setattr(app, name, value)
+    app._run_prepare()
+    EventLoop.status = 'started'
+    return app
+
+
+def stop_app(app):
+    app.stop()
+    EventLoop.status = 'idle'
+
+
+def pump(frames=1, frame_time=1 / 60.0):
+    """推进指定帧数，返回每帧耗时（秒）列表
+
+    每帧执行一次完整的 EventLoop.idle()（Clock、布局、绘制），
+    不足 frame_time 的部分用 sleep 补齐，以模拟真实帧间隔。
+    """
+    durations = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        EventLoop.idle()
+        elapsed = time.perf_counter() - start
+        durations.append(elapsed)
+        if elapsed < frame_time:
+            time.sleep(frame_time - elapsed)
+    return durations
+
+
+def pump_for(seconds, frame_time=1 / 60.0):
+    """按真实时间推进 seconds 秒"""
+    frames = max(1, int(seconds / frame_time))
+    return pump(frames, frame_time)
+
+
+def tick():
+    """只推进 Clock，不绘制"""
+    Clock.tick()
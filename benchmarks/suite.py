@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""KivyUIDemo 无窗口基准测试套件
+
+按真实使用流程驱动应用：冷启动 build()、切换到五个演示屏幕、拖动滑块与颜色选择器、
+打开/关闭各类弹窗、轮播图翻页。每个流程记录总耗时、帧耗时 p50/p95/p99、
+循环垃圾回收的停顿次数与最长停顿、Python 内存分配量与进程峰值 RSS，
+结果写成 JSON，并可与保存的基线比较。--gc-auto 关闭应用的 GcScheduler，
+使用解释器的自动回收，用于对比。
+
+tracemalloc 会显著拖慢执行，因此计时与内存分配分别在两个子进程中测量，
+每个子进程都从全新的应用实例开始。
+
+用法:
+    python benchmarks/suite.py                       # 运行并与 baseline.json 比较
+    python benchmarks/suite.py --save-baseline       # 把本次结果保存为基线
+    python benchmarks/suite.py --output result.json --fail-on-regression
+    python benchmarks/suite.py --gc-auto --output gc-auto.json
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import headless
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+SCREENS = ['basic_widgets', 'layout', 'input', 'media', 'advanced']
+DIALOGS = ['message', 'custom', 'modal', 'bubble']
+
+# 与基线比较时允许的波动比例
+DEFAULT_TOLERANCE = 0.2
+# 参与回归判断的指标
+COMPARED_METRICS = ('wall_ms', 'frame_p95_ms', 'alloc_kb')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Recorder:
+    """记录单个流程的耗时、帧耗时与内存分配"""
+
+    def __init__(self, trace_alloc):
+        self.trace_alloc = trace_alloc
+        self.results = {}
+        self.gc_pauses = []
+        self._gc_start = None
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self.gc_pauses.append(time.perf_counter() - self._gc_start)
+            self._gc_start = None
+
+    def run(self, name, flow):
+        frames = []
+        self.gc_pauses = []
+        if self.trace_alloc:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        flow(frames)
+        wall = time.perf_counter() - start
+        result = {}
+        if self.trace_alloc:
+            _, peak = tracemalloc.get_traced_memory()
+            result['alloc_kb'] = (peak - base) / 1024
+        else:
+            frames_ms = [f * 1000 for f in frames]
+            result.update({
+                'wall_ms': wall * 1000,
+                'frames': len(frames_ms),
+                'frame_p50_ms': percentile(frames_ms, 50),
+                'frame_p95_ms': percentile(frames_ms, 95),
+                'frame_p99_ms': percentile(frames_ms, 99),
+                'gc_pauses': len(self.gc_pauses),
+                'gc_max_ms': max(self.gc_pauses, default=0) * 1000,
+                # Linux 上 ru_maxrss 的单位是 KB
+                'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            })
+        self.results[name] = result
+
+
+def find_widget(root, cls):
+    return next(w for w in root.walk(restrict=True) if isinstance(w, cls))
+
+
+def settle(frames, seconds=0.6):
+    """等待转场等动画完成，记录期间的帧耗时"""
+    frames.extend(headless.pump_for(seconds))
+
+
+def run_flows(trace_alloc, gc_scheduling=True):
+    recorder = Recorder(trace_alloc)
+    if trace_alloc:
+        tracemalloc.start()
+    state = {}
+
+    def cold_build(frames):
+        app = state['app'] = headless.start_app(prewarm_screens=False, gc_scheduling=gc_scheduling)
+        frames.extend(headless.pump(3))
+        return app
+
+    recorder.run('cold_build', cold_build)
+    app = state['app']
+
+    for name in SCREENS:
+        def switch(frames, name=name):
+            app.switch_screen(name, None)
+            settle(frames)
+        recorder.run(f'switch_{name}', switch)
+
+    from kivy.uix.slider import Slider
+    from kivy.uix.colorpicker import ColorPicker
+    from kivy.uix.carousel import Carousel
+    from kivy.uix.tabbedpanel import TabbedPanel
+
+    def drag_slider(frames):
+        app.switch_screen('input', None)
+        settle([])
+        slider = find_widget(app.root.get_screen('input'), Slider)
+        # 每帧 8 次 value 变化，模拟手指拖动时密集的 touch move 事件
+        for step in range(120):
+            for sub in range(8):
+                slider.value = (step * 8 + sub) % 100
+            frames.extend(headless.pump(1))
+    recorder.run('drag_slider', drag_slider)
+
+    def drag_color(frames):
+        app.switch_screen('media', None)
+        settle([])
+        picker = find_widget(app.root.get_screen('media'), ColorPicker)
+        for step in range(120):
+            for sub in range(8):
+                hue = ((step * 8 + sub) % 360) / 360.0
+                picker.color = (hue, 1 - hue, 0.5, 1)
+            frames.extend(headless.pump(1))
+    recorder.run('drag_color_picker', drag_color)
+
+    app.switch_screen('advanced', None)
+    headless.pump_for(0.6)
+    from bench_dialogs import DIALOGS as OPENERS, close_dialog
+    for kind in DIALOGS:
+        def open_close(frames, kind=kind):
+            for _ in range(10):
+                OPENERS[kind](app)
+                settle(frames, 0.25)
+                close_dialog(app, kind)
+                settle(frames, 0.1)
+        recorder.run(f'dialog_{kind}', open_close)
+
+    def carousel_swipes(frames):
+        panel = find_widget(app.root.get_screen('advanced'), TabbedPanel)
+        tab = next(t for t in panel.tab_list if isinstance(t.content, Carousel))
+        panel.switch_to(tab)
+        carousel = tab.content
+        for _ in range(8):
+            carousel.load_next()
+            settle(frames, 0.35)
+    recorder.run('carousel_swipes', carousel_swipes)
+
+    headless.stop_app(app)
+    return recorder.results
+
+
+def run_pass(mode, gc_auto=False):
+    """在子进程中运行一遍流程，返回结果"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        out_path = f.name
+    try:
+        command = [sys.executable, os.path.abspath(__file__), '--pass', mode, '--raw-output', out_path]
+        if gc_auto:
+            command.append('--gc-auto')
+        subprocess.run(command, check=True)
+        with open(out_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(out_path)
+
+
+def compare(results, baseline, tolerance):
+    """返回回归列表 [(流程, 指标, 基线值, 当前值)]"""
+    regressions = []
+    for flow, metrics in results['flows'].items():
+        base = baseline.get('flows', {}).get(flow)
+        if not base:
+            continue
+        for key in COMPARED_METRICS:
+            if key in metrics and base.get(key):
+                if metrics[key] > base[key] * (1 + tolerance):
+                    regressions.append((flow, key, base[key], metrics[key]))
+    return regressions
+
+
+def print_table(results, baseline):
+    base_flows = (baseline or {}).get('flows', {})
+    print(f"{'流程':<22}{'总耗时ms':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'GC次数':>8}{'GC最长':>8}"
+          f"{'分配KB':>10}{'RSS MB':>9}{'对比基线':>10}")
+    for flow, m in results['flows'].items():
+        delta = ''
+        base = base_flows.get(flow)
+        if base and base.get('wall_ms'):
+            delta = f"{(m['wall_ms'] / base['wall_ms'] - 1) * 100:+.0f}%"
+        print(f"{flow:<22}{m['wall_ms']:>10.1f}{m['frame_p50_ms']:>8.2f}{m['frame_p95_ms']:>8.2f}"
+              f"{m['frame_p99_ms']:>8.2f}{m.get('gc_pauses', 0):>8}{m.get('gc_max_ms', 0):>8.2f}"
+              f"{m.get('alloc_kb', 0):>10.0f}{m['peak_rss_mb']:>9.1f}{delta:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='结果 JSON 输出路径')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线 JSON 路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='允许的劣化比例，默认 0.2 即 20%%')
+    parser.add_argument('--fail-on-regression', action='store_true', help='存在回归时返回非零退出码')
+    parser.add_argument('--gc-auto', action='store_true', help='关闭 GcScheduler，使用解释器的自动回收')
+    parser.add_argument('--pass', dest='mode', choices=['timing', 'alloc'], help=argparse.SUPPRESS)
+    parser.add_argument('--raw-output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        results = run_flows(trace_alloc=args.mode == 'alloc', gc_scheduling=not args.gc_auto)
+        with open(args.raw_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        return 0
+
+    timing = run_pass('timing', args.gc_auto)
+    allocs = run_pass('alloc', args.gc_auto)
+    for flow, values in allocs.items():
+        timing.setdefault(flow, {}).update(values)
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'flows': timing,
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'已保存基线: {args.baseline}')
+        return 0
+
+    if baseline is None:
+        print(f'未找到基线 {args.baseline}，可使用 --save-baseline 生成')
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for flow, key, before, after in regressions:
+        print(f'回归: {flow}.{key} {before:.2f} -> {after:.2f}')
+    if not regressions:
+        print('与基线相比没有超出容差的回归')
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
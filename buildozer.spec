@@ -5,7 +5,9 @@ package.domain = top.shumengya.kivyapp
 version = 0.3
 source.dir = .
 source.main = main.py
-source.include_exts = py,png,jpg,kv,atlas
+source.include_exts = py,png,jpg,kv,atlas,ttf
+# 构建期脚本、基准测试与回归测试不打包进 APK
+source.exclude_dirs = tools,benchmarks,tests
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
@@ -1,112 +1,4131 @@
 # -*- coding: utf-8 -*-
+import array
+import gc
+import hashlib
+import heapq
+import importlib
+import json
 import logging
+import math
+import mmap
+import platform
+import struct
+import sys
+import tempfile
+import threading
 import traceback
 import os
+import time
+import tracemalloc
+import weakref
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class _TimedLoader:
+    """包装模块加载器，记录 exec_module 的耗时"""
+
+    def __init__(self, loader, timer):
+        self._loader = loader
+        self._timer = timer
+
+    def create_module(self, spec):
+        create = getattr(self._loader, 'create_module', None)
+        return create(spec) if create is not None else None
+
+    def exec_module(self, module):
+        self._timer.enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer.leave(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer:
+    """应用内的模块导入计时，效果类似 python -X importtime
+
+    作为 sys.meta_path 的第一个查找器，把其余查找器找到的加载器包装起来，
+    记录每个模块的自身耗时与累计耗时（含其导入的子模块）。
+    需要在导入 kivy 之前安装，启动报告输出后卸载。
+    """
+
+    def __init__(self):
+        self.records = []
+        self._children = []
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def enter(self):
+        self._children.append(0.0)
+
+    def leave(self, name, elapsed):
+        children = self._children.pop()
+        if self._children:
+            self._children[-1] += elapsed
+        self.records.append((name, elapsed - children, elapsed, len(self._children)))
+
+    @property
+    def total(self):
+        """顶层导入的累计耗时之和（秒）"""
+        return sum(cumulative for _, _, cumulative, depth in self.records if depth == 0)
+
+    def top(self, count=10):
+        """按累计耗时排序的 [(模块, 自身秒数, 累计秒数)]"""
+        ranked = sorted(self.records, key=lambda record: -record[2])[:count]
+        return [(name, own, cumulative) for name, own, cumulative, _ in ranked]
+
+
+# 进程启动时间点，用于计算首帧等启动指标
+_PROCESS_START = time.perf_counter()
+
+# 必须在导入 kivy 之前安装，才能统计启动时的全部导入
+import_timer = ImportTimer()
+import_timer.install()
+
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.stacklayout import StackLayout
-from kivy.uix.anchorlayout import AnchorLayout
-from kivy.uix.floatlayout import FloatLayout
-from kivy.uix.relativelayout import RelativeLayout
+from kivy.uix.layout import Layout
+from kivy.uix.widget import Widget
 from kivy.uix.label import Label
 from kivy.uix.button import Button
-from kivy.uix.textinput import TextInput
-from kivy.uix.slider import Slider
-from kivy.uix.progressbar import ProgressBar
-from kivy.uix.checkbox import CheckBox
-from kivy.uix.switch import Switch
-from kivy.uix.spinner import Spinner
-from kivy.uix.image import Image
-from kivy.uix.video import Video
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
-from kivy.uix.accordion import Accordion, AccordionItem
-from kivy.uix.carousel import Carousel
-from kivy.uix.popup import Popup
-from kivy.uix.filechooser import FileChooserListView
-from kivy.uix.colorpicker import ColorPicker
-from kivy.uix.bubble import Bubble, BubbleButton
-from kivy.uix.actionbar import ActionBar, ActionView, ActionPrevious, ActionButton
-from kivy.uix.splitter import Splitter
-from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.uix.modalview import ModalView
-from kivy.uix.settings import Settings
+from kivy.uix.screenmanager import ScreenManager, Screen, ScreenManagerException
+from kivy.animation import Animation
 from kivy.clock import Clock
-from kivy.graphics import Color, Rectangle, Line, Ellipse
+from kivy.properties import (BooleanProperty, ListProperty, NumericProperty,
+                             OptionProperty, StringProperty)
+from kivy.graphics import Color, Rectangle, Line, Ellipse, InstructionGroup, Mesh
+from kivy.graphics.texture import Texture
 from kivy.logger import Logger
-from kivy.metrics import dp
-from kivy.core.text import LabelBase
-from kivy.resources import resource_add_path
+from kivy.metrics import dp, dpi2px
+from kivy.core.text import Label as CoreLabel, LabelBase
+from kivy.resources import resource_add_path, resource_find
 from functools import partial
 
-# 配置日志
-logging.basicConfig(level=logging.DEBUG)
-Logger.setLevel(logging.DEBUG)
+LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+}
+
+
+def parse_log_level(level):
+    if isinstance(level, str):
+        return LOG_LEVELS[level.strip().lower()]
+    return int(level)
+
+
+class LogChannel:
+    """某个子系统的日志入口
+
+    消息使用 % 风格的参数，低于本通道级别的调用直接返回，不做任何格式化。
+    """
+
+    __slots__ = ('applog', 'name', 'prefix', 'level')
+
+    def __init__(self, applog, name, prefix, level):
+        self.applog = applog
+        self.name = name
+        self.prefix = prefix
+        self.level = level
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def debug(self, msg, *args):
+        if logging.DEBUG >= self.level:
+            self.applog.emit(self, logging.DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        if logging.INFO >= self.level:
+            self.applog.emit(self, logging.INFO, msg, args)
+
+    def warning(self, msg, *args):
+        if logging.WARNING >= self.level:
+            self.applog.emit(self, logging.WARNING, msg, args)
+
+    def error(self, msg, *args):
+        if logging.ERROR >= self.level:
+            self.applog.emit(self, logging.ERROR, msg, args)
+
+
+class _RingHandler(logging.Handler):
+    """把 Kivy 自身的日志记录放进环形缓冲区，崩溃转储时一并输出"""
+
+    def __init__(self, applog):
+        super().__init__()
+        self.applog = applog
+
+    def emit(self, record):
+        if not getattr(record, 'applog', False):
+            self.applog.ring.append((record.created, record.levelno, 'kivy', record.msg, record.args))
+
+
+class AppLog:
+    """非阻塞的应用日志
+
+    记录以未格式化的 (时间, 级别, 子系统, 消息, 参数) 形式放入有界环形缓冲区；
+    后台写线程每隔 flush_interval 秒批量格式化并追加到轮转日志文件，
+    UI 线程上不做文件 I/O。级别达到 console_level 的记录同时转发给 Kivy Logger
+    （控制台/logcat）。各子系统的级别可在运行时通过 set_level() 调整。
+    """
+
+    def __init__(self, capacity=2000, default_level=logging.INFO, console_level=logging.INFO,
+                 max_bytes=512 * 1024, backups=3, flush_interval=0.5):
+        self.ring = deque(maxlen=capacity)
+        self.default_level = default_level
+        self.console_level = console_level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.directory = None
+        self.path = None
+        self._pending = deque()
+        self._levels = {}
+        self._channels = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+
+    def channel(self, name, prefix='KivyUIDemo'):
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = self._channels[name] = LogChannel(
+                self, name, prefix, self._levels.get(name, self.default_level))
+        return channel
+
+    def set_level(self, name, level):
+        """调整子系统的日志级别；name 为 None 时调整默认级别"""
+        level = parse_log_level(level)
+        if name is None:
+            self.default_level = level
+            for channel in self._channels.values():
+                if channel.name not in self._levels:
+                    channel.level = level
+        else:
+            self._levels[name] = level
+            if name in self._channels:
+                self._channels[name].level = level
+
+    def configure(self, spec):
+        """按 "screen=debug,files=warning,*=info" 形式的配置设置级别"""
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            name, _, level = item.partition('=')
+            try:
+                self.set_level(None if name.strip() == '*' else name.strip(), level)
+            except (KeyError, ValueError):
+                Logger.warning(f"KivyUIDemo: 无法识别的日志级别配置 {item}")
+
+    def emit(self, channel, level, msg, args):
+        record = (time.time(), level, channel.name, msg, args)
+        self.ring.append(record)
+        if self.directory is not None:
+            self._pending.append(record)
+        if level >= self.console_level:
+            # Kivy 按消息中第一个冒号拆出标题，因此传入已格式化的完整文本
+            Logger.log(level, f'{channel.prefix}: {self.message(msg, args)}', extra={'applog': True})
+
+    @staticmethod
+    def message(msg, args):
+        if not args:
+            return str(msg)
+        try:
+            return str(msg) % args
+        except (TypeError, ValueError):
+            return f'{msg} {args!r}'
+
+    @classmethod
+    def format_record(cls, record):
+        created, level, name, msg, args = record
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))
+        return (f'{stamp}.{int(created % 1 * 1000):03d} {logging.getLevelName(level):<7} '
+                f'[{name}] {cls.message(msg, args)}\n')
+
+    def capture_kivy_logs(self):
+        """把 Kivy Logger 的记录也收入环形缓冲区"""
+        if not any(isinstance(h, _RingHandler) for h in Logger.handlers):
+            Logger.addHandler(_RingHandler(self))
+
+    # 后台写入
+
+    def start_writer(self, directory):
+        """在 directory 下写轮转日志文件 app.log，目录无法创建时抛出 OSError"""
+        if self._thread is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, 'app.log')
+        # 启动前的记录也写入文件
+        self._pending.extend(record for record in self.ring if record[2] != 'kivy')
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def stop_writer(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush()
+
+    def _run(self, stop):
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                # 写入失败时丢弃这一批，环形缓冲区中仍保留最近的记录
+                pass
+
+    def flush(self):
+        if self.path is None:
+            return
+        with self._write_lock:
+            batch = []
+            while self._pending:
+                batch.append(self.format_record(self._pending.popleft()))
+            if not batch:
+                return
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(batch))
+                size = f.tell()
+            if size > self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        os.replace(self.path, f'{self.path}.1')
+
+    def dump(self, reason):
+        """把环形缓冲区的全部记录同步写入崩溃日志，返回文件路径
+
+        在崩溃处理路径上调用，不依赖后台线程；写文件失败时输出到 stderr。
+        """
+        header = f'=== {reason} @ {time.strftime("%Y-%m-%d %H:%M:%S")} ===\n'
+        lines = [self.format_record(record) for record in list(self.ring)]
+        try:
+            self.flush()
+        except OSError:
+            pass
+        directory = self.directory or tempfile.gettempdir()
+        path = os.path.join(directory, time.strftime('crash-%Y%m%d-%H%M%S.log'))
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(header)
+                f.writelines(lines)
+            return path
+        except OSError:
+            sys.stderr.write(header + ''.join(lines))
+            return None
+
+
+# 在 Android 上只把警告以上的记录转发到 logcat，其余只进环形缓冲区和日志文件
+applog = AppLog(console_level=logging.WARNING if 'ANDROID_ARGUMENT' in os.environ else logging.INFO)
+# 运行前可用环境变量调整各子系统级别，例如 KIVYUIDEMO_LOG="screen=debug,files=debug"
+applog.configure(os.environ.get('KIVYUIDEMO_LOG', ''))
+applog.capture_kivy_logs()
+
+main_log = applog.channel('main', prefix='主程序')
+app_log = applog.channel('app')
+font_log = applog.channel('font')
+screen_log = applog.channel('screen')
+file_log = applog.channel('files')
+perf_log = applog.channel('perf')
+task_log = applog.channel('tasks')
+
+
+class PerfMetrics:
+    """轻量级性能指标：计数器与耗时样本"""
+
+    def __init__(self, max_samples=256):
+        self.max_samples = max_samples
+        self.counters = {}
+        self.timings = {}
+        self._marks = {}
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, seconds):
+        samples = self.timings.get(name)
+        if samples is None:
+            samples = self.timings[name] = deque(maxlen=self.max_samples)
+        samples.append(seconds)
+
+    def mark(self, name):
+        """记录一次事件发生的时间，用于计算速率"""
+        self.incr(name)
+        marks = self._marks.get(name)
+        if marks is None:
+            marks = self._marks[name] = deque(maxlen=4096)
+        marks.append(time.perf_counter())
+
+    def rate(self, name, window=1.0):
+        """最近 window 秒内每秒发生的次数"""
+        marks = self._marks.get(name)
+        if not marks:
+            return 0.0
+        cutoff = time.perf_counter() - window
+        return sum(1 for stamp in marks if stamp >= cutoff) / window
+
+    def last(self, name, default=None):
+        samples = self.timings.get(name)
+        return samples[-1] if samples else default
+
+    def since_start(self):
+        """距进程启动经过的秒数"""
+        return time.perf_counter() - _PROCESS_START
+
+    def snapshot(self):
+        """返回可序列化的指标快照"""
+        return {
+            'counters': dict(self.counters),
+            'timings': {name: list(samples) for name, samples in self.timings.items()},
+        }
+
+
+metrics = PerfMetrics()
+
+
+class LazyImporter:
+    """按需导入的控件类命名空间
+
+    第一次访问 uix.ColorPicker 之类的属性时才导入对应模块，
+    导入耗时记入 metrics 的 import.<模块>，之后直接返回缓存的类。
+    """
+
+    def __init__(self, modules):
+        self._modules = modules
+
+    def __getattr__(self, name):
+        module_name = self._modules.get(name)
+        if module_name is None:
+            raise AttributeError(name)
+        start = time.perf_counter()
+        value = getattr(importlib.import_module(module_name), name)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.0005:
+            metrics.record(f'import.{module_name}', elapsed)
+        setattr(self, name, value)
+        return value
+
+
+# 只在部分屏幕中使用的控件，由对应屏幕首次构建时导入
+uix = LazyImporter({
+    'GridLayout': 'kivy.uix.gridlayout',
+    'StackLayout': 'kivy.uix.stacklayout',
+    'AnchorLayout': 'kivy.uix.anchorlayout',
+    'FloatLayout': 'kivy.uix.floatlayout',
+    'RelativeLayout': 'kivy.uix.relativelayout',
+    'TextInput': 'kivy.uix.textinput',
+    'Slider': 'kivy.uix.slider',
+    'ProgressBar': 'kivy.uix.progressbar',
+    'CheckBox': 'kivy.uix.checkbox',
+    'Switch': 'kivy.uix.switch',
+    'Spinner': 'kivy.uix.spinner',
+    'Image': 'kivy.uix.image',
+    'ScrollView': 'kivy.uix.scrollview',
+    'TabbedPanel': 'kivy.uix.tabbedpanel',
+    'TabbedPanelItem': 'kivy.uix.tabbedpanel',
+    'Accordion': 'kivy.uix.accordion',
+    'AccordionItem': 'kivy.uix.accordion',
+    'Carousel': 'kivy.uix.carousel',
+    'Popup': 'kivy.uix.popup',
+    'ModalView': 'kivy.uix.modalview',
+    'RecycleView': 'kivy.uix.recycleview',
+    'RecycleBoxLayout': 'kivy.uix.recycleboxlayout',
+    'ColorPicker': 'kivy.uix.colorpicker',
+    'Bubble': 'kivy.uix.bubble',
+    'BubbleButton': 'kivy.uix.bubble',
+    'BubbleContent': 'kivy.uix.bubble',
+    'Splitter': 'kivy.uix.splitter',
+})
+
+
+class TraceRecorder:
+    """录制性能会话，导出为 Chrome trace-event JSON
+
+    导出的文件可在 chrome://tracing 或 Perfetto 中离线查看。
+    未开始录制时所有记录调用都直接返回，开销可以忽略。
+    """
+
+    # 主线程与采样线程在 trace 中的线程编号
+    MAIN_TID = 1
+    SAMPLER_TID = 2
+
+    def __init__(self, max_events=200000):
+        self.active = False
+        self.events = deque(maxlen=max_events)
+
+    def start(self):
+        self.events.clear()
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    @staticmethod
+    def _ts(stamp):
+        return (stamp - _PROCESS_START) * 1e6
+
+    def complete(self, name, start, duration, cat='app', tid=MAIN_TID):
+        """记录一段耗时（start 为 perf_counter 时间点，单位秒）"""
+        if self.active:
+            self.events.append({'name': name, 'cat': cat, 'ph': 'X', 'pid': 1, 'tid': tid,
+                                'ts': self._ts(start), 'dur': duration * 1e6})
+
+    def counter(self, name, **values):
+        if self.active:
+            self.events.append({'name': name, 'ph': 'C', 'pid': 1, 'tid': self.MAIN_TID,
+                                'ts': self._ts(time.perf_counter()), 'args': values})
+
+    def export(self, path):
+        """写出 trace 文件，返回写入的事件数"""
+        events = list(self.events)
+        meta = [
+            {'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'KivyUIDemo'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': self.MAIN_TID, 'args': {'name': '主线程'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': self.SAMPLER_TID, 'args': {'name': '采样'}},
+        ]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': meta + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return len(events)
+
+
+tracer = TraceRecorder()
+
+
+def timed(name, callback):
+    """包装 Clock 回调，把每次调用耗时记入 metrics 的 clock.<name> 与 trace"""
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return callback(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record(f'clock.{name}', elapsed)
+            tracer.complete(name, start, elapsed, 'clock')
+    return wrapper
+
+
+class SamplingProfiler:
+    """采样分析器
+
+    后台线程每隔 interval 秒抓取一次主线程调用栈，把样本归到栈上
+    最内层属于本模块的函数（如 KivyUIDemo.update_progress）；
+    栈上没有本模块函数时归为 Kivy 内部或空闲等待。需要时手动开启。
+    """
+
+    OTHER = '(Kivy/空闲)'
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._target = threading.main_thread().ident
+        self._own_files = {}
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread = None
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            name = self._attribute(frame)
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.samples += 1
+            tracer.complete(name, time.perf_counter() - self.interval, self.interval,
+                            'sample', TraceRecorder.SAMPLER_TID)
+
+    def _is_own(self, filename):
+        own = self._own_files.get(filename)
+        if own is None:
+            own = self._own_files[filename] = os.path.abspath(filename) == os.path.abspath(__file__)
+        return own
+
+    def _attribute(self, frame):
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name != '<module>' and self._is_own(code.co_filename):
+                return getattr(code, 'co_qualname', code.co_name)
+            frame = frame.f_back
+        return self.OTHER
+
+    def top(self, count=5):
+        """返回 [(函数名, 占比)]，按样本数从多到少"""
+        total = self.samples or 1
+        ranked = sorted(dict(self.counts).items(), key=lambda item: -item[1])[:count]
+        return [(name, hits / total) for name, hits in ranked]
+
+
+profiler = SamplingProfiler()
+
+
+def estimate_texture_bytes(widget):
+    """估算控件树中文字/图像纹理占用的显存（按 RGBA 每像素 4 字节）"""
+    total = 0
+    seen = set()
+    for child in widget.walk(restrict=True):
+        texture = getattr(child, 'texture', None)
+        if texture is None or id(texture) in seen:
+            continue
+        seen.add(id(texture))
+        total += texture.width * texture.height * 4
+    return total
+
+
+def count_canvas_instructions(group):
+    """统计指令组（含子控件画布）中的绘图指令数量"""
+    total = 0
+    for instruction in group.children:
+        if isinstance(instruction, InstructionGroup):
+            total += count_canvas_instructions(instruction)
+        else:
+            total += 1
+    return total
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），只在 Linux/Android 上可用，其他平台返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def is_descendant(widget, ancestor):
+    """判断 widget 是否位于 ancestor 的控件树中"""
+    while widget is not None:
+        if widget is ancestor:
+            return True
+        parent = widget.parent
+        widget = parent if parent is not widget else None
+    return False
+
+
+def owning_screen(widget):
+    """返回 widget 所在的 Screen，不在任何屏幕中时返回 None"""
+    while widget is not None and not isinstance(widget, Screen):
+        parent = widget.parent
+        widget = parent if parent is not widget else None
+    return widget
+
+
+def describe_file(path):
+    """读取文件信息（在工作线程中调用）"""
+    st = os.stat(path)
+    return {
+        'path': path,
+        'name': os.path.basename(path),
+        'size': st.st_size,
+        'mtime': st.st_mtime,
+        'mtime_ns': st.st_mtime_ns,
+    }
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f}{unit}' if unit == 'B' else f'{size:.1f}{unit}'
+        size /= 1024
+
+
+# 中文字体在 LabelBase 中注册的名称
+FONT_NAME = 'Chinese'
+# 界面固定文字（标题、说明、导航按钮）使用的字体，存在子集字体时注册为子集字体，否则与 FONT_NAME 相同
+UI_FONT_NAME = 'ChineseUI'
+
+# 应用所在目录，内置资源相对于此目录查找
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 随应用打包的子集字体（相对 APP_DIR），只用于 UI_FONT_NAME：
+# 输入框、文件名、文件预览等动态文字可能包含子集之外的字符，仍使用完整字体
+BUNDLED_FONTS = [
+    'fonts/ui_subset.ttf',
+]
+
+# 系统中可能存在的中文字体
+SYSTEM_CJK_FONTS = [
+    '/system/fonts/NotoSansCJK-Regular.ttc',  # Android系统字体
+    '/system/fonts/DroidSansFallback.ttf',    # 旧版Android字体
+    '/system/fonts/NotoSansCJK.ttc',          # 新版Android字体
+    'DroidSansFallback.ttf',                  # 相对路径
+    'NotoSansCJK-Regular.ttc'                 # 相对路径
+]
+
+# Kivy 自带的默认字体，找不到中文字体时使用
+DEFAULT_FONT_FILE = 'data/fonts/Roboto-Regular.ttf'
+
+# 字体探测结果缓存文件（位于 user_data_dir）
+FONT_CACHE_FILE = 'font_cache.json'
+
+
+def font_fingerprint():
+    """系统字体集合的指纹：系统版本 + 字体目录修改时间"""
+    parts = [platform.system(), platform.release()]
+    for directory in sorted({os.path.dirname(p) for p in SYSTEM_CJK_FONTS if os.path.dirname(p)}):
+        try:
+            parts.append(f'{directory}:{os.stat(directory).st_mtime_ns}')
+        except OSError:
+            parts.append(f'{directory}:-')
+    return '|'.join(parts)
+
+
+def load_font_cache(cache_path, fingerprint):
+    """读取缓存的字体路径，指纹不符或文件已不存在时返回 None"""
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    font_path = data.get('font_path')
+    if data.get('fingerprint') != fingerprint or not font_path or not os.path.exists(font_path):
+        return None
+    return font_path
+
+
+def save_font_cache(cache_path, fingerprint, font_path):
+    try:
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'font_path': os.path.abspath(font_path)}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        font_log.warning('写入字体缓存失败: %s', e)
+
+# 共享的文字样式预设，尺寸使用字符串单位以便在创建控件时再换算；
+# 未指定 font_name 的样式使用完整字体 FONT_NAME。显示文件名、路径等子集字体
+# 覆盖不到的文字时，即使使用 caption 样式也要传入 font_name=FONT_NAME
+TEXT_STYLES = {
+    'app_title': {'font_size': '24sp', 'size_hint_y': None, 'height': '60dp',
+                  'color': (0.2, 0.6, 1, 1), 'font_name': UI_FONT_NAME},
+    'title': {'font_size': '20sp', 'size_hint_y': None, 'height': '50dp',
+              'color': (1, 0.5, 0, 1), 'font_name': UI_FONT_NAME},
+    'caption': {'size_hint_y': None, 'height': '30dp', 'font_name': UI_FONT_NAME},
+    'text': {},
+    'button': {'size_hint_y': None, 'height': '50dp'},
+    'row': {'size_hint_y': None, 'height': '40dp'},
+    'nav_button': {'size_hint_y': None, 'height': '50dp',
+                   'background_color': (0.3, 0.7, 0.9, 1), 'font_name': UI_FONT_NAME},
+    'back_button': {'size_hint_y': None, 'height': '50dp',
+                    'background_color': (0.5, 0.5, 0.5, 1), 'font_name': UI_FONT_NAME},
+}
+
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+
+class LabelTextureCache:
+    """进程级的文字纹理缓存
+
+    以文字、字体、字号、颜色等渲染参数为键，内容相同的标签共享同一张纹理。
+    每个缓存项持有自己的 CoreLabel，纹理在 GL 上下文重建时也能正确重绘；
+    超出 max_bytes 时按最近最少使用顺序淘汰。
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key_for(label):
+        return (label.__class__.__name__, label.disabled) + tuple(
+            _hashable(getattr(label, name)) for name in Label._font_properties
+        )
+
+    def fetch(self, label):
+        """返回渲染 label 当前内容的 CoreLabel，未命中时渲染并缓存"""
+        key = self.key_for(label)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            metrics.incr('texture_cache.hit')
+            return entry[0]
+        metrics.incr('texture_cache.miss')
+        options = {name: getattr(label, name) for name in Label._font_properties}
+        options['usersize'] = label.text_size
+        if label.disabled:
+            options['color'] = label.disabled_color
+            options['outline_color'] = label.disabled_outline_color
+        core = CoreLabel(**options)
+        core.refresh()
+        metrics.mark('label.texture_rebuild')
+        texture = core.texture
+        if texture is None or texture.width <= 1 or texture.height <= 1:
+            return core
+        size = texture.width * texture.height * 4
+        self._entries[key] = (core, size)
+        self.bytes += size
+        self._evict()
+        return core
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            metrics.incr('texture_cache.eviction')
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        counters = metrics.counters
+        return {
+            'hits': counters.get('texture_cache.hit', 0),
+            'misses': counters.get('texture_cache.miss', 0),
+            'evictions': counters.get('texture_cache.eviction', 0),
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+        }
+
+
+label_texture_cache = LabelTextureCache()
+
+
+class CachedTextureMixin:
+    """让 Label 系控件从 label_texture_cache 获取纹理
+
+    markup 文字需要 refs/anchors，仍走 Label 自己的渲染流程。
+    纹理重建只在缓存未命中（LabelTextureCache.fetch）和走 Label 自身渲染时计数。
+    """
+
+    def texture_update(self, *largs):
+        if self.markup or not self.text or label_texture_cache.max_bytes <= 0:
+            super().texture_update(*largs)
+            if self.texture is not None:
+                metrics.mark('label.texture_rebuild')
+            return
+        core = label_texture_cache.fetch(self)
+        self.texture = core.texture
+        self.texture_size = list(core.texture.size) if core.texture is not None else [0, 0]
+        self.is_shortened = core.is_shortened
+
+
+class CachedLabel(CachedTextureMixin, Label):
+    pass
+
+
+class CachedButton(CachedTextureMixin, Button):
+    pass
+
+
+def _count_texture_rebuild(instance, texture):
+    """不经过文字纹理缓存的标签每渲染一次计一次纹理重建
+
+    Label.texture_update 先把 texture 置为 None，渲染完成后才赋新纹理，只计后者。
+    """
+    if texture is not None:
+        metrics.mark('label.texture_rebuild')
+
+
+def styled(cls, text, style='text', **overrides):
+    """按样式预设创建带中文字体的文字控件
+
+    字体只在创建时设置一次，之后的更新只修改 text。
+    """
+    kwargs = {'font_name': FONT_NAME}
+    kwargs.update(TEXT_STYLES[style])
+    kwargs.update(overrides)
+    widget = cls(text=text, **kwargs)
+    if not isinstance(widget, CachedTextureMixin):
+        widget.fbind('texture', _count_texture_rebuild)
+    return widget
+
+
+def make_label(text, style='text', **overrides):
+    return styled(CachedLabel, text, style, **overrides)
+
+
+def make_button(text, style='button', **overrides):
+    return styled(CachedButton, text, style, **overrides)
+
+
+class ScreenTimers:
+    """屏幕作用域的定时器与动画
+
+    登记的周期回调和动画只在屏幕可见时运行：
+    on_enter 时启动，on_leave 时停止，应用暂停时也会统一停止。
+    """
+
+    _instances = weakref.WeakSet()
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.running = False
+        self._timers = []
+        self._animations = []
+        self._events = []
+        screen.bind(on_enter=self._on_enter, on_leave=self._on_leave)
+        ScreenTimers._instances.add(self)
+
+    def schedule_interval(self, callback, interval):
+        """登记周期回调，屏幕可见期间每 interval 秒调用一次"""
+        callback = timed(getattr(callback, '__name__', 'timer'), callback)
+        self._timers.append((callback, interval))
+        if self.running:
+            self._events.append(Clock.schedule_interval(callback, interval))
+
+    def add_animation(self, animation, widget):
+        """登记动画，屏幕可见期间在 widget 上播放"""
+        self._animations.append((animation, widget))
+        if self.running:
+            animation.start(widget)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._events = [Clock.schedule_interval(cb, interval) for cb, interval in self._timers]
+        for animation, widget in self._animations:
+            animation.start(widget)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        for event in self._events:
+            event.cancel()
+        self._events = []
+        for animation, widget in self._animations:
+            animation.cancel(widget)
+
+    def _on_enter(self, screen):
+        self.start()
+
+    def _on_leave(self, screen):
+        self.stop()
+
+    @property
+    def active_count(self):
+        return len(self._events) + (len(self._animations) if self.running else 0)
+
+    @classmethod
+    def total_active(cls):
+        """所有屏幕中正在运行的周期回调与动画总数"""
+        return sum(timers.active_count for timers in cls._instances)
+
+    @classmethod
+    def stop_all(cls):
+        for timers in list(cls._instances):
+            timers.stop()
+
+
+class EventCoalescer:
+    """合并高频属性事件，只把最新的值交给回调
+
+    默认每帧最多调用一次回调；throttle 限制两次调用的最小间隔，
+    debounce 则等事件停止 debounce 秒后才调用。
+    可直接作为 bind() 的回调使用。
+    """
+
+    def __init__(self, name, callback, throttle=0, debounce=0):
+        self.name = name
+        self.callback = timed(f'events.{name}', callback)
+        self.throttle = throttle
+        self.debounce = debounce
+        self._pending = None
+        self._event = None
+        self._last_apply = 0.0
+
+    def __call__(self, *args):
+        metrics.incr(f'events.{self.name}.raw')
+        self._pending = args
+        if self.debounce:
+            if self._event is not None:
+                self._event.cancel()
+            self._event = Clock.schedule_once(self._flush, self.debounce)
+        elif self._event is None:
+            delay = 0
+            if self.throttle:
+                delay = max(0, self._last_apply + self.throttle - time.perf_counter())
+            self._event = Clock.schedule_once(self._flush, delay)
+
+    def flush(self):
+        """立即应用尚未处理的最新值"""
+        if self._event is not None:
+            self._event.cancel()
+        self._flush(0)
+
+    def _flush(self, dt):
+        self._event = None
+        args, self._pending = self._pending, None
+        if args is None:
+            return
+        self._last_apply = time.perf_counter()
+        metrics.incr(f'events.{self.name}.applied')
+        self.callback(*args)
+
+    @property
+    def stats(self):
+        counters = metrics.counters
+        return (counters.get(f'events.{self.name}.raw', 0),
+                counters.get(f'events.{self.name}.applied', 0))
+
+
+class DialogPool:
+    """弹窗实例池
+
+    弹窗的控件树只构建一次，关闭后放回池中，下次打开时只需更新文字内容。
+    Popup/ModalView 在淡出动画结束、真正从窗口移除（_is_open 变为 False）时自动归还；
+    其他控件需调用 release()。
+    max_idle 为 0 时不复用，每次都重新构建。
+    """
+
+    def __init__(self, name, factory, max_idle=2):
+        self.name = name
+        self.factory = factory
+        self.max_idle = max_idle
+        self._idle = []
+
+    def acquire(self):
+        # 仍在显示中的实例再次 open() 会被 ModalView 忽略
+        for index in range(len(self._idle) - 1, -1, -1):
+            if not getattr(self._idle[index], '_is_open', False):
+                metrics.incr(f'dialog_pool.{self.name}.reuse')
+                return self._idle.pop(index)
+        metrics.incr(f'dialog_pool.{self.name}.create')
+        dialog = self.factory()
+        if isinstance(dialog, uix.ModalView):
+            dialog.fbind('_is_open', self._on_open_changed)
+        return dialog
+
+    def release(self, dialog):
+        if len(self._idle) < self.max_idle and dialog not in self._idle:
+            self._idle.append(dialog)
+
+    def _on_open_changed(self, dialog, is_open):
+        if not is_open:
+            self.release(dialog)
+
+
+class TaskHandle:
+    """后台任务句柄
+
+    cancel() 之后结果不会再交给回调；任务若尚未开始执行则直接从队列中移除。
+    """
+
+    __slots__ = ('name', 'kind', 'screen', 'future', 'on_done', 'on_error',
+                 'submitted', 'started', 'finished', 'cancelled')
+
+    def __init__(self, name, kind, screen, on_done, on_error):
+        self.name = name
+        self.kind = kind
+        self.screen = screen
+        self.future = None
+        self.on_done = on_done
+        self.on_error = on_error
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.cancelled = False
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+
+class WorkerPool:
+    """后台任务池：阻塞的 I/O 放进线程池，CPU 密集的工作可选放进进程池
+
+    结果由工作线程放入队列，主线程每帧按时间预算取出并调用回调，
+    回调里可以直接修改控件。提交时指定 screen 的任务在开始离开该屏幕（on_pre_leave）时自动取消。
+    cpu_workers 为 0 时不启动进程池（Android 上 multiprocessing 不可用），
+    kind='cpu' 的任务改在线程池中执行。
+    """
+
+    def __init__(self, io_workers=4, cpu_workers=0, drain_budget=0.004):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.drain_budget = drain_budget
+        self._io = None
+        self._cpu = None
+        self._results = deque()
+        self._pending = set()
+        self._by_screen = {}
+        self._bound_screens = weakref.WeakSet()
+        self._drain_trigger = Clock.create_trigger(timed('tasks.drain', self._drain), 0)
+
+    def submit(self, func, *args, name=None, kind='io', screen=None, on_done=None, on_error=None):
+        """提交任务，返回 TaskHandle
+
+        on_done(result) 与 on_error(exception) 都在主线程调用；
+        kind='cpu' 且启用了进程池时，func 与参数必须可以 pickle。
+        """
+        name = name or getattr(func, '__name__', 'task')
+        screen_name = screen.name if screen is not None else None
+        handle = TaskHandle(name, kind, screen_name, on_done, on_error)
+        executor = self._executor(kind)
+        if executor is self._cpu:
+            future = executor.submit(func, *args)
+        else:
+            future = executor.submit(self._run, handle, func, args)
+        handle.future = future
+        self._pending.add(handle)
+        if screen is not None:
+            self._by_screen.setdefault(screen_name, set()).add(handle)
+            if screen not in self._bound_screens:
+                self._bound_screens.add(screen)
+                screen.fbind('on_pre_leave', self._on_screen_leave)
+        metrics.incr('tasks.submitted')
+        metrics.record('tasks.queue_depth', len(self._pending))
+        # 回调在工作线程中执行，Clock 的调度方法是线程安全的
+        future.add_done_callback(partial(self._on_future_done, handle))
+        return handle
+
+    def _executor(self, kind):
+        if kind == 'cpu' and self.cpu_workers > 0:
+            if self._cpu is None:
+                self._cpu = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            return self._cpu
+        if self._io is None:
+            self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='worker')
+        return self._io
+
+    @staticmethod
+    def _run(handle, func, args):
+        handle.started = time.perf_counter()
+        if handle.cancelled:
+            raise CancelledError()
+        return func(*args)
+
+    def _on_future_done(self, handle, future):
+        handle.finished = time.perf_counter()
+        self._results.append(handle)
+        self._drain_trigger()
+
+    def _drain(self, dt):
+        deadline = time.perf_counter() + self.drain_budget
+        while self._results and time.perf_counter() < deadline:
+            handle = self._results.popleft()
+            self._finish(handle)
+        if self._results:
+            # 预算用完，剩余结果留到下一帧
+            self._drain_trigger()
+
+    def _finish(self, handle):
+        self._pending.discard(handle)
+        if handle.screen is not None:
+            handles = self._by_screen.get(handle.screen)
+            if handles is not None:
+                handles.discard(handle)
+                if not handles:
+                    del self._by_screen[handle.screen]
+        future = handle.future
+        if handle.cancelled or future.cancelled():
+            metrics.incr('tasks.cancelled')
+            return
+        now = time.perf_counter()
+        if handle.started is not None:
+            metrics.record('tasks.wait', handle.started - handle.submitted)
+            metrics.record('tasks.run', handle.finished - handle.started)
+        # 从提交到回调在主线程执行的总延迟
+        metrics.record('tasks.latency', now - handle.submitted)
+        error = future.exception()
+        if error is not None:
+            if isinstance(error, CancelledError):
+                metrics.incr('tasks.cancelled')
+                return
+            metrics.incr('tasks.failed')
+            if handle.on_error is None:
+                task_log.warning('后台任务 %s 失败: %r', handle.name, error)
+                return
+            callback, result = handle.on_error, error
+        else:
+            metrics.incr('tasks.completed')
+            if handle.on_done is None:
+                return
+            callback, result = handle.on_done, future.result()
+        # 回调出错不影响同一帧内其他结果的交付
+        try:
+            callback(result)
+        except Exception:
+            task_log.error('后台任务 %s 的回调出错: %s', handle.name, traceback.format_exc())
+
+    def cancel_screen(self, screen_name):
+        """取消属于某个屏幕、尚未交付结果的任务"""
+        handles = self._by_screen.pop(screen_name, None)
+        if not handles:
+            return 0
+        for handle in handles:
+            handle.cancel()
+        task_log.debug('离开屏幕 %s，取消 %d 个后台任务', screen_name, len(handles))
+        return len(handles)
+
+    def _on_screen_leave(self, screen):
+        self.cancel_screen(screen.name)
+
+    @property
+    def depth(self):
+        """已提交但结果尚未交付的任务数"""
+        return len(self._pending)
+
+    def stats(self):
+        counters = metrics.counters
+        latency = sorted(metrics.timings.get('tasks.latency', ()))
+        return {
+            'pending': len(self._pending),
+            'undelivered': len(self._results),
+            'submitted': counters.get('tasks.submitted', 0),
+            'completed': counters.get('tasks.completed', 0),
+            'failed': counters.get('tasks.failed', 0),
+            'cancelled': counters.get('tasks.cancelled', 0),
+            'latency_p50': latency[len(latency) // 2] if latency else 0.0,
+            'latency_max': latency[-1] if latency else 0.0,
+        }
+
+    def shutdown(self):
+        """取消全部任务并关闭线程池与进程池（不等待正在执行的任务）"""
+        for handle in list(self._pending):
+            handle.cancel()
+        for executor in (self._io, self._cpu):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._io = self._cpu = None
+
+
+workers = WorkerPool()
+
+
+# 预览时按缩略图解码的图片扩展名（由 Kivy 的 SDL2 图片加载器支持）
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'jpe', 'bmp', 'gif', 'webp', 'tga', 'tif', 'tiff'}
+
+
+def downscale_pixels(data, width, height, fmt, max_size):
+    """按整数步长最近邻缩小像素数据，返回 (宽, 高, 数据)
+
+    每个通道用一次带步长的切片完成一行，避免逐像素的 Python 循环。
+    """
+    bpp = len(fmt) if fmt in ('rgb', 'rgba', 'bgr', 'bgra') else 1
+    stride = len(data) // height
+    step = max(1, math.ceil(max(width, height) / max_size))
+    out_width = (width + step - 1) // step
+    out_height = (height + step - 1) // step
+    row_bytes = out_width * bpp
+    out = bytearray(row_bytes * out_height)
+    for y in range(out_height):
+        offset = y * step * stride
+        row = data[offset:offset + width * bpp]
+        start = y * row_bytes
+        for channel in range(bpp):
+            out[start + channel:start + row_bytes:bpp] = row[channel::bpp * step]
+    return out_width, out_height, bytes(out)
+
+
+def decode_thumbnail(path, max_size):
+    """解码图片并缩小为缩略图（在工作线程中调用，不涉及 GL）
+
+    返回 (宽, 高, 像素格式, 数据)，行顺序与 Kivy 解码结果一致（需要垂直翻转）。
+    """
+    from kivy.core.image import ImageLoader
+    image = ImageLoader.load(path, keep_data=True, nocache=True)
+    if image is None or not image._data:
+        raise ValueError(f'无法解码图片 {path}')
+    frame = image._data[0]
+    width, height, data = downscale_pixels(frame.data, frame.width, frame.height, frame.fmt, max_size)
+    return width, height, frame.fmt, data
+
+
+def read_text_page(path, max_bytes=4096, max_lines=30):
+    """读取文本文件的第一页，看起来不是文本时返回 None"""
+    with open(path, 'rb') as f:
+        chunk = f.read(max_bytes)
+    if b'\0' in chunk:
+        return None
+    text = chunk.decode('utf-8', errors='replace')
+    if text.count('\ufffd') > len(text) // 10:
+        return None
+    return '\n'.join(text.splitlines()[:max_lines])
+
+
+class ThumbnailCache:
+    """缩略图磁盘缓存
+
+    以 (路径, 修改时间, 大小) 为键，文件被修改后旧缩略图自然失效。
+    总大小超过 max_bytes 时按最近使用顺序淘汰，使用顺序记录在文件的修改时间上，
+    重启后仍然有效。读写都在工作线程中进行。
+    """
+
+    MAGIC = b'KTH1'
+    # 魔数、宽、高、像素格式
+    HEADER = struct.Struct('<4sHH8s')
+
+    def __init__(self, directory, max_bytes=16 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(path, info):
+        raw = f'{os.path.abspath(path)}\0{info["mtime_ns"]}\0{info["size"]}'
+        return hashlib.sha1(raw.encode('utf-8', errors='surrogateescape')).hexdigest()
+
+    def _index(self):
+        """首次使用时扫描缓存目录，按最近使用顺序建立索引（需持有锁）"""
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                with os.scandir(self.directory) as it:
+                    files = [(e.stat().st_mtime, e.name, e.stat().st_size)
+                             for e in it if e.name.endswith('.thumb')]
+            except OSError:
+                files = []
+            for _, name, size in sorted(files):
+                self._entries[name[:-6]] = size
+                self.bytes += size
+        return self._entries
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.thumb')
+
+    def get(self, path, info):
+        """返回缓存的 (宽, 高, 像素格式, 数据)，未命中时返回 None"""
+        key = self.key_for(path, info)
+        with self._lock:
+            if key not in self._index():
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), 'rb') as f:
+                header = f.read(self.HEADER.size)
+                data = f.read()
+            magic, width, height, fmt = self.HEADER.unpack(header)
+            if magic != self.MAGIC:
+                raise ValueError('缩略图缓存文件格式不符')
+            os.utime(self._path(key))
+        except (OSError, ValueError, struct.error) as e:
+            task_log.debug('缩略图缓存读取失败 %s: %s', path, e)
+            self._discard(key)
+            return None
+        return width, height, fmt.rstrip(b'\0').decode('ascii'), data
+
+    def put(self, path, info, thumbnail):
+        width, height, fmt, data = thumbnail
+        key = self.key_for(path, info)
+        target = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{target}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, width, height, fmt.encode('ascii')))
+                f.write(data)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            task_log.warning('缩略图缓存写入失败 %s: %s', path, e)
+            return
+        size = self.HEADER.size + len(data)
+        with self._lock:
+            entries = self._index()
+            self.bytes += size - entries.pop(key, 0)
+            entries[key] = size
+            evicted = []
+            while self.bytes > self.max_bytes and len(entries) > 1:
+                old_key, old_size = entries.popitem(last=False)
+                self.bytes -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+        if evicted:
+            metrics.incr('thumbs.evicted', len(evicted))
+
+    def _discard(self, key):
+        with self._lock:
+            size = self._index().pop(key, None)
+            if size is not None:
+                self.bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self):
+        counters = metrics.counters
+        hits = counters.get('thumbs.cache_hit', 0)
+        decoded = counters.get('thumbs.decoded', 0)
+        total = hits + decoded
+        return {
+            'entries': len(self._entries or ()),
+            'bytes': self.bytes,
+            'cache_hit': hits,
+            'decoded': decoded,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+
+def load_preview(path, thumbnails, max_size=256):
+    """读取文件预览（在工作线程中调用）
+
+    图片先查缩略图缓存，未命中才解码；其他文件尝试读取第一页文本。
+    """
+    info = describe_file(path)
+    info['kind'] = 'binary'
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext in IMAGE_EXTENSIONS:
+        start = time.perf_counter()
+        thumbnail = thumbnails.get(path, info) if thumbnails is not None else None
+        if thumbnail is not None:
+            metrics.incr('thumbs.cache_hit')
+            metrics.record('thumbs.cache_read', time.perf_counter() - start)
+            info['cached'] = True
+        else:
+            thumbnail = decode_thumbnail(path, max_size)
+            metrics.incr('thumbs.decoded')
+            metrics.record('thumbs.decode', time.perf_counter() - start)
+            info['cached'] = False
+            if thumbnails is not None:
+                thumbnails.put(path, info, thumbnail)
+        info['kind'] = 'image'
+        info['thumbnail'] = thumbnail
+    elif info['size']:
+        text = read_text_page(path)
+        if text is not None:
+            info['kind'] = 'text'
+            info['text'] = text
+    return info
+
+
+class _BackgroundGroup:
+    """同一父控件下、颜色相同的一组背景，共用一个 Color 和一个 Mesh"""
+
+    def __init__(self, parent, color):
+        self.parent = weakref.ref(parent)
+        self.members = weakref.WeakSet()
+        self.instructions = InstructionGroup()
+        self.instructions.add(Color(*color))
+        self.mesh = Mesh(mode='triangles')
+        self.instructions.add(self.mesh)
+        parent.canvas.before.add(self.instructions)
+
+    def rebuild(self):
+        vertices = []
+        indices = []
+        for index, widget in enumerate(self.members):
+            x, y = widget.pos
+            w, h = widget.size
+            vertices.extend((x, y, 0, 0, x + w, y, 1, 0, x + w, y + h, 1, 1, x, y + h, 0, 1))
+            base = index * 4
+            indices.extend((base, base + 1, base + 2, base, base + 2, base + 3))
+        self.mesh.vertices = vertices
+        self.mesh.indices = indices
+
+    def detach(self):
+        parent = self.parent()
+        if parent is not None:
+            parent.canvas.before.remove(self.instructions)
+
+
+class BackgroundPainter:
+    """给控件绘制跟随布局的纯色背景
+
+    背景画在父控件的 canvas.before 中，同一父控件下颜色相同的兄弟控件
+    合并为一个 Color + Mesh，指令数与控件数无关。背景位于所有兄弟控件之下，
+    适合布局中互不重叠的色块。
+    控件的 pos/size/parent 变化只把它标记为待更新，几何在每帧合并重算一次。
+    """
+
+    def __init__(self):
+        self._colors = weakref.WeakKeyDictionary()
+        self._membership = weakref.WeakKeyDictionary()
+        self._groups = {}
+        self._dirty = weakref.WeakSet()
+        self._trigger = Clock.create_trigger(self._update, -1)
+
+    def paint(self, widget, color):
+        """给 widget 设置背景色，重复调用可更换颜色"""
+        color = tuple(color)
+        if widget not in self._colors:
+            widget.fbind('pos', self._mark)
+            widget.fbind('size', self._mark)
+            widget.fbind('parent', self._mark)
+        self._colors[widget] = color
+        self._mark(widget)
+
+    def unpaint(self, widget):
+        if self._colors.pop(widget, None) is None:
+            return
+        widget.funbind('pos', self._mark)
+        widget.funbind('size', self._mark)
+        widget.funbind('parent', self._mark)
+        self._leave_group(widget)
+
+    def _mark(self, widget, *args):
+        self._dirty.add(widget)
+        self._trigger()
+
+    def _leave_group(self, widget):
+        key = self._membership.pop(widget, None)
+        group = self._groups.get(key)
+        if group is None:
+            return None
+        group.members.discard(widget)
+        if not len(group.members):
+            group.detach()
+            del self._groups[key]
+            return None
+        return group
+
+    def _update(self, dt):
+        start = time.perf_counter()
+        changed = set()
+        for widget in list(self._dirty):
+            color = self._colors.get(widget)
+            parent = widget.parent
+            key = (parent.uid, color) if parent is not None and color is not None else None
+            if self._membership.get(widget) != key:
+                group = self._leave_group(widget)
+                if group is not None:
+                    changed.add(group)
+                if key is not None:
+                    group = self._groups.get(key)
+                    if group is None or group.parent() is None:
+                        group = self._groups[key] = _BackgroundGroup(parent, color)
+                    group.members.add(widget)
+                    self._membership[widget] = key
+            if key is not None:
+                changed.add(self._groups[key])
+        self._dirty.clear()
+        for group in changed:
+            group.rebuild()
+        # 父控件已被回收的组
+        for key in [k for k, g in self._groups.items() if g.parent() is None]:
+            del self._groups[key]
+        metrics.incr('background.update')
+        metrics.record('background.update', time.perf_counter() - start)
+
+    def stats(self):
+        """已绘制背景的控件数，以及合并后/逐个绘制时的绘图指令数"""
+        widgets = len(self._colors)
+        return {
+            'widgets': widgets,
+            'groups': len(self._groups),
+            'instructions': 2 * len(self._groups),
+            'unbatched_instructions': 2 * widgets,
+        }
+
+
+backgrounds = BackgroundPainter()
+
+
+class StateStore:
+    """持久化的界面状态
+
+    set() 只修改内存中的字典并唤醒后台写线程；写线程等到 debounce 秒内没有新的修改，
+    再把整份快照写入临时文件后用 os.replace 原子替换，拖动滑块时主线程不做磁盘 I/O，
+    连续的修改也只写一次。load() 在启动时同步读取这个很小的 JSON 快照。
+    path 为 None 时只保存在内存中。
+    """
+
+    def __init__(self, path, debounce=0.5):
+        self.path = path
+        self.debounce = debounce
+        self.values = {}
+        self._version = 0
+        self._saved_version = 0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """读取快照，返回读到的条目数；文件不存在或损坏时从空状态开始"""
+        if self.path is None:
+            return 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                values = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            app_log.warning('界面状态文件无法读取，已忽略: %s', e)
+            return 0
+        if isinstance(values, dict):
+            self.values = values
+        return len(self.values)
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        if isinstance(value, (list, tuple)):
+            value = list(value)
+        if self.values.get(key) == value:
+            return
+        with self._lock:
+            self.values[key] = value
+            self._version += 1
+            self._last_change = time.perf_counter()
+        metrics.incr('state.set')
+        if self.path is not None:
+            if self._thread is None:
+                self._start_writer()
+            self._wake.set()
+
+    def _start_writer(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # 等待修改停止 debounce 秒，期间的修改合并到同一次写入
+            while not self._stop.is_set():
+                remaining = self._last_change + self.debounce - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._stop.wait(remaining)
+            try:
+                self.flush()
+            except OSError as e:
+                app_log.warning('保存界面状态失败: %s', e)
+
+    def flush(self):
+        """把尚未保存的修改写入磁盘（写线程与 stop() 调用）"""
+        if self.path is None:
+            return
+        with self._write_lock:
+            with self._lock:
+                if self._version == self._saved_version:
+                    return
+                version = self._version
+                data = json.dumps(self.values, ensure_ascii=False)
+            start = time.perf_counter()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._saved_version = version
+            metrics.incr('state.flush')
+            metrics.record('state.flush', time.perf_counter() - start)
+
+    def stop(self):
+        """停止写线程并同步写入剩余的修改"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout=1)
+            self._thread = None
+        try:
+            self.flush()
+        except OSError as e:
+            app_log.warning('保存界面状态失败: %s', e)
+
+
+class LazyScreenManager(ScreenManager):
+    """按需构建屏幕的屏幕管理器
+
+    屏幕以工厂函数注册，第一次切换到该屏幕时才真正创建。
+    工厂可以是生成器函数：每个 yield 把构建切成一段，
+    后台构建时每帧只执行 build_budget 秒内的若干段，不阻塞界面；
+    需要立即显示时则一次性把剩余的段执行完。
+    驻留屏幕超出预算时按最近最少使用（LRU）顺序卸载，
+    卸载前保存登记过的控件状态，重新构建后自动恢复。
+    启动时预构建（queue_build(prebuild=True)）、尚未显示过的屏幕不计入驻留数量预算。
+    """
+
+    # 最多驻留的屏幕数量，0 表示不限制
+    max_resident = NumericProperty(4)
+    # 驻留屏幕的纹理内存估算上限（字节），0 表示不限制
+    max_texture_bytes = NumericProperty(0)
+    # 常驻、不参与卸载的屏幕
+    pinned_screens = ListProperty(['main'])
+    # 后台分段构建每帧可用的时间（秒）
+    build_budget = NumericProperty(0.006)
+    # 转场预热每帧可用的时间（秒），按下按钮到松开之间没有动画，可以多用一些
+    prewarm_budget = NumericProperty(0.012)
+    # 统计转场掉帧时的目标帧率
+    target_fps = NumericProperty(60)
+
+    __events__ = ('on_screen_built', 'on_screen_unloaded', 'on_resident_changed', 'on_build_progress')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._factories = {}
+        self._visits = {}
+        self._build_queue = []
+        self._building = {}
+        self._build_event = None
+        self._build_done = 0
+        self._build_total = 0
+        self._prebuild = set()
+        self._unvisited = set()
+        self._trim_event = None
+        self._lru = OrderedDict()
+        self._tracked = {}
+        self._saved_state = {}
+        # 登记的控件属性同时写入的持久化存储（StateStore），None 表示不持久化
+        self.state_store = None
+        self._prewarming = {}
+        self._prewarmed = set()
+        self._prewarm_event = None
+        self._transition_watch = None
+        # 最近一次转场的统计：目标屏幕、帧数、掉帧数、最长帧、是否预热
+        self.last_transition = None
+
+    def register_screen(self, name, factory):
+        """注册屏幕工厂，factory() 需返回 name 对应的 Screen"""
+        self._factories[name] = factory
+
+    def is_built(self, name):
+        return self.has_screen(name)
+
+    @property
+    def registered_screens(self):
+        return list(self._factories)
+
+    def track_state(self, screen_name, key, widget, prop):
+        """登记需要在屏幕卸载/重建之间保留的控件属性
+
+        设置了 state_store 时，属性还会持久化：登记时恢复上次保存的值，之后的修改写入存储。
+        """
+        self._tracked.setdefault(screen_name, {})[key] = (widget, prop)
+        store = self.state_store
+        if store is None:
+            return
+        store_key = f'{screen_name}.{key}'
+        value = store.get(store_key)
+        if value is not None:
+            start = time.perf_counter()
+            setattr(widget, prop, value)
+            metrics.record('state.apply', time.perf_counter() - start)
+        widget.fbind(prop, self._persist_state, store_key)
+
+    def _persist_state(self, store_key, widget, value):
+        self.state_store.set(store_key, value)
+
+    def ensure_screen(self, name):
+        """返回指定屏幕，尚未构建时立即完成构建（包括已开始的分段构建）"""
+        if self.has_screen(name):
+            return self.get_screen(name)
+        task = self._building.get(name) or self._start_build(name)
+        while not self._step_build(name, task):
+            pass
+        if name in self._build_queue:
+            self._build_queue.remove(name)
+            self._report_progress(name)
+        return self.get_screen(name)
+
+    def _start_build(self, name):
+        factory = self._factories.get(name)
+        if factory is None:
+            raise ScreenManagerException(f'No Screen with name "{name}".')
+        task = self._building[name] = {'steps': None, 'factory': factory, 'elapsed': 0.0, 'slices': 0}
+        return task
+
+    def _step_build(self, name, task):
+        """执行一段构建，构建完成并加入管理器时返回 True
+
+        同一个构建任务可能由预热和后台构建队列交替推进，
+        屏幕已由另一方装入时直接视为完成。
+        """
+        if self.has_screen(name):
+            return True
+        start = time.perf_counter()
+        screen = None
+        if task['steps'] is None:
+            result = task['factory']()
+            if isinstance(result, Screen):
+                screen = result
+            else:
+                task['steps'] = result
+        if screen is None:
+            try:
+                next(task['steps'])
+            except StopIteration as stop:
+                screen = stop.value
+                if screen is None:
+                    self._building.pop(name, None)
+                    raise ScreenManagerException(f'屏幕工厂 {name} 没有返回 Screen')
+        task['elapsed'] += time.perf_counter() - start
+        task['slices'] += 1
+        if screen is None:
+            return False
+        self._install(name, screen, task)
+        return True
+
+    def _install(self, name, screen, task):
+        del self._building[name]
+        if name in self._prebuild:
+            self._prebuild.discard(name)
+            self._unvisited.add(name)
+        start = time.perf_counter()
+        self._restore_state(name)
+        self.add_widget(screen)
+        self._lru[name] = True
+        elapsed = task['elapsed'] + time.perf_counter() - start
+        metrics.record(f'screen_build.{name}', elapsed)
+        screen_log.info('屏幕 %s 构建耗时 %.1fms（%d 段）', name, elapsed * 1000, task['slices'])
+        self.dispatch('on_screen_built', screen)
+        self.dispatch('on_resident_changed')
+
+    def show_screen(self, name):
+        """切换到指定屏幕，必要时先构建；未完成的预热在转场开始前一次做完"""
+        started = time.perf_counter()
+        previous = self.current
+        steps = self._prewarming.pop(name, None)
+        if steps is not None:
+            self._run_prewarm(name, steps, deadline=None)
+        prewarmed = steps is not None or name in self._prewarmed
+        self._prewarmed.discard(name)
+        self.ensure_screen(name)
+        self._lru.move_to_end(name)
+        self._unvisited.discard(name)
+        self.current = name
+        if previous != name:
+            self._watch_transition(name, prewarmed, started)
+        if previous and previous != name:
+            key = (previous, name)
+            self._visits[key] = self._visits.get(key, 0) + 1
+        self.schedule_trim()
+
+    def predict_next(self, name=None):
+        """根据历史跳转次数预测下一个最可能访问的未构建屏幕"""
+        name = name or self.current
+        order = list(self._factories)
+        candidates = [n for n in order if n != name and not self.has_screen(n)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda n: (self._visits.get((name, n), 0), -order.index(n)))
+
+    # 转场预热
+
+    def prewarm_screen(self, name):
+        """为即将开始的转场准备目标屏幕
+
+        在按下导航按钮时调用：尚未构建的屏幕先分段构建，然后按管理器尺寸完成布局、
+        渲染待更新的文字纹理，使转场动画期间不再做这些工作。
+        每帧最多执行 prewarm_budget 秒，show_screen() 时剩余部分一次完成。
+        """
+        if name == self.current or name not in self._factories or name in self._prewarming:
+            return
+        self._prewarmed.discard(name)
+        self._prewarming[name] = self._prewarm_steps(name)
+        if self._prewarm_event is None:
+            self._prewarm_event = Clock.schedule_interval(self._prewarm_slice, 0)
+
+    def cancel_prewarm(self, name):
+        """放弃为 name 准备的转场（按下导航按钮后没有松开在按钮上）
+
+        已完成的构建保留，但之后切换到该屏幕不再算作预热过的转场。
+        """
+        self._prewarming.pop(name, None)
+        self._prewarmed.discard(name)
+
+    def _prewarm_steps(self, name):
+        # 后台构建队列可能在两段之间完成同一个任务，每段之前都重新检查
+        while not self.has_screen(name):
+            task = self._building.get(name) or self._start_build(name)
+            if self._step_build(name, task):
+                break
+            yield
+        if name in self._build_queue:
+            self._build_queue.remove(name)
+            self._report_progress(name)
+        screen = self.get_screen(name)
+        # 不在显示中的屏幕保持默认尺寸，转场加入管理器时才按实际尺寸布局
+        screen.pos = self.pos
+        screen.size = self.size
+        yield
+        # 先序遍历：父布局确定子控件尺寸后，子布局的触发器随之挂起
+        for widget in list(screen.walk(restrict=True)):
+            if isinstance(widget, Layout) and widget._trigger_layout.is_triggered:
+                widget._trigger_layout.cancel()
+                widget.do_layout()
+                yield
+        for widget in list(screen.walk(restrict=True)):
+            if isinstance(widget, Label) and widget._trigger_texture.is_triggered:
+                widget._trigger_texture.cancel()
+                widget.texture_update()
+                metrics.incr('prewarm.textures')
+                yield
+
+    def _run_prewarm(self, name, steps, deadline):
+        """执行预热直到完成或超过 deadline（None 表示不限时），完成时返回 True"""
+        start = time.perf_counter()
+        try:
+            while deadline is None or time.perf_counter() < deadline:
+                next(steps)
+        except StopIteration:
+            return True
+        except Exception as e:
+            screen_log.error('预热屏幕 %s 失败: %s\n%s', name, e, traceback.format_exc())
+            return True
+        finally:
+            metrics.record(f'prewarm.{name}', time.perf_counter() - start)
+        return False
+
+    def _prewarm_slice(self, dt):
+        if self.transition.is_active:
+            return
+        deadline = time.perf_counter() + self.prewarm_budget
+        for name, steps in list(self._prewarming.items()):
+            if time.perf_counter() >= deadline:
+                break
+            if self._run_prewarm(name, steps, deadline):
+                del self._prewarming[name]
+                self._prewarmed.add(name)
+        if not self._prewarming:
+            self._prewarm_event.cancel()
+            self._prewarm_event = None
+
+    # 转场掉帧统计
+
+    def _watch_transition(self, name, prewarmed, started):
+        """统计转场期间每帧的间隔，第一帧从 show_screen() 被调用时算起"""
+        if self._transition_watch is not None:
+            self._transition_watch.cancel()
+        frames = []
+        self._transition_watch = Clock.schedule_interval(
+            partial(self._transition_frame, name, prewarmed, frames, [started]), 0)
+
+    def _transition_frame(self, name, prewarmed, frames, last, dt):
+        now = time.perf_counter()
+        frames.append(now - last[0])
+        last[0] = now
+        if self.transition.is_active:
+            return
+        self._transition_watch.cancel()
+        self._transition_watch = None
+        interval = 1.0 / self.target_fps
+        # 一帧跨越 n 个帧间隔，说明其间有 n-1 帧没有按时绘制
+        dropped = sum(max(0, int(dt / interval + 0.5) - 1) for dt in frames)
+        worst = max(frames)
+        self.last_transition = {
+            'screen': name, 'frames': len(frames), 'dropped': dropped,
+            'worst_ms': worst * 1000, 'prewarmed': prewarmed,
+        }
+        metrics.record('transition.dropped', dropped)
+        metrics.record('transition.worst_frame', worst)
+        screen_log.info('转场到 %s：%d 帧，掉帧 %d，最长帧 %.1fms（%s）', name, len(frames), dropped,
+                        worst * 1000, '已预热' if prewarmed else '未预热')
+
+    # 后台分段构建
+
+    def queue_build(self, names, front=False, prebuild=False):
+        """把屏幕加入后台分段构建队列；front 为 True 时优先构建
+
+        prebuild 为 True 时（启动时预构建）不受驻留数量预算限制，
+        构建好的屏幕在第一次显示前也不计入预算。
+        """
+        names = [n for n in names if n in self._factories and not self.has_screen(n)]
+        if not names:
+            return
+        if prebuild:
+            self._prebuild.update(names)
+        if not self._build_queue:
+            self._build_done = 0
+            self._build_total = 0
+        for name in names:
+            if name in self._build_queue:
+                if not front:
+                    continue
+                self._build_queue.remove(name)
+            else:
+                self._build_total += 1
+            if front:
+                self._build_queue.insert(0, name)
+            else:
+                self._build_queue.append(name)
+        if self._build_event is None:
+            self._build_event = Clock.schedule_interval(self._build_slice, 0)
+
+    def schedule_prewarm(self):
+        """在空闲帧中分段预构建最可能访问的下一个屏幕"""
+        target = self.predict_next()
+        if target is not None:
+            self.queue_build([target])
+
+    @property
+    def building(self):
+        return bool(self._build_queue)
+
+    def _build_slice(self, dt):
+        # 转场进行中不做后台构建，以免掉帧
+        if self.transition.is_active:
+            return
+        deadline = time.perf_counter() + self.build_budget
+        while self._build_queue and time.perf_counter() < deadline:
+            name = self._build_queue[0]
+            task = self._building.get(name)
+            if task is None:
+                # 预测性的后台构建不应挤占驻留预算，已开始的构建仍会完成
+                if (name not in self._prebuild and self.max_resident
+                        and self._resident_count() >= self.max_resident):
+                    self._build_queue.pop(0)
+                    self._report_skipped(name, '驻留屏幕已达上限')
+                    continue
+                task = self._start_build(name)
+            try:
+                finished = self._step_build(name, task)
+            except Exception as e:
+                screen_log.error('后台构建屏幕 %s 失败: %s\n%s', name, e, traceback.format_exc())
+                self._building.pop(name, None)
+                self._build_queue.pop(0)
+                self._report_skipped(name, '构建失败')
+                continue
+            if finished:
+                self._build_queue.pop(0)
+                self._report_progress(name)
+        if not self._build_queue:
+            self._build_event.cancel()
+            self._build_event = None
+
+    def _report_progress(self, name):
+        self._prebuild.discard(name)
+        self._build_done += 1
+        self.dispatch('on_build_progress', name, self._build_done, self._build_total)
+
+    def _report_skipped(self, name, reason):
+        """没有构建的屏幕从进度总数中去掉，而不是计为已完成"""
+        self._prebuild.discard(name)
+        self._build_total -= 1
+        screen_log.info('跳过后台构建屏幕 %s：%s', name, reason)
+        self.dispatch('on_build_progress', name, self._build_done, self._build_total)
+
+    def schedule_trim(self, delay=None):
+        """转场结束后按预算卸载最近最少使用的屏幕"""
+        if self._trim_event is not None:
+            self._trim_event.cancel()
+        if delay is None:
+            delay = self.transition.duration + 0.1
+        self._trim_event = Clock.schedule_once(self._trim, delay)
+
+    def _trim(self, dt):
+        self._trim_event = None
+        if self.transition.is_active:
+            self.schedule_trim()
+            return
+        while self._over_budget():
+            # 超出数量预算时只卸载计入预算的屏幕；预构建后未显示过的屏幕只在超出纹理预算时卸载
+            over_count = self.max_resident and self._resident_count() > self.max_resident
+            victim = next(
+                (n for n in self._lru if n != self.current and n not in self.pinned_screens
+                 and not (over_count and n in self._unvisited)),
+                None
+            )
+            if victim is None:
+                break
+            self.unload_screen(victim)
+
+    def _resident_count(self):
+        """计入驻留数量预算的屏幕数"""
+        return sum(1 for name in self._lru if name not in self._unvisited)
+
+    def _over_budget(self):
+        if self.max_resident and self._resident_count() > self.max_resident:
+            return True
+        if self.max_texture_bytes and self.resident_texture_bytes() > self.max_texture_bytes:
+            return True
+        return False
+
+    def unload_screen(self, name):
+        """卸载屏幕：保存状态、移出控件树并释放纹理"""
+        if name == self.current or not self.has_screen(name):
+            return False
+        screen = self.get_screen(name)
+        self._save_state(name)
+        self.remove_widget(screen)
+        self._lru.pop(name, None)
+        self._unvisited.discard(name)
+        self._tracked.pop(name, None)
+        self._prewarming.pop(name, None)
+        self._prewarmed.discard(name)
+        # 先通知外部释放对该屏幕控件的引用，再拆除控件树
+        self.dispatch('on_screen_unloaded', screen)
+        for child in list(screen.walk(restrict=True)):
+            if hasattr(child, 'texture'):
+                try:
+                    child.texture = None
+                except Exception:
+                    pass
+        screen.clear_widgets()
+        metrics.incr('screen_unload')
+        screen_log.info('已卸载屏幕 %s', name)
+        self.dispatch('on_resident_changed')
+        return True
+
+    def _save_state(self, name):
+        tracked = self._tracked.get(name)
+        if not tracked:
+            return
+        self._saved_state[name] = {
+            key: getattr(widget, prop) for key, (widget, prop) in tracked.items()
+        }
+
+    def _restore_state(self, name):
+        saved = self._saved_state.pop(name, None)
+        if not saved:
+            return
+        for key, value in saved.items():
+            entry = self._tracked.get(name, {}).get(key)
+            if entry is not None:
+                widget, prop = entry
+                setattr(widget, prop, value)
+
+    def resident_texture_bytes(self):
+        return sum(estimate_texture_bytes(screen) for screen in self.screens)
+
+    def describe_resident(self):
+        """驻留屏幕及其纹理内存估算的调试文本"""
+        parts = [
+            f'{name}:{estimate_texture_bytes(self.get_screen(name)) / 1024:.0f}KB'
+            for name in self._lru
+        ]
+        return f"驻留屏幕 {len(parts)}: " + ', '.join(parts)
+
+    def on_screen_built(self, screen):
+        pass
+
+    def on_screen_unloaded(self, screen):
+        pass
+
+    def on_resident_changed(self):
+        pass
+
+    def on_build_progress(self, name, done, total):
+        pass
+
+
+class FileRow(Button):
+    """虚拟化文件列表中的一行（由 RecycleView 复用）"""
+
+    path = StringProperty('')
+    is_dir = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(size=self.setter('text_size'))
+
+    def on_release(self):
+        browser = self.parent
+        while browser is not None and not isinstance(browser, FileBrowser):
+            browser = browser.parent
+        if browser is not None:
+            browser.open_entry(self.path, self.is_dir)
+
+
+class FileBrowser(BoxLayout):
+    """虚拟化的文件浏览器
+
+    目录在后台线程中用 os.scandir 分批列出，主线程按时间预算合并批次；
+    列表基于 RecycleView，只为可见的行创建控件。
+    支持增量排序与筛选，选中文件时更新 selection（与 FileChooser 一致）。
+    """
+
+    path = StringProperty('')
+    selection = ListProperty([])
+    filter_text = StringProperty('')
+    sort_key = OptionProperty('name', options=['name', 'size', 'mtime'])
+    loading = BooleanProperty(False)
+
+    # 后台线程每批列出的条目数
+    batch_size = 500
+    # 每帧合并批次的时间预算（秒）
+    drain_budget = 0.004
+
+    SORT_LABELS = {'name': '名称', 'size': '大小', 'mtime': '时间'}
+    SORT_KEYS = {
+        'name': lambda e: (not e[2], e[0]),
+        'size': lambda e: (not e[2], -e[3]),
+        'mtime': lambda e: (not e[2], -e[4]),
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('orientation', 'vertical')
+        super().__init__(**kwargs)
+        self._entries = []
+        self._visible = []
+        self._published = 0
+        self._batches = deque()
+        self._stop = None
+        self._drain_event = None
+        self._list_start = 0.0
+        self._first_rows = False
+        # 设置 path 之前没有上级目录行
+        self._parent_row = None
+
+        toolbar = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(36), spacing=dp(5))
+        self.filter_input = uix.TextInput(hint_text='筛选文件名', font_name=FONT_NAME, multiline=False)
+        self.filter_input.bind(text=EventCoalescer('file_filter', self._on_filter_input, debounce=0.2))
+        toolbar.add_widget(self.filter_input)
+        self.sort_button = make_button(self._sort_text(), 'text', size_hint_x=None, width=dp(90))
+        self.sort_button.bind(on_release=self.cycle_sort)
+        toolbar.add_widget(self.sort_button)
+        self.add_widget(toolbar)
+
+        # 路径可能包含子集字体之外的字符
+        self.path_label = make_label('', 'caption', font_name=FONT_NAME, font_size='12sp',
+                                     height=dp(20), shorten=True, shorten_from='left')
+        self.path_label.bind(size=self.path_label.setter('text_size'))
+        self.add_widget(self.path_label)
+
+        self.list_view = uix.RecycleView()
+        row_layout = uix.RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(32)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        row_layout.bind(minimum_height=row_layout.setter('height'))
+        self.list_view.add_widget(row_layout)
+        self.list_view.viewclass = FileRow
+        self.add_widget(self.list_view)
+
+        self.bind(path=self._on_path)
+        if self.path:
+            self._on_path(self, self.path)
+
+    def _sort_text(self):
+        return f'排序: {self.SORT_LABELS[self.sort_key]}'
+
+    # 目录列举
+
+    def _on_path(self, instance, path):
+        self.cancel_listing()
+        self.path_label.text = path
+        self._entries = []
+        self._visible = []
+        self._published = 0
+        self._parent_row = self._row('..', os.path.dirname(path), True)
+        self.list_view.data = [self._parent_row]
+        self._stop = threading.Event()
+        self._list_start = time.perf_counter()
+        self._first_rows = False
+        self.loading = True
+        threading.Thread(
+            target=self._scan, args=(path, self._batches, self._stop, self.batch_size), daemon=True
+        ).start()
+        self._drain_event = Clock.schedule_interval(timed('file_browser.drain', self._drain), 0)
+
+    @classmethod
+    def _scan(cls, path, batches, stop, batch_size):
+        """后台线程：分批列出目录
+
+        条目为 (小写名, 路径, 是否目录, 大小, 修改时间, 行数据)；
+        首批较小以尽快显示，之后批次逐渐增大以减少合并次数。
+        """
+        batch = []
+        max_batch = batch_size * 16
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if stop.is_set():
+                        return
+                    try:
+                        is_dir = entry.is_dir()
+                        st = entry.stat()
+                        size, mtime = st.st_size, st.st_mtime
+                    except OSError:
+                        is_dir, size, mtime = False, 0, 0
+                    batch.append((entry.name.lower(), entry.path, is_dir, size, mtime,
+                                  cls._row(entry.name, entry.path, is_dir)))
+                    if len(batch) >= batch_size:
+                        batches.append(batch)
+                        batch = []
+                        batch_size = min(batch_size * 2, max_batch)
+        except OSError as e:
+            file_log.warning('列出目录失败 %s: %s', path, e)
+        if batch:
+            batches.append(batch)
+        # None 表示列举结束
+        batches.append(None)
+
+    def _drain(self, dt):
+        deadline = time.perf_counter() + self.drain_budget
+        merged = []
+        finished = False
+        while self._batches and time.perf_counter() < deadline:
+            batch = self._batches.popleft()
+            if batch is None:
+                finished = True
+                break
+            merged.extend(batch)
+        if merged:
+            self._add_entries(merged)
+            if not self._first_rows:
+                self._first_rows = True
+                metrics.record('file_browser.first_rows', time.perf_counter() - self._list_start)
+        if finished:
+            if len(self._visible) != self._published:
+                self._publish()
+            elapsed = time.perf_counter() - self._list_start
+            metrics.record('file_browser.listing', elapsed)
+            file_log.debug('列出 %d 个条目耗时 %.1fms', len(self._entries), elapsed * 1000)
+            self.loading = False
+            self._drain_event.cancel()
+            self._drain_event = None
+
+    def cancel_listing(self):
+        """停止后台列举（切换目录或屏幕卸载时调用）"""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+        if self._drain_event is not None:
+            self._drain_event.cancel()
+            self._drain_event = None
+        self._batches = deque()
+        self.loading = False
+
+    # 排序与筛选
+
+    def _matches(self, entry):
+        return not self.filter_text or self.filter_text in entry[0]
+
+    def _add_entries(self, entries):
+        key = self.SORT_KEYS[self.sort_key]
+        self._entries.extend(entries)
+        new = sorted((e for e in entries if self._matches(e)), key=key)
+        if new:
+            self._visible = list(heapq.merge(self._visible, new, key=key))
+            # RecycleView 每次换数据都要重新计算全部行的布局，
+            # 列举过程中只在可见条目数翻倍时刷新，结束时再补一次
+            if len(self._visible) >= 2 * self._published:
+                self._publish()
+
+    def _refresh_visible(self):
+        key = self.SORT_KEYS[self.sort_key]
+        self._visible = sorted((e for e in self._entries if self._matches(e)), key=key)
+        self._publish()
+
+    def _publish(self):
+        self._published = len(self._visible)
+        rows = [e[5] for e in self._visible]
+        self.list_view.data = rows if self._parent_row is None else [self._parent_row] + rows
+
+    @staticmethod
+    def _row(name, path, is_dir):
+        return {
+            'text': f'[{name}]' if is_dir else name,
+            'path': path,
+            'is_dir': is_dir,
+            'font_name': FONT_NAME,
+            'halign': 'left',
+            'valign': 'middle',
+            'padding': (dp(8), 0),
+        }
+
+    def _on_filter_input(self, instance, text):
+        self.filter_text = text.strip().lower()
+
+    def on_filter_text(self, instance, value):
+        self._refresh_visible()
+
+    def on_sort_key(self, instance, value):
+        self.sort_button.text = self._sort_text()
+        self._refresh_visible()
+
+    def cycle_sort(self, *args):
+        keys = list(self.SORT_LABELS)
+        self.sort_key = keys[(keys.index(self.sort_key) + 1) % len(keys)]
+
+    def open_entry(self, path, is_dir):
+        if is_dir:
+            self.path = path
+        else:
+            self.selection = [path]
+
+
+class FilePreview(BoxLayout):
+    """文件预览区：图片显示缩略图，文本文件显示第一页，其他情况显示占位文字
+
+    纹理在主线程中由后台解码好的像素数据创建。
+    """
+
+    def __init__(self, placeholder='', **kwargs):
+        super().__init__(**kwargs)
+        self.placeholder = placeholder
+        self.message_label = make_label(placeholder, color=(1, 1, 1, 1))
+        self.image = None
+        self.text_label = None
+        self.add_widget(self.message_label)
+
+    def _show(self, widget):
+        if widget.parent is not self:
+            self.clear_widgets()
+            self.add_widget(widget)
+
+    def show_message(self, text=None):
+        self.message_label.text = self.placeholder if text is None else text
+        self._show(self.message_label)
+
+    def show_thumbnail(self, thumbnail):
+        width, height, fmt, data = thumbnail
+        texture = Texture.create(size=(width, height), colorfmt=fmt)
+        texture.blit_buffer(data, colorfmt=fmt, bufferfmt='ubyte')
+        texture.flip_vertical()
+        if self.image is None:
+            self.image = uix.Image(fit_mode='contain')
+        self.image.texture = texture
+        self._show(self.image)
+
+    def show_text(self, text):
+        if self.text_label is None:
+            # 文本内容各不相同，不进入共享的文字纹理缓存
+            self.text_label = styled(Label, '', font_size='12sp', halign='left', valign='top',
+                                     padding=(dp(6), dp(4)))
+            self.text_label.bind(size=self.text_label.setter('text_size'))
+        self.text_label.text = text
+        self._show(self.text_label)
+
+
+class LineIndex:
+    """大文件的稀疏行索引
+
+    每 BLOCK 字节只记录一个整数：该块起点之前的换行符数量，1GB 文件约 16K 项。
+    行号与字节偏移的换算先二分定位到块，再在块内查找换行符。
+    build() 在工作线程中顺序读取文件并追加索引，主线程可以随时查询已索引的部分。
+    """
+
+    BLOCK = 64 * 1024
+    # 每次读取的字节数，必须是 BLOCK 的整数倍
+    CHUNK = 16 * BLOCK
+
+    def __init__(self, size):
+        self.size = size
+        self.block_lines = array.array('q')
+        self.total_lines = None
+
+    @property
+    def complete(self):
+        return self.total_lines is not None
+
+    @property
+    def indexed_bytes(self):
+        return min(self.size, len(self.block_lines) * self.BLOCK)
+
+    def build(self, path, stop):
+        """工作线程：统计每块之前的行数，stop 被设置时提前返回"""
+        buf = bytearray(self.CHUNK)
+        lines = 0
+        last = b'\n'[0]
+        with open(path, 'rb', buffering=0) as f:
+            while not stop.is_set():
+                n = f.readinto(buf)
+                if not n:
+                    break
+                for start in range(0, n, self.BLOCK):
+                    self.block_lines.append(lines)
+                    lines += buf.count(b'\n', start, min(start + self.BLOCK, n))
+                last = buf[n - 1]
+            else:
+                # 循环因 stop 被设置而结束，而不是读到文件末尾
+                return None
+        # 最后一行没有换行符时也算一行
+        self.total_lines = lines + (1 if self.size and last != b'\n'[0] else 0)
+        return self.total_lines
+
+    def offset_of_line(self, mm, line):
+        """第 line 行（从 0 开始）的起始偏移，尚未索引到时返回 None"""
+        if line <= 0:
+            return 0
+        if self.complete:
+            line = min(line, max(0, self.total_lines - 1))
+        blocks = self.block_lines
+        block = bisect_left(blocks, line) - 1
+        if block < 0 or (not self.complete and block >= len(blocks) - 1):
+            return None
+        pos = block * self.BLOCK
+        for _ in range(line - blocks[block]):
+            pos = mm.find(b'\n', pos) + 1
+            if pos <= 0:
+                return None
+        return pos
+
+    def line_of_offset(self, mm, offset):
+        """偏移 offset 所在的行号，尚未索引到时返回 None"""
+        block = offset // self.BLOCK
+        if block >= len(self.block_lines) or (not self.complete and block == len(self.block_lines) - 1):
+            return None
+        return self.block_lines[block] + mm[block * self.BLOCK:offset].count(b'\n')
+
+
+class LargeFileViewer(BoxLayout):
+    """只读的大文本文件查看器
+
+    文件通过 mmap 映射，只有当前显示的几十行会被读取和解码；
+    行控件数量由可见高度决定，滚动时复用同一组 Label。
+    行索引在后台逐块建立，按字节偏移跳转不依赖索引，按行号跳转需要索引到该行。
+    """
+
+    path = StringProperty('')
+    indexing = BooleanProperty(False)
+    # 当前顶部行的字节偏移与行号（行号未知时为 -1）
+    top_offset = NumericProperty(0)
+    top_line = NumericProperty(-1)
+
+    row_height = dp(18)
+    # 单行最多显示的字节数，超长的行只解码开头部分
+    max_line_bytes = 512
+    # 查找行首时最多向前搜索的字节数，避免超长行导致全文件扫描
+    max_backscan = 1024 * 1024
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('orientation', 'vertical')
+        super().__init__(**kwargs)
+        self._file = None
+        self._mm = None
+        self.size_bytes = 0
+        self.index = None
+        self._stop = None
+        self._index_task = None
+        self._status_event = None
+        self._rows = []
+        self._syncing = False
+        self._drag = 0.0
+
+        toolbar = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(36), spacing=dp(5))
+        self.status_label = make_label('', 'text', font_size='12sp', halign='left', valign='middle',
+                                       shorten=True, shorten_from='left')
+        self.status_label.bind(size=self.status_label.setter('text_size'))
+        toolbar.add_widget(self.status_label)
+        self.jump_input = uix.TextInput(hint_text='行号 或 @字节偏移', font_name=FONT_NAME,
+                                        multiline=False, size_hint_x=None, width=dp(140))
+        self.jump_input.bind(on_text_validate=self.on_jump)
+        toolbar.add_widget(self.jump_input)
+        jump_button = make_button('跳转', 'text', size_hint_x=None, width=dp(60))
+        jump_button.bind(on_release=self.on_jump)
+        toolbar.add_widget(jump_button)
+        self.add_widget(toolbar)
+
+        body = BoxLayout(orientation='horizontal')
+        self.lines_box = BoxLayout(orientation='vertical')
+        self.lines_box.bind(size=self._on_lines_size)
+        body.add_widget(self.lines_box)
+        self.scrollbar = uix.Slider(orientation='vertical', min=0, max=1, value=1,
+                                    size_hint_x=None, width=dp(24))
+        self.scrollbar.bind(value=self._on_scrollbar)
+        body.add_widget(self.scrollbar)
+        self.add_widget(body)
+
+    # 打开与关闭
+
+    def open(self, path):
+        self.close()
+        self.path = path
+        start = time.perf_counter()
+        self._file = open(path, 'rb')
+        self.size_bytes = os.fstat(self._file.fileno()).st_size
+        # 空文件无法映射，直接显示为空
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size_bytes else None
+        self.index = LineIndex(self.size_bytes)
+        self._stop = threading.Event()
+        self.indexing = True
+        self._index_task = workers.submit(
+            self.index.build, path, self._stop,
+            name='line_index', on_done=self._on_indexed, on_error=self._on_index_error
+        )
+        self._status_event = Clock.schedule_interval(self._update_status, 0.25)
+        self.show_offset(0, line=0)
+        metrics.record('viewer.open', time.perf_counter() - start)
+        file_log.debug('打开大文件 %s（%s）', path, format_size(self.size_bytes))
+
+    def close(self):
+        """停止索引并解除映射"""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+        if self._index_task is not None:
+            self._index_task.cancel()
+            self._index_task = None
+        if self._status_event is not None:
+            self._status_event.cancel()
+            self._status_event = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.index = None
+        self.indexing = False
+        for row in self._rows:
+            row.text = ''
+
+    def _on_indexed(self, total_lines):
+        self._index_task = None
+        self.indexing = False
+        if self._status_event is not None:
+            self._status_event.cancel()
+            self._status_event = None
+        if self.top_line < 0 and self._mm is not None:
+            self.top_line = self.index.line_of_offset(self._mm, self.top_offset)
+            self._render()
+        self._update_status()
+
+    def _on_index_error(self, error):
+        self._index_task = None
+        self.indexing = False
+        file_log.warning('建立行索引失败 %s: %s', self.path, error)
+        self._update_status()
+
+    def _update_status(self, *args):
+        if self.index is None:
+            self.status_label.text = ''
+            return
+        name = os.path.basename(self.path)
+        if self.index.complete:
+            progress = f'共 {self.index.total_lines} 行'
+        elif self.indexing:
+            progress = f'索引中 {self.index.indexed_bytes / max(1, self.size_bytes):.0%}'
+        else:
+            progress = '索引未完成'
+        self.status_label.text = f'{name}  {format_size(self.size_bytes)}  {progress}'
+
+    # 定位
+
+    def _line_start(self, offset):
+        """offset 所在行的起始偏移"""
+        if offset <= 0:
+            return 0
+        offset = min(offset, self.size_bytes)
+        floor = max(0, offset - self.max_backscan)
+        start = self._mm.rfind(b'\n', floor, offset) + 1
+        # 超长的行里找不到换行符时，从搜索窗口的起点开始显示
+        return start if start > 0 else floor
+
+    def show_offset(self, offset, line=None):
+        """把 offset 所在的行显示在顶部"""
+        if self._mm is None:
+            self.top_offset, self.top_line = 0, 0
+            self._render()
+            return
+        # 文件以换行符结尾时，末尾偏移之后已没有内容，显示最后一行
+        offset = self._line_start(min(offset, self.size_bytes - 1))
+        if line is None:
+            line = self.index.line_of_offset(self._mm, offset)
+        self.top_offset = offset
+        self.top_line = -1 if line is None else line
+        self._render()
+
+    def jump_to_offset(self, offset):
+        self.show_offset(max(0, int(offset)))
+
+    def jump_to_line(self, line):
+        """跳转到第 line 行（从 1 开始），该行尚未索引时返回 False"""
+        if self._mm is None:
+            return False
+        line = max(0, int(line) - 1)
+        offset = self.index.offset_of_line(self._mm, line)
+        if offset is None:
+            return False
+        if self.index.complete:
+            line = min(line, max(0, self.index.total_lines - 1))
+        self.show_offset(offset, line=line)
+        return True
+
+    def scroll_lines(self, count):
+        """向下（正数）或向上（负数）滚动 count 行"""
+        if self._mm is None or not count:
+            return
+        mm, offset, moved = self._mm, self.top_offset, 0
+        if count > 0:
+            while moved < count:
+                end = mm.find(b'\n', offset)
+                if end < 0 or end + 1 >= self.size_bytes:
+                    break
+                offset = end + 1
+                moved += 1
+        else:
+            while moved > count and offset > 0:
+                offset = self._line_start(offset - 1)
+                moved -= 1
+        if moved:
+            self.top_offset = offset
+            if self.top_line >= 0:
+                self.top_line += moved
+            self._render()
+
+    def on_jump(self, *args):
+        target = self.jump_input.text.strip()
+        try:
+            if target.startswith('@'):
+                self.jump_to_offset(int(target[1:]))
+            elif not self.jump_to_line(int(target)):
+                self.status_label.text = f'第 {target} 行尚未索引，请稍候'
+        except ValueError:
+            self.status_label.text = '请输入行号，或以 @ 开头的字节偏移'
+
+    # 显示
+
+    def _on_lines_size(self, box, size):
+        count = max(1, int(box.height // self.row_height))
+        while len(self._rows) < count:
+            row = styled(Label, '', font_size='12sp', halign='left', valign='middle',
+                         shorten=True, shorten_from='right', size_hint_y=None, height=self.row_height)
+            row.bind(size=row.setter('text_size'))
+            self._rows.append(row)
+            box.add_widget(row)
+        while len(self._rows) > count:
+            box.remove_widget(self._rows.pop())
+        self._render()
+
+    def _render(self):
+        """读取并显示从 top_offset 开始的可见行"""
+        mm, size = self._mm, self.size_bytes
+        pos, line = self.top_offset, self.top_line
+        for row in self._rows:
+            if mm is None or pos >= size:
+                row.text = ''
+                continue
+            end = mm.find(b'\n', pos)
+            if end < 0:
+                end = size
+            text = mm[pos:min(end, pos + self.max_line_bytes)].decode('utf-8', errors='replace')
+            text = text.rstrip('\r').expandtabs(4)
+            row.text = f'{line + 1:>8}  {text}' if line >= 0 else f'{"":>8}  {text}'
+            pos = end + 1
+            if line >= 0:
+                line += 1
+        self._syncing = True
+        self.scrollbar.value = 1 - self.top_offset / size if size else 1
+        self._syncing = False
+
+    def _on_scrollbar(self, slider, value):
+        if not self._syncing and self._mm is not None:
+            self.jump_to_offset((1 - value) * self.size_bytes)
+
+    # 触摸与滚轮
+
+    def on_touch_down(self, touch):
+        if self.lines_box.collide_point(*touch.pos):
+            if touch.is_mouse_scrolling:
+                # Kivy 的 scrolldown 对应滚轮向上，即回到文件开头方向
+                self.scroll_lines(-3 if touch.button == 'scrolldown' else 3)
+                return True
+            touch.grab(self)
+            self._drag = 0.0
+            return True
+        return super().on_touch_down(touch)
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is self:
+            self._drag += touch.dy
+            lines = int(self._drag / self.row_height)
+            if lines:
+                self._drag -= lines * self.row_height
+                self.scroll_lines(lines)
+            return True
+        return super().on_touch_move(touch)
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is self:
+            touch.ungrab(self)
+            return True
+        return super().on_touch_up(touch)
+
+
+class RenderGovernor:
+    """按需渲染：场景一段时间没有变化时降低主循环的唤醒频率
+
+    Kivy 只在画布有变化（needs_redraw）时才绘制，但主循环仍按 maxfps 每秒唤醒
+    几十次来轮询输入和 Clock。这里把窗口的 on_draw（任何属性或绘图指令的变化）
+    和输入事件视为“脏”信号：idle_after 秒内没有信号时把帧率上限降到 idle_fps，
+    一有信号立即恢复 max_fps。空闲时第一下触摸最多延迟 1/idle_fps 秒。
+    """
+
+    # 配置名: (活动帧率上限, 空闲帧率上限)
+    PROFILES = {
+        'normal': (60, 10),
+        'low_power': (20, 4),
+    }
+
+    def __init__(self, max_fps=None, idle_fps=None, idle_after=1.0):
+        # 应用指定的帧率只覆盖 normal 配置
+        self._overrides = (max_fps, idle_fps)
+        self.profile = 'normal'
+        self.max_fps, self.idle_fps = self._profile_fps('normal')
+        self.idle_after = idle_after
+        self.idle = False
+        self.window = None
+        self._last_activity = time.perf_counter()
+        self._event = None
+        self._default_fps = None
+
+    @property
+    def attached(self):
+        return self.window is not None
+
+    def attach(self, window):
+        if self.attached:
+            return
+        self.window = window
+        self._default_fps = Clock._max_fps
+        window.fbind('on_draw', self._on_draw)
+        window.fbind('on_motion', self._on_input)
+        window.fbind('on_key_down', self._on_input)
+        self._event = Clock.schedule_interval(self._tick, 0)
+        self._wake()
+        self._apply()
+
+    def detach(self):
+        if not self.attached:
+            return
+        self.window.funbind('on_draw', self._on_draw)
+        self.window.funbind('on_motion', self._on_input)
+        self.window.funbind('on_key_down', self._on_input)
+        self._event.cancel()
+        self._event = None
+        self.window = None
+        # Clock 没有公开的接口修改帧率上限，_max_fps 在每次 tick 时读取
+        Clock._max_fps = self._default_fps
+
+    def set_profile(self, name):
+        """切换帧率配置（normal 或 low_power）"""
+        self.profile = name
+        self.max_fps, self.idle_fps = self._profile_fps(name)
+        self._apply()
+        perf_log.info('渲染配置 %s：活动 %dfps，空闲 %dfps', name, self.max_fps, self.idle_fps)
+
+    def _profile_fps(self, name):
+        max_fps, idle_fps = self.PROFILES[name]
+        if name == 'normal':
+            max_fps = self._overrides[0] or max_fps
+            idle_fps = self._overrides[1] or idle_fps
+        return max_fps, idle_fps
+
+    def _apply(self):
+        if self.attached:
+            Clock._max_fps = float(self.idle_fps if self.idle else self.max_fps)
+
+    def _wake(self):
+        self._last_activity = time.perf_counter()
+        if self.idle:
+            self.idle = False
+            self._apply()
+
+    def _on_draw(self, window):
+        metrics.mark('render.frame')
+        self._wake()
+
+    def _on_input(self, window, *args):
+        self._wake()
+
+    def _tick(self, dt):
+        metrics.mark('render.tick')
+        if not self.idle and time.perf_counter() - self._last_activity > self.idle_after:
+            self.idle = True
+            metrics.incr('render.idle_enter')
+            self._apply()
+
+    @staticmethod
+    def per_minute(window=10.0):
+        """最近 window 秒折算的每分钟绘制帧数与主循环唤醒次数"""
+        return (metrics.rate('render.frame', window) * 60,
+                metrics.rate('render.tick', window) * 60)
+
+
+class GcScheduler:
+    """循环垃圾回收的调度：动画与转场期间推迟，在空闲帧中进行
+
+    attach 后关闭解释器的自动回收，改为每帧检查各代计数（gc.get_count）。
+    有动画在播放（屏幕转场也是 Animation）或 input_grace 秒内有输入时不回收，
+    只有年轻代累积超过 max_deferred 个对象时才强制做一次第 0 代回收；
+    其余帧按解释器原有的阈值做第 0/1 代回收。第 2 代（完整）回收扫描所有未冻结的对象，
+    只在 RenderGovernor 判定画面空闲时进行，推迟超过 full_max_delay 秒后则在下一个没有动画的帧进行。
+    冻结（gc.freeze）把常驻控件移出回收范围：启动时的对象和之后新构建的屏幕（freeze_new）
+    都在下一个空闲帧完整回收后冻结，不会冻结不可达的循环垃圾；卸载屏幕后调用 thaw() 解冻，
+    卸载的控件在下一次完整回收中释放，随后重新冻结。
+    每次回收的代数与耗时通过 gc.callbacks 记入 metrics 的 gc.gen<N> 与 trace。
+    """
+
+    def __init__(self, governor=None, input_grace=0.2, max_deferred=100000, full_max_delay=10.0):
+        self.governor = governor
+        self.input_grace = input_grace
+        self.max_deferred = max_deferred
+        self.full_max_delay = full_max_delay
+        self.window = None
+        self.thresholds = gc.get_threshold()
+        self._event = None
+        self._last_input = 0.0
+        self._full_due_since = None
+        self._freeze_wanted = False
+        self._gc_start = None
+
+    @property
+    def attached(self):
+        return self.window is not None
+
+    def attach(self, window):
+        if self.attached:
+            return
+        self.window = window
+        self.thresholds = gc.get_threshold()
+        gc.disable()
+        gc.callbacks.append(self._on_gc)
+        window.fbind('on_motion', self._on_input)
+        window.fbind('on_key_down', self._on_input)
+        self._event = Clock.schedule_interval(self._tick, 0)
+
+    def detach(self):
+        if not self.attached:
+            return
+        self.window.funbind('on_motion', self._on_input)
+        self.window.funbind('on_key_down', self._on_input)
+        self.window = None
+        self._event.cancel()
+        self._event = None
+        gc.callbacks.remove(self._on_gc)
+        gc.enable()
+
+    def freeze(self):
+        """在下一个空闲帧完整回收后冻结存活的对象"""
+        self._freeze_wanted = True
+        self._request_full()
+        if not self.attached:
+            self.collect(2)
+
+    def freeze_new(self):
+        """冻结刚创建的对象（如新构建的屏幕）
+
+        直接 gc.freeze 会把构建中产生的循环垃圾一起冻结，之后的回收再也不会释放它们，
+        因此同样先完整回收；连续构建多个屏幕时只在空闲后回收、冻结一次。
+        """
+        self.freeze()
+
+    def thaw(self):
+        """解冻全部对象，下一个空闲帧完整回收后再冻结"""
+        if gc.get_freeze_count():
+            gc.unfreeze()
+            metrics.incr('gc.thaw')
+            self.freeze()
+
+    def _request_full(self):
+        if self._full_due_since is None:
+            self._full_due_since = time.perf_counter()
+
+    def _on_input(self, window, *args):
+        self._last_input = time.perf_counter()
+
+    def busy(self):
+        """是否有动画在播放或刚有输入"""
+        # Animation 没有公开正在播放的动画列表，_instances 在 start/stop 时维护
+        return bool(Animation._instances) or time.perf_counter() - self._last_input < self.input_grace
+
+    def _tick(self, dt):
+        count0, count1, count2 = gc.get_count()
+        threshold0, threshold1, threshold2 = self.thresholds
+        if count2 >= threshold2:
+            self._request_full()
+        if self.busy():
+            if count0 >= self.max_deferred:
+                metrics.incr('gc.forced')
+                self.collect(0)
+            elif count0 >= threshold0:
+                metrics.incr('gc.deferred')
+            return
+        if self._full_due_since is not None:
+            idle = self.governor.idle if self.governor is not None else True
+            if idle or time.perf_counter() - self._full_due_since > self.full_max_delay:
+                self.collect(2)
+                return
+        if count1 >= threshold1:
+            self.collect(1)
+        elif count0 >= threshold0:
+            self.collect(0)
+
+    def collect(self, generation):
+        collected = gc.collect(generation)
+        if generation == 2:
+            self._full_due_since = None
+            if self._freeze_wanted:
+                self._freeze_wanted = False
+                gc.freeze()
+                metrics.incr('gc.freeze')
+                perf_log.info('已冻结 %d 个常驻对象', gc.get_freeze_count())
+        return collected
+
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+            return
+        start, self._gc_start = self._gc_start, None
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        generation = info['generation']
+        metrics.incr(f'gc.collections.gen{generation}')
+        metrics.incr('gc.collected', info['collected'])
+        metrics.record(f'gc.gen{generation}', elapsed)
+        if self.busy():
+            metrics.incr('gc.pause_while_busy')
+        tracer.complete(f'gc.gen{generation}', start, elapsed, 'gc')
+
+    @staticmethod
+    def stats():
+        """各代回收次数与最近的停顿耗时，以及推迟、强制回收次数和冻结的对象数"""
+        counters = metrics.counters
+        result = {
+            'deferred': counters.get('gc.deferred', 0),
+            'forced': counters.get('gc.forced', 0),
+            'paused_while_busy': counters.get('gc.pause_while_busy', 0),
+            'frozen': gc.get_freeze_count(),
+        }
+        for generation in range(3):
+            samples = metrics.timings.get(f'gc.gen{generation}', ())
+            result[f'gen{generation}'] = {
+                'count': counters.get(f'gc.collections.gen{generation}', 0),
+                'avg_ms': sum(samples) / len(samples) * 1000 if samples else 0.0,
+                'max_ms': max(samples) * 1000 if samples else 0.0,
+            }
+        return result
+
+
+class PerfOverlay(BoxLayout):
+    """可切换的性能面板，悬浮在窗口右上角
+
+    显示帧率、帧耗时分布、各 Clock 回调耗时、当前屏幕的控件数与绘图指令数、
+    纹理内存估算；可开启采样分析器并录制/导出 trace。
+    面板显示期间每帧记录一次帧间隔，统计文字每 refresh_interval 秒刷新一次。
+    """
+
+    # 帧耗时分布的区间上限（毫秒）
+    HISTOGRAM_BUCKETS = (8, 16.7, 33.3, 50, 100)
+    refresh_interval = 0.5
+
+    def __init__(self, app, **kwargs):
+        kwargs.setdefault('orientation', 'vertical')
+        kwargs.setdefault('size_hint', (None, None))
+        kwargs.setdefault('size', (dp(320), dp(420)))
+        kwargs.setdefault('padding', dp(6))
+        kwargs.setdefault('spacing', dp(4))
+        super().__init__(**kwargs)
+        self.app = app
+        self.window = None
+        self.frame_times = deque(maxlen=600)
+        self._frame_event = None
+        self._refresh_event = None
+
+        with self.canvas.before:
+            Color(0, 0, 0, 0.75)
+            self._background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_background, size=self._update_background)
+
+        # 统计文字每次刷新都不同，不经过文字纹理缓存；面板自身的刷新不计入纹理重建速率
+        self.stats_label = styled(Label, '', 'text', font_size='11sp', halign='left', valign='top')
+        self.stats_label.funbind('texture', _count_texture_rebuild)
+        self.stats_label.bind(size=self.stats_label.setter('text_size'))
+        self.add_widget(self.stats_label)
+
+        buttons = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(36), spacing=dp(4))
+        self.profile_button = make_button('采样分析', 'text', font_size='12sp')
+        self.profile_button.bind(on_release=self.toggle_profiler)
+        self.trace_button = make_button('录制', 'text', font_size='12sp')
+        self.trace_button.bind(on_release=self.toggle_trace)
+        export_button = make_button('导出', 'text', font_size='12sp')
+        export_button.bind(on_release=self.export_trace)
+        for button in (self.profile_button, self.trace_button, export_button):
+            buttons.add_widget(button)
+        self.add_widget(buttons)
+
+    def _update_background(self, *args):
+        self._background.pos = self.pos
+        self._background.size = self.size
+
+    def _place(self, window, size):
+        self.right = size[0]
+        self.top = size[1]
+
+    @property
+    def attached(self):
+        return self.window is not None
+
+    def attach(self, window):
+        if self.attached:
+            return
+        self.window = window
+        window.add_widget(self)
+        window.bind(size=self._place)
+        self._place(window, window.size)
+        self._refresh_event = Clock.schedule_interval(self.refresh, self.refresh_interval)
+        self._update_frame_hook()
+        self.refresh()
+
+    def detach(self):
+        """隐藏面板；正在进行的录制会继续记录帧耗时"""
+        if not self.attached:
+            return
+        self.window.unbind(size=self._place)
+        self.window.remove_widget(self)
+        self.window = None
+        self._refresh_event.cancel()
+        self._refresh_event = None
+        self._update_frame_hook()
+
+    def _update_frame_hook(self):
+        wanted = self.attached or tracer.active
+        if wanted and self._frame_event is None:
+            self.frame_times.clear()
+            self._frame_event = Clock.schedule_interval(self._on_frame, 0)
+        elif not wanted and self._frame_event is not None:
+            self._frame_event.cancel()
+            self._frame_event = None
+
+    def _on_frame(self, dt):
+        self.frame_times.append(dt)
+        if tracer.active:
+            tracer.complete('frame', time.perf_counter() - dt, dt, 'frame')
+
+    # 统计
+
+    def histogram(self):
+        counts = [0] * (len(self.HISTOGRAM_BUCKETS) + 1)
+        for dt in self.frame_times:
+            ms = dt * 1000
+            index = next((i for i, limit in enumerate(self.HISTOGRAM_BUCKETS) if ms <= limit),
+                         len(self.HISTOGRAM_BUCKETS))
+            counts[index] += 1
+        return counts
+
+    def _histogram_lines(self):
+        counts = self.histogram()
+        peak = max(counts) or 1
+        labels = [f'<={limit:g}ms' for limit in self.HISTOGRAM_BUCKETS]
+        labels.append(f'>{self.HISTOGRAM_BUCKETS[-1]:g}ms')
+        return [f'{label:>9} {"#" * round(20 * count / peak):<20} {count}'
+                for label, count in zip(labels, counts)]
+
+    @staticmethod
+    def _clock_lines(limit=5):
+        rows = []
+        for name, samples in metrics.timings.items():
+            if name.startswith('clock.') and samples:
+                total = sum(samples)
+                rows.append((total, name[len('clock.'):], total / len(samples), max(samples)))
+        rows.sort(reverse=True)
+        return [f'  {name}: 平均 {avg * 1000:.2f}ms 最大 {peak * 1000:.2f}ms'
+                for _, name, avg, peak in rows[:limit]]
+
+    def refresh(self, *args):
+        frames = sorted(self.frame_times)
+        fps = Clock.get_fps()
+        lines = [f'FPS {fps:.1f}']
+        if frames:
+            p95 = frames[min(len(frames) - 1, int(len(frames) * 0.95))]
+            lines.append(f'帧耗时 p50 {frames[len(frames) // 2] * 1000:.1f}ms '
+                         f'p95 {p95 * 1000:.1f}ms 最大 {frames[-1] * 1000:.1f}ms')
+        lines.extend(self._histogram_lines())
+
+        root = self.app.root
+        screen = root.current_screen if isinstance(root, ScreenManager) else root
+        widgets = instructions = screen_bytes = 0
+        if screen is not None:
+            widgets = sum(1 for _ in screen.walk(restrict=True))
+            instructions = count_canvas_instructions(screen.canvas)
+            screen_bytes = estimate_texture_bytes(screen)
+            lines.append(f'屏幕 {screen.name if isinstance(screen, Screen) else "-"}: '
+                         f'控件 {widgets} 绘图指令 {instructions}')
+        resident = root.resident_texture_bytes() if isinstance(root, LazyScreenManager) else screen_bytes
+        lines.append(f'纹理 当前 {screen_bytes / 1024:.0f}KB 驻留 {resident / 1024:.0f}KB '
+                     f'文字缓存 {label_texture_cache.bytes / 1024:.0f}KB')
+        lines.append(f'文字纹理重建 {metrics.rate("label.texture_rebuild"):.0f} 次/秒 '
+                     f'（累计 {metrics.counters.get("label.texture_rebuild", 0)} 次）')
+        painted = backgrounds.stats()
+        if painted['widgets']:
+            lines.append(f'背景 {painted["widgets"]} 个控件: {painted["instructions"]} 条指令'
+                         f'（逐个绘制需 {painted["unbatched_instructions"]} 条）')
+
+        tasks = workers.stats()
+        if tasks['submitted']:
+            lines.append(f'后台任务 排队 {tasks["pending"]} 待交付 {tasks["undelivered"]} '
+                         f'完成 {tasks["completed"]} 取消 {tasks["cancelled"]} 失败 {tasks["failed"]} '
+                         f'延迟 p50 {tasks["latency_p50"] * 1000:.1f}ms 最大 {tasks["latency_max"] * 1000:.1f}ms')
+
+        governor = getattr(self.app, 'render_governor', None)
+        if governor is not None:
+            frames, ticks = governor.per_minute()
+            state = '空闲' if governor.idle else '活动'
+            lines.append(f'渲染 {governor.profile}/{state} 上限 {Clock._max_fps:.0f}fps '
+                         f'每分钟 绘制 {frames:.0f} 帧 唤醒 {ticks:.0f} 次')
+        scheduler = getattr(self.app, 'gc_scheduler', None)
+        if scheduler is not None:
+            collections = scheduler.stats()
+            lines.append('GC ' + ' '.join(
+                f'第{g}代 {collections[f"gen{g}"]["count"]}次/最长{collections[f"gen{g}"]["max_ms"]:.1f}ms'
+                for g in range(3)))
+            lines.append(f'   推迟 {collections["deferred"]} 帧 强制 {collections["forced"]} 次 '
+                         f'动画中停顿 {collections["paused_while_busy"]} 次 冻结 {collections["frozen"]} 个对象')
+        thumbnails = getattr(self.app, 'thumbnails', None)
+        if thumbnails is not None:
+            thumbs = thumbnails.stats()
+            if thumbs['cache_hit'] or thumbs['decoded']:
+                lines.append(f'缩略图 命中 {thumbs["cache_hit"]} 解码 {thumbs["decoded"]} '
+                             f'命中率 {thumbs["hit_rate"]:.0%} 缓存 {thumbs["bytes"] / 1024:.0f}KB')
+        clock_lines = self._clock_lines()
+        if clock_lines:
+            lines.append('Clock 回调:')
+            lines.extend(clock_lines)
+        if profiler.running:
+            lines.append(f'采样 {profiler.samples} 次:')
+            lines.extend(f'  {share:5.1%} {name}' for name, share in profiler.top())
+        if tracer.active:
+            lines.append(f'录制中: {len(tracer.events)} 个事件')
+            tracer.counter('fps', fps=fps)
+            tracer.counter('screen', widgets=widgets, instructions=instructions)
+            tracer.counter('texture_kb', screen=screen_bytes / 1024, resident=resident / 1024)
+            tracer.counter('tasks', pending=tasks['pending'], undelivered=tasks['undelivered'])
+        self.stats_label.text = '\n'.join(lines)
+
+    # 采样与录制
+
+    def toggle_profiler(self, *args):
+        if profiler.running:
+            profiler.stop()
+            perf_log.info('采样分析结果 %s', profiler.top(10))
+            self.profile_button.text = '采样分析'
+        else:
+            profiler.start()
+            self.profile_button.text = '停止采样'
+        self.refresh()
+
+    def toggle_trace(self, *args):
+        if tracer.active:
+            tracer.stop()
+            self.trace_button.text = '录制'
+        else:
+            tracer.start()
+            self.trace_button.text = '停止录制'
+        self._update_frame_hook()
+        self.refresh()
+
+    def export_trace(self, *args):
+        """把录制的会话写入用户数据目录，返回文件路径"""
+        try:
+            directory = self.app.user_data_dir
+        except OSError:
+            directory = os.getcwd()
+        path = os.path.join(directory, time.strftime('trace-%Y%m%d-%H%M%S.json'))
+        try:
+            count = tracer.export(path)
+            perf_log.info('已导出 %d 个 trace 事件到 %s', count, path)
+            return path
+        except OSError as e:
+            perf_log.error('导出 trace 失败: %s', e)
+            return None
+
+
+class StressRow(BoxLayout):
+    """虚拟化压力测试中的一行（由 RecycleView 复用），行内的单元格控件也就地复用"""
+
+    # [(文字, 宽度或 None)]
+    cells = ListProperty([])
+
+    def on_cells(self, instance, cells):
+        labels = self.children[::-1]
+        while len(labels) < len(cells):
+            label = Label()
+            self.add_widget(label)
+            labels.append(label)
+        while len(labels) > len(cells):
+            self.remove_widget(labels.pop())
+        for label, (text, width) in zip(labels, cells):
+            label.text = text
+            if width is None:
+                label.size_hint_x = 1
+            else:
+                label.size_hint_x = None
+                label.width = width
+
+
+class LayoutStressTest(BoxLayout):
+    """布局压力测试
+
+    用 N 个单元格（100 到 50000）填充网格/盒式/堆叠/浮动布局，放在 ScrollView 中，
+    测量构建耗时、第一次完整布局的耗时、每个单元的内存增量和滚动帧率。
+    tracemalloc 会显著拖慢执行，内存在计时之后单独再构建一遍测量；
+    虚拟化版本把单元格按行放进 RecycleView，只为可见行创建控件。
+    每次运行的结果都保留在列表中，便于比较两种实现随 N 增长的曲线。
+    测试以生成器分帧执行，构建过程中界面仍可响应。
+    """
+
+    KINDS = {'grid': '网格', 'box': '盒式', 'stack': '堆叠', 'float': '浮动'}
+    VARIANTS = {'naive': '朴素', 'recycled': '虚拟化'}
+    SIZES = [100, 1000, 5000, 10000, 20000, 50000]
+    # 网格/浮动布局每行的单元数
+    COLUMNS = 10
+    # 每帧用于创建控件的时间（秒）
+    build_budget = 0.012
+    # 滚动测试时长（秒）
+    scroll_duration = 2.0
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('orientation', 'vertical')
+        kwargs.setdefault('spacing', dp(5))
+        super().__init__(**kwargs)
+        self.results = []
+        self.running = False
+        self._runner = None
+        self._event = None
+        self._frame_dt = 0.0
+        self._view = None
+        self.measure_memory = True
+
+        options = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40), spacing=dp(5))
+        self.kind_spinner = uix.Spinner(text=self.KINDS['grid'], values=list(self.KINDS.values()),
+                                        font_name=FONT_NAME)
+        self.size_spinner = uix.Spinner(text='1000', values=[str(n) for n in self.SIZES])
+        self.variant_spinner = uix.Spinner(text=self.VARIANTS['naive'], values=list(self.VARIANTS.values()),
+                                           font_name=FONT_NAME)
+        for spinner in (self.kind_spinner, self.size_spinner, self.variant_spinner):
+            options.add_widget(spinner)
+        self.add_widget(options)
+
+        actions = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40), spacing=dp(5))
+        run_btn = make_button('运行', 'text')
+        run_btn.bind(on_release=self.start)
+        sweep_btn = make_button('对比扫描', 'text')
+        sweep_btn.bind(on_release=self.start_sweep)
+        clear_btn = make_button('清除结果', 'text')
+        clear_btn.bind(on_release=self.clear_results)
+        for button in (run_btn, sweep_btn, clear_btn):
+            actions.add_widget(button)
+        self.add_widget(actions)
+
+        memory_row = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(30))
+        memory_check = uix.CheckBox(active=True, size_hint_x=None, width=dp(40))
+        memory_check.bind(active=self.setter('measure_memory'))
+        memory_row.add_widget(memory_check)
+        memory_row.add_widget(make_label('测量内存（需要再构建一遍）', 'caption', halign='left'))
+        self.add_widget(memory_row)
+
+        # 结果文字每次都不同，不经过文字纹理缓存
+        self.status_label = styled(Label, '选择布局与单元数后点击运行', 'caption', font_size='12sp')
+        self.add_widget(self.status_label)
+        self.results_label = styled(Label, '', 'text', font_size='11sp', size_hint_y=None,
+                                    height=dp(150), halign='left', valign='top')
+        self.results_label.bind(size=self.results_label.setter('text_size'))
+        self.add_widget(self.results_label)
+
+        self.stage = BoxLayout()
+        self.add_widget(self.stage)
+
+    @staticmethod
+    def _key(mapping, label):
+        return next(key for key, text in mapping.items() if text == label)
+
+    # 运行控制
+
+    def start(self, *args):
+        kind = self._key(self.KINDS, self.kind_spinner.text)
+        variant = self._key(self.VARIANTS, self.variant_spinner.text)
+        self.run([(kind, variant, int(self.size_spinner.text))])
+
+    def start_sweep(self, *args):
+        """对当前布局，从 100 到所选 N 依次运行朴素与虚拟化两种实现"""
+        kind = self._key(self.KINDS, self.kind_spinner.text)
+        limit = int(self.size_spinner.text)
+        self.run([(kind, variant, n) for n in self.SIZES if n <= limit for variant in self.VARIANTS])
+
+    def run(self, plan):
+        self.cancel()
+        self.running = True
+        self._runner = self._run_plan(plan)
+        self._event = Clock.schedule_interval(self._step, 0)
+
+    def cancel(self):
+        """停止正在进行的测试（离开屏幕时调用）"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if self._runner is not None:
+            self._runner.close()
+            self._runner = None
+        self.running = False
+        self._teardown()
+
+    def clear_results(self, *args):
+        self.results = []
+        self._show_results()
+
+    def _step(self, dt):
+        self._frame_dt = dt
+        try:
+            next(self._runner)
+        except StopIteration:
+            self._event.cancel()
+            self._event = None
+            self._runner = None
+            self.running = False
+
+    def _run_plan(self, plan):
+        for index, (kind, variant, n) in enumerate(plan):
+            self.status_label.text = (f'[{index + 1}/{len(plan)}] {self.KINDS[kind]} '
+                                      f'{self.VARIANTS[variant]} N={n} 运行中...')
+            result = yield from self._run_one(kind, variant, n)
+            self.results.append(result)
+            self._show_results()
+            perf_log.info('布局压力测试 %s', result)
+        self._teardown()
+        self.status_label.text = f'完成 {len(plan)} 项测试'
+
+    def _run_one(self, kind, variant, n):
+        view, build_time = yield from self._build_view(kind, variant, n)
+        start = time.perf_counter()
+        self._layout(view)
+        layout_time = time.perf_counter() - start
+        yield
+        widgets = sum(1 for _ in view.walk(restrict=True))
+        fps, worst = yield from self._scroll(view)
+        self._teardown()
+
+        bytes_per_cell = None
+        if self.measure_memory:
+            self.status_label.text = f'{self.KINDS[kind]} {self.VARIANTS[variant]} N={n} 测量内存...'
+            gc.collect()
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            view, _ = yield from self._build_view(kind, variant, n)
+            self._layout(view)
+            gc.collect()
+            bytes_per_cell = (tracemalloc.get_traced_memory()[0] - before) / n
+            if not tracing:
+                tracemalloc.stop()
+            self._teardown()
+        return {
+            'kind': kind,
+            'variant': variant,
+            'n': n,
+            'widgets': widgets,
+            'build_ms': build_time * 1000,
+            'layout_ms': layout_time * 1000,
+            'bytes_per_cell': bytes_per_cell,
+            'scroll_fps': fps,
+            'worst_frame_ms': worst * 1000,
+        }
+
+    def _build_view(self, kind, variant, n):
+        """构建并挂到测试区域，返回 (滚动视图, 构建耗时)"""
+        self._teardown()
+        if variant == 'naive':
+            content, build_time = yield from self._build_naive(kind, n)
+            view = uix.ScrollView()
+            view.add_widget(content)
+        else:
+            view, build_time = self._build_recycled(kind, n)
+        self._view = view
+        self.stage.add_widget(view)
+        view.size = self.stage.size
+        return view, build_time
+
+    @staticmethod
+    def _layout(view):
+        """同步执行第一次完整布局"""
+        if isinstance(view, uix.RecycleView):
+            view.refresh_views()
+        else:
+            content = view.children[0]
+            content.width = view.width
+            content.do_layout()
+
+    def _scroll(self, view):
+        """在 scroll_duration 秒内从顶部滚动到底部，返回 (平均帧率, 最长帧耗时)"""
+        frames = 0
+        worst = 0.0
+        start = time.perf_counter()
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.scroll_duration:
+                break
+            view.scroll_y = max(0.0, 1 - elapsed / self.scroll_duration)
+            yield
+            frames += 1
+            worst = max(worst, self._frame_dt)
+        return frames / elapsed, worst
+
+    def _teardown(self):
+        if self._view is not None:
+            self.stage.remove_widget(self._view)
+            self._view.clear_widgets()
+            self._view = None
+
+    # 构建
+
+    def _cell_width(self, index):
+        return dp(40) + (index % 4) * dp(16)
+
+    def _build_naive(self, kind, n):
+        """分帧创建 N 个单元格控件，返回 (布局, 构建耗时)"""
+        height = dp(32)
+        start = time.perf_counter()
+        rows = math.ceil(n / self.COLUMNS)
+        if kind == 'grid':
+            container = uix.GridLayout(cols=self.COLUMNS, row_default_height=height,
+                                       row_force_default=True, size_hint_y=None)
+        elif kind == 'box':
+            container = BoxLayout(orientation='vertical', size_hint_y=None)
+        elif kind == 'stack':
+            container = uix.StackLayout(size_hint_y=None)
+        else:
+            container = uix.FloatLayout(size_hint_y=None, height=rows * height)
+        if kind != 'float':
+            container.bind(minimum_height=container.setter('height'))
+
+        # 控件先分帧创建，最后一次性加入布局；边创建边加入会让布局在每一帧都重排全部子控件
+        cells = []
+        elapsed = 0.0
+        deadline = start + self.build_budget
+        for index in range(n):
+            text = str(index)
+            if kind == 'grid':
+                cell = Label(text=text)
+            elif kind == 'box':
+                cell = Label(text=text, size_hint_y=None, height=height)
+            elif kind == 'stack':
+                cell = Label(text=text, size_hint=(None, None), size=(self._cell_width(index), height))
+            else:
+                row, col = divmod(index, self.COLUMNS)
+                cell = Label(text=text, size_hint=(1 / self.COLUMNS, None), height=height,
+                             pos_hint={'x': col / self.COLUMNS, 'top': 1 - row / rows})
+            cells.append(cell)
+            if time.perf_counter() >= deadline:
+                elapsed += time.perf_counter() - start
+                self.status_label.text = f'正在创建控件 {index + 1}/{n}'
+                yield
+                start = time.perf_counter()
+                deadline = start + self.build_budget
+        for cell in cells:
+            container.add_widget(cell)
+        elapsed += time.perf_counter() - start
+        return container, elapsed
+
+    def _build_recycled(self, kind, n):
+        """把单元格按行组织成 RecycleView 数据，返回 (RecycleView, 构建耗时)"""
+        start = time.perf_counter()
+        if kind == 'box':
+            rows = [{'cells': [(str(i), None)]} for i in range(n)]
+        elif kind == 'stack':
+            available = self.stage.width or dp(360)
+            rows, row, used = [], [], 0
+            for index in range(n):
+                width = self._cell_width(index)
+                if row and used + width > available:
+                    rows.append({'cells': row})
+                    row, used = [], 0
+                row.append((str(index), width))
+                used += width
+            if row:
+                rows.append({'cells': row})
+        else:
+            rows = [{'cells': [(str(i), None) for i in range(first, min(first + self.COLUMNS, n))]}
+                    for first in range(0, n, self.COLUMNS)]
+
+        view = uix.RecycleView()
+        row_layout = uix.RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(32)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        row_layout.bind(minimum_height=row_layout.setter('height'))
+        view.add_widget(row_layout)
+        view.viewclass = StressRow
+        view.data = rows
+        return view, time.perf_counter() - start
+
+    def _show_results(self):
+        lines = [f'{"布局":<4}{"实现":<5}{"N":>7}{"控件":>7}{"构建ms":>9}{"布局ms":>9}'
+                 f'{"B/单元":>8}{"滚动fps":>8}{"最长帧ms":>9}']
+        for r in self.results[-10:]:
+            memory = f'{r["bytes_per_cell"]:.0f}' if r['bytes_per_cell'] is not None else '-'
+            lines.append(f'{self.KINDS[r["kind"]]:<4}{self.VARIANTS[r["variant"]]:<5}{r["n"]:>7}'
+                         f'{r["widgets"]:>7}{r["build_ms"]:>9.1f}{r["layout_ms"]:>9.1f}'
+                         f'{memory:>8}{r["scroll_fps"]:>8.1f}{r["worst_frame_ms"]:>9.1f}')
+        self.results_label.text = '\n'.join(lines)
+
+
+# 声明式屏幕
+#
+# 屏幕规格是纯数据：node(类名, 子节点..., 属性...)，尺寸写成 '10dp'/'14sp' 字符串。
+# 属性中的以下键是构建指令而不是控件属性：
+#   style       文字样式预设（TEXT_STYLES），同时设置中文字体并统计纹理重建
+#   attr / id   把控件保存为应用的同名属性 / 放进传给屏幕钩子的 ids
+#   bind        {属性或事件: (应用方法名, 附加参数...)}
+#   coalesce    {属性: (合并器名称, 应用方法名)}，经 EventCoalescer 每帧最多回调一次
+#   track       (键, 属性)，登记到 LazyScreenManager.track_state
+#   paint       背景色（BackgroundPainter）
+#   fit_height  高度跟随 minimum_height
+# 子节点中的 SLICE 是后台分段构建的让出点（见 LazyScreenManager）。
+SLICE = 'slice'
+SPEC_DIRECTIVES = ('style', 'attr', 'id', 'bind', 'coalesce', 'track', 'paint', 'fit_height')
+# 编译时换算单位的属性
+METRIC_PROPS = {'font_size', 'height', 'width', 'padding', 'spacing', 'size'}
+
+
+def node(cls, *children, **props):
+    return (cls, props, children)
+
+
+def label_node(text, style='text', **props):
+    return node('CachedLabel', text=text, style=style, **props)
+
+
+def button_node(text, style='button', **props):
+    return node('CachedButton', text=text, style=style, **props)
+
+
+BACK_BUTTON = button_node('返回主页', 'back_button', bind={'on_press': ('switch_screen', 'main')})
+
+
+def page(name, title, *children, scroll=True, hook=None):
+    """标准演示页：标题、内容、返回按钮纵向排列，scroll 时放进 ScrollView 并按内容定高"""
+    content_props = {'orientation': 'vertical', 'padding': '10dp', 'spacing': '10dp'}
+    if scroll:
+        content_props.update(size_hint_y=None, fit_height=True)
+    content = node('BoxLayout', label_node(title, 'title'), *children, BACK_BUTTON, **content_props)
+    if scroll:
+        content = node('ScrollView', content)
+    return {'root': node('Screen', content, name=name), 'hook': hook}
+
+
+def resolve_metrics(value):
+    """把 '10dp'/'14sp' 字符串（包括元组中的）换算为像素"""
+    if isinstance(value, str):
+        unit = value[-2:]
+        return dpi2px(value[:-2], unit) if unit in ('dp', 'sp') else value
+    if isinstance(value, (tuple, list)):
+        return type(value)(resolve_metrics(v) for v in value)
+    return value
+
+
+def compile_spec(spec):
+    """把屏幕规格编译为构建程序
+
+    程序是扁平的指令列表：样式已合并、单位已换算，子控件在自己的子树完成后才加入父控件。
+    """
+    ops = []
+    slots = [0]
+
+    def emit(spec_node):
+        if spec_node == SLICE:
+            ops.append(('slice',))
+            return None
+        cls, props, children = spec_node
+        slot = slots[0]
+        slots[0] += 1
+        props = dict(props)
+        directives = {key: props.pop(key) for key in SPEC_DIRECTIVES if key in props}
+        kwargs = {}
+        style = directives.get('style')
+        if style is not None:
+            kwargs['font_name'] = FONT_NAME
+            kwargs.update(TEXT_STYLES[style])
+        kwargs.update(props)
+        kwargs = {k: resolve_metrics(v) if k in METRIC_PROPS else v for k, v in kwargs.items()}
+        ops.append(('new', slot, cls, kwargs, style is not None))
+        if 'attr' in directives:
+            ops.append(('attr', slot, directives['attr']))
+        if 'id' in directives:
+            ops.append(('id', slot, directives['id']))
+        if directives.get('fit_height'):
+            ops.append(('fit', slot))
+        if 'paint' in directives:
+            ops.append(('paint', slot, tuple(directives['paint'])))
+        for prop, (method, *args) in directives.get('bind', {}).items():
+            ops.append(('bind', slot, prop, method, tuple(args)))
+        for prop, (coalescer, method) in directives.get('coalesce', {}).items():
+            ops.append(('coalesce', slot, prop, coalescer, method))
+        if 'track' in directives:
+            key, prop = directives['track']
+            ops.append(('track', slot, key, prop))
+        for child in children:
+            child_slot = emit(child)
+            if child_slot is not None:
+                ops.append(('add', slot, child_slot))
+        return slot
+
+    emit(spec['root'])
+    return {'slots': slots[0], 'ops': ops, 'hook': spec.get('hook')}
+
+
+class ScreenBuilder:
+    """按编译好的程序构建屏幕
+
+    每个屏幕的规格只在第一次构建时编译，编译结果保存在内存中供重建时复用。
+    编译五个屏幕合计不到 0.3ms，不值得缓存到磁盘。
+    执行时控件类只解析一次，每个控件用一次构造调用设置全部属性。
+    """
+
+    def __init__(self, specs):
+        self.specs = specs
+        self.programs = {}
+        self._classes = {}
+
+    def program(self, name):
+        program = self.programs.get(name)
+        if program is None:
+            start = time.perf_counter()
+            program = self.programs[name] = compile_spec(self.specs[name])
+            metrics.record('screen_spec.compile', time.perf_counter() - start)
+        return program
+
+    def _class(self, name):
+        cls = self._classes.get(name)
+        if cls is None:
+            try:
+                cls = getattr(uix, name)
+            except AttributeError:
+                cls = globals()[name]
+            self._classes[name] = cls
+        return cls
+
+    def factory(self, name, app):
+        """返回可注册到 LazyScreenManager 的屏幕工厂"""
+        return partial(self.build, name, app)
+
+    def build(self, name, app):
+        """构建屏幕的生成器，在每个 SLICE 处让出，最后调用规格中的钩子 hook(screen, ids)"""
+        program = self.program(name)
+        manager = app.screen_manager
+        slots = [None] * program['slots']
+        ids = {}
+        for op in program['ops']:
+            code = op[0]
+            if code == 'new':
+                widget = slots[op[1]] = self._class(op[2])(**op[3])
+                if op[4] and not isinstance(widget, CachedTextureMixin):
+                    widget.fbind('texture', _count_texture_rebuild)
+            elif code == 'add':
+                slots[op[1]].add_widget(slots[op[2]])
+            elif code == 'bind':
+                slots[op[1]].fbind(op[2], getattr(app, op[3]), *op[4])
+            elif code == 'coalesce':
+                slots[op[1]].fbind(op[2], EventCoalescer(op[3], getattr(app, op[4])))
+            elif code == 'track':
+                manager.track_state(name, op[2], slots[op[1]], op[3])
+            elif code == 'fit':
+                widget = slots[op[1]]
+                widget.fbind('minimum_height', widget.setter('height'))
+            elif code == 'paint':
+                backgrounds.paint(slots[op[1]], op[2])
+            elif code == 'attr':
+                setattr(app, op[2], slots[op[1]])
+            elif code == 'id':
+                ids[op[2]] = slots[op[1]]
+            elif code == 'slice':
+                yield
+        screen = slots[0]
+        if program['hook']:
+            getattr(app, program['hook'])(screen, ids)
+        return screen
+
+
+SCREEN_SPECS = {
+    'basic_widgets': page(
+        'basic_widgets', '基础组件演示',
+        *(label_node(text, 'row', font_size=font_size, color=color) for text, font_size, color in (
+            ('普通标签', '16sp', (1, 1, 1, 1)),
+            ('大号标签', '20sp', (0, 1, 0, 1)),
+            ('彩色标签', '18sp', (1, 0, 1, 1)),
+        )),
+        SLICE,
+        *(button_node(text, background_color=color, bind={'on_press': ('show_popup', f'{text}被点击了！')})
+          for text, color in (
+            ('普通按钮', (0.2, 0.6, 1, 1)),
+            ('绿色按钮', (0.2, 0.8, 0.2, 1)),
+            ('红色按钮', (0.8, 0.2, 0.2, 1)),
+        )),
+        SLICE,
+        label_node('进度条演示', 'caption'),
+        node('ProgressBar', max=100, value=30, size_hint_y=None, height='20dp', attr='progress_bar'),
+        hook='setup_basic_widgets_screen'
+    ),
+    'layout': page(
+        'layout', '布局管理演示',
+        label_node('网格布局 (GridLayout)', 'caption'),
+        node('GridLayout', *(node('Button', text=f'G{i+1}', background_color=(0.3 + i*0.08, 0.5, 0.8, 1))
+                             for i in range(9)),
+             cols=3, size_hint_y=None, height='120dp', spacing='5dp'),
+        SLICE,
+        label_node('水平布局 (BoxLayout)', 'caption'),
+        node('BoxLayout', *(node('Button', text=f'H{i+1}', background_color=color)
+                            for i, color in enumerate([(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.3, 1, 1)])),
+             orientation='horizontal', size_hint_y=None, height='60dp', spacing='5dp'),
+        SLICE,
+        label_node('浮动布局 (FloatLayout)', 'caption'),
+        node('FloatLayout', *(node('Button', text=f'F{i+1}', background_color=(0.8, 0.4 + i*0.2, 0.6, 1),
+                                   pos_hint=pos_hint, size_hint=(0.2, 0.2))
+                              for i, pos_hint in enumerate([{'x': 0.1, 'y': 0.7}, {'x': 0.4, 'y': 0.4},
+                                                            {'x': 0.7, 'y': 0.1}])),
+             size_hint_y=None, height='150dp', paint=(0.1, 0.1, 0.1, 1)),
+        scroll=False
+    ),
+    'input': page(
+        'input', '输入组件演示',
+        label_node('文本输入框:', 'caption'),
+        node('TextInput', text='请输入文本...', font_name=FONT_NAME, multiline=False,
+             size_hint_y=None, height='40dp'),
+        label_node('多行文本输入:', 'caption'),
+        node('TextInput', text='这是多行文本输入框\n可以输入多行内容', font_name=FONT_NAME, multiline=True,
+             size_hint_y=None, height='80dp'),
+        SLICE,
+        label_node('滑块控件:', 'caption'),
+        # 标签文字由钩子按恢复后的值设置
+        label_node('', 'caption', attr='slider_value_label'),
+        node('Slider', min=0, max=100, value=50, size_hint_y=None, height='40dp', id='slider',
+             coalesce={'value': ('slider', 'on_slider_value')}, track=('slider', 'value')),
+        node('BoxLayout',
+             label_node('复选框:'),
+             node('CheckBox', active=True, size_hint_x=None, width='50dp', id='checkbox',
+                  bind={'active': ('on_checkbox_active',)}, track=('checkbox', 'active')),
+             label_node('', attr='checkbox_label'),
+             orientation='horizontal', size_hint_y=None, height='40dp'),
+        node('BoxLayout',
+             label_node('开关:'),
+             node('Switch', active=False, size_hint_x=None, width='80dp', id='switch',
+                  bind={'active': ('on_switch_active',)}, track=('switch', 'active')),
+             label_node('', attr='switch_label'),
+             orientation='horizontal', size_hint_y=None, height='40dp'),
+        SLICE,
+        label_node('下拉选择器:', 'caption'),
+        node('Spinner', text='选择选项', font_name=FONT_NAME, values=['选项1', '选项2', '选项3', '选项4'],
+             size_hint_y=None, height='40dp',
+             coalesce={'text': ('spinner', 'on_spinner_select')}, track=('spinner', 'text')),
+        label_node('未选择', 'caption', attr='spinner_result'),
+        hook='setup_input_screen'
+    ),
+    'media': page(
+        'media', '媒体组件演示',
+        # 图像预览：在下方文件浏览器中选择图片或文本文件后显示预览
+        label_node('图像组件 (Image)', 'caption'),
+        node('FilePreview', placeholder='图像占位符\n(在下方选择图片或文本文件预览)',
+             size_hint_y=None, height='160dp', paint=(0.3, 0.6, 0.9, 1), attr='file_preview'),
+        # 颜色选择器和文件浏览器构建较慢，后台构建时各占一段
+        SLICE,
+        label_node('颜色选择器 (ColorPicker)', 'caption'),
+        node('ColorPicker', size_hint_y=None, height='200dp',
+             coalesce={'color': ('color', 'on_color_change')}, track=('color', 'color')),
+        label_node('选择的颜色: RGB(1.0, 1.0, 1.0)', 'caption', attr='color_result'),
+        SLICE,
+        label_node('文件选择器 (FileChooser)', 'caption'),
+        # 目录由钩子设置，之后才开始列出
+        node('FileBrowser', size_hint_y=None, height='200dp', id='file_browser',
+             bind={'selection': ('on_file_select',)}),
+        label_node('未选择文件', 'caption', font_name=FONT_NAME, attr='file_result'),
+        # 文本文件可在大文件查看器中分页浏览全文
+        button_node('查看全文', 'row', disabled=True, attr='view_file_button',
+                    bind={'on_release': ('show_file_viewer',)}),
+        hook='setup_media_screen'
+    ),
+    'advanced': {
+        'root': node('Screen', node(
+            'TabbedPanel',
+            node('TabbedPanelItem', node('Accordion', *(
+                node('AccordionItem', node(
+                    'BoxLayout',
+                    label_node(f'这是手风琴项目 {i+1} 的内容'),
+                    button_node(f'按钮 {i+1}', 'row'),
+                    orientation='vertical', padding='10dp'
+                ), title=f'手风琴项目 {i+1}')
+                for i in range(3)
+            )), text='手风琴'),
+            # 后台构建时每个选项卡占一段
+            SLICE,
+            node('TabbedPanelItem', node('Carousel', *(
+                label_node(f'轮播页面 {i+1}\n左右滑动切换', color=(0, 0, 0, 1) if i == 3 else (1, 1, 1, 1),
+                           paint=color)
+                for i, color in enumerate([(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.3, 1, 1), (1, 1, 0.3, 1)])
+            ), direction='right'), text='轮播图'),
+            SLICE,
+            node('TabbedPanelItem', node(
+                'Splitter',
+                node('BoxLayout', label_node('左侧面板'), button_node('左侧按钮', 'row'),
+                     orientation='vertical', padding='10dp'),
+                node('BoxLayout', label_node('右侧面板\n可拖拽分割线调整大小'), button_node('右侧按钮', 'row'),
+                     orientation='vertical', padding='10dp'),
+                sizable_from='right'
+            ), text='分割器'),
+            SLICE,
+            node('TabbedPanelItem', node(
+                'BoxLayout',
+                button_node('显示弹窗', background_color=(0.8, 0.4, 0.8, 1),
+                            bind={'on_press': ('show_custom_popup',)}),
+                button_node('显示模态视图', background_color=(0.4, 0.8, 0.8, 1),
+                            bind={'on_press': ('show_modal_view',)}),
+                button_node('显示气泡', background_color=(0.8, 0.8, 0.4, 1),
+                            bind={'on_press': ('show_bubble',)}),
+                BACK_BUTTON,
+                orientation='vertical', padding='10dp', spacing='10dp'
+            ), text='控制'),
+            do_default_tab=False
+        ), name='advanced'),
+    },
+}
+
 
 class KivyUIDemo(App):
+    # 是否在首帧后分段构建其余屏幕，并在切换后预构建最可能访问的下一个屏幕
+    prewarm_screens = True
+    # 后台分段构建每帧可用的时间（秒）
+    build_budget = 0.006
+    # 按下导航按钮时预热目标屏幕（布局与文字纹理），松开时再切换
+    prewarm_transitions = True
+    # 同时驻留的屏幕上限（0 表示不限制），以及纹理内存预算（字节）
+    max_resident_screens = 4
+    max_texture_bytes = 0
+    # 是否在主页显示驻留屏幕调试信息
+    screen_debug = False
+    # 同时显示的气泡数量上限
+    max_bubbles = 2
+    # 每种弹窗保留的空闲实例数，0 表示每次重新构建
+    dialog_pool_size = 2
+    # 启动时是否显示性能面板（运行中按 F12 切换）
+    perf_overlay = False
+    # 渲染模式：on_demand 在画面静止时降低主循环频率，continuous 始终按 maxfps 运行
+    render_mode = 'on_demand'
+    # 活动时的帧率上限与空闲时的帧率上限（0 表示使用配置的默认值）
+    max_fps = 0
+    idle_fps = 0
+    # 由 GcScheduler 安排循环垃圾回收：构建期间不自动回收，动画期间推迟，启动后冻结常驻对象
+    gc_scheduling = True
+
     def build(self):
         try:
-            Logger.info("KivyUIDemo: 开始构建UI演示应用")
+            app_log.info('开始构建UI演示应用')
+            build_start = time.perf_counter()
+            
+            # 构建期间一次性创建大量长期存活的对象，自动回收只会反复扫描它们；
+            # 首帧后由 GcScheduler 接管
+            if self.gc_scheduling:
+                gc.disable()
+            
+            # 日志文件由后台线程写入
+            self.setup_logging()
             
             # 配置中文字体支持
             self.setup_chinese_font()
             
+            # 读取上次保存的界面状态，控件创建时按快照恢复
+            self.state_store = self.load_state()
+            
             # 创建主屏幕管理器
-            sm = ScreenManager()
+            sm = LazyScreenManager(
+                max_resident=self.max_resident_screens,
+                max_texture_bytes=self.max_texture_bytes,
+                build_budget=self.build_budget
+            )
+            sm.state_store = self.state_store
+            sm.bind(on_screen_built=self.on_screen_built,
+                    on_screen_unloaded=self.on_screen_unloaded,
+                    on_resident_changed=self.on_resident_changed,
+                    on_build_progress=self.on_build_progress)
+            self.screen_manager = sm
+            self.screen_timers = {}
+            self.dialog_pools = {
+                'message': DialogPool('message', self.build_message_popup, self.dialog_pool_size),
+                'custom': DialogPool('custom', self.build_custom_popup, self.dialog_pool_size),
+                'modal': DialogPool('modal', self.build_modal_view, self.dialog_pool_size),
+                'bubble': DialogPool('bubble', self.build_bubble, self.max_bubbles),
+                'viewer': DialogPool('viewer', self.build_viewer_popup, min(1, self.dialog_pool_size)),
+            }
+            self.active_bubbles = []
+            self.thumbnails = self.create_thumbnail_cache()
             
-            # 添加各种演示屏幕
-            sm.add_widget(self.create_main_screen())
-            sm.add_widget(self.create_basic_widgets_screen())
-            sm.add_widget(self.create_layout_screen())
-            sm.add_widget(self.create_input_screen())
-            sm.add_widget(self.create_media_screen())
-            sm.add_widget(self.create_advanced_screen())
+            # 演示屏幕由声明式规格构建
+            self.screen_builder = ScreenBuilder(SCREEN_SPECS)
             
-            Logger.info("KivyUIDemo: UI演示应用构建成功")
+            # 注册各种演示屏幕，主屏幕立即构建，其余在首帧后分段构建或在首次访问时构建
+            sm.register_screen('main', self.create_main_screen)
+            for name in SCREEN_SPECS:
+                sm.register_screen(name, self.screen_builder.factory(name, self))
+            sm.register_screen('stress', self.create_stress_screen)
+            sm.ensure_screen('main')
+            
+            build_time = time.perf_counter() - build_start
+            metrics.record('startup.build', build_time)
+            app_log.info('UI演示应用构建成功，耗时 %.1fms', build_time * 1000)
             return sm
             
         except Exception as e:
-            Logger.error(f"KivyUIDemo: 构建应用时发生错误: {str(e)}")
-            Logger.error(f"KivyUIDemo: 错误详情: {traceback.format_exc()}")
+            app_log.error('构建应用时发生错误: %s', e)
+            app_log.error('错误详情: %s', traceback.format_exc())
+            crash_log = applog.dump('build() 失败')
+            if crash_log:
+                app_log.error('最近日志已转储到 %s', crash_log)
             return Label(text="应用启动失败，请检查日志")
     
+    def setup_logging(self):
+        """把应用日志写入用户数据目录下的轮转日志文件"""
+        try:
+            applog.start_writer(os.path.join(self.user_data_dir, 'logs'))
+            app_log.info('日志文件: %s', applog.path)
+        except OSError as e:
+            app_log.warning('无法创建日志目录，日志只保留在内存中: %s', e)
+    
+    def load_state(self):
+        """同步读取界面状态快照，并记录耗时"""
+        start = time.perf_counter()
+        try:
+            store = StateStore(os.path.join(self.user_data_dir, 'ui_state.json'))
+        except OSError as e:
+            app_log.warning('无法访问用户数据目录，界面状态不会保存: %s', e)
+            store = StateStore(None)
+        count = store.load()
+        elapsed = time.perf_counter() - start
+        metrics.record('startup.state_restore', elapsed)
+        app_log.info('读取界面状态 %d 项，耗时 %.2fms', count, elapsed * 1000)
+        return store
+    
+    def create_thumbnail_cache(self):
+        """缩略图缓存位于用户数据目录，目录在第一次写入时由工作线程创建"""
+        try:
+            return ThumbnailCache(os.path.join(self.user_data_dir, 'thumbnails'))
+        except OSError as e:
+            file_log.warning('无法访问用户数据目录，缩略图不做缓存: %s', e)
+            return None
+    
     def setup_chinese_font(self):
-        """配置中文字体支持"""
+        """配置中文字体支持
+
+        FONT_NAME 注册为完整的中文字体：读取按系统字体指纹缓存的探测结果，
+        缓存失效时才逐个探测系统字体。随应用打包的子集字体只注册为 UI_FONT_NAME，
+        没有子集字体时 UI_FONT_NAME 与 FONT_NAME 使用同一个文件。
+        """
+        start = time.perf_counter()
         try:
-            # 尝试注册中文字体
-            # 在Android上，系统通常包含支持中文的字体
-            chinese_fonts = [
-                '/system/fonts/NotoSansCJK-Regular.ttc',  # Android系统字体
-                '/system/fonts/DroidSansFallback.ttf',    # 旧版Android字体
-                '/system/fonts/NotoSansCJK.ttc',          # 新版Android字体
-                'DroidSansFallback.ttf',                  # 相对路径
-                'NotoSansCJK-Regular.ttc'                 # 相对路径
-            ]
+            try:
+                cache_path = os.path.join(self.user_data_dir, FONT_CACHE_FILE)
+            except OSError as e:
+                font_log.warning('无法访问用户数据目录，跳过字体缓存: %s', e)
+                cache_path = None
+            fingerprint = font_fingerprint()
+            font_path, source = None, None
+            
+            if cache_path is not None:
+                font_path = load_font_cache(cache_path, fingerprint)
+                if font_path is not None:
+                    source = '字体缓存'
+            
+            if font_path is None:
+                # 在Android上，系统通常包含支持中文的字体
+                font_path = next((p for p in SYSTEM_CJK_FONTS if os.path.exists(p)), None)
+                if font_path is not None:
+                    source = '系统字体探测'
+                if font_path is not None and cache_path is not None:
+                    # 缓存写入不阻塞启动
+                    threading.Thread(
+                        target=save_font_cache,
+                        args=(cache_path, fingerprint, font_path),
+                        daemon=True
+                    ).start()
             
             font_registered = False
-            for font_path in chinese_fonts:
-                if os.path.exists(font_path):
-                    try:
-                        LabelBase.register(name='Chinese', fn_regular=font_path)
-                        Logger.info(f"KivyUIDemo: 成功注册中文字体: {font_path}")
-                        font_registered = True
-                        break
-                    except Exception as e:
-                        Logger.warning(f"KivyUIDemo: 注册字体失败 {font_path}: {str(e)}")
-                        continue
+            if font_path is not None:
+                try:
+                    LabelBase.register(name=FONT_NAME, fn_regular=font_path)
+                    font_log.info('成功注册中文字体(%s): %s', source, font_path)
+                    font_registered = True
+                except Exception as e:
+                    font_log.warning('注册字体失败 %s: %s', font_path, e)
             
             if not font_registered:
-                Logger.warning("KivyUIDemo: 未找到合适的中文字体，将使用默认字体")
+                font_log.warning('未找到合适的中文字体，将使用默认字体')
                 # 尝试使用Kivy默认字体，它在某些情况下也能显示中文
                 try:
-                    LabelBase.register(name='Chinese', fn_regular=LabelBase._default_font_paths[0])
-                    Logger.info("KivyUIDemo: 使用默认字体作为中文字体")
+                    LabelBase.register(name=FONT_NAME, fn_regular=resource_find(DEFAULT_FONT_FILE))
+                    font_log.info('使用默认字体作为中文字体')
                 except Exception as e:
-                    Logger.error(f"KivyUIDemo: 字体配置完全失败: {str(e)}")
+                    font_log.error('字体配置完全失败: %s', e)
+            
+            self._register_ui_font(font_path if font_registered else resource_find(DEFAULT_FONT_FILE))
                     
         except Exception as e:
-            Logger.error(f"KivyUIDemo: 中文字体配置过程中发生错误: {str(e)}")
+            font_log.error('中文字体配置过程中发生错误: %s', e)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record('startup.font_setup', elapsed)
+            font_log.info('字体配置耗时 %.1fms', elapsed * 1000)
+    
+    def _register_ui_font(self, fallback_path):
+        """注册界面固定文字使用的字体：内置子集字体只包含界面用到的字形，加载最快"""
+        for candidate in BUNDLED_FONTS:
+            candidate = os.path.join(APP_DIR, candidate)
+            if not os.path.exists(candidate):
+                continue
+            try:
+                LabelBase.register(name=UI_FONT_NAME, fn_regular=candidate)
+                font_log.info('界面文字使用内置子集字体: %s', candidate)
+                return
+            except Exception as e:
+                font_log.warning('注册子集字体失败 %s: %s', candidate, e)
+        try:
+            LabelBase.register(name=UI_FONT_NAME, fn_regular=fallback_path)
+        except Exception as e:
+            font_log.error('界面字体配置失败: %s', e)
     
     def create_main_screen(self):
         """创建主屏幕"""
@@ -114,15 +4133,7 @@ class KivyUIDemo(App):
         layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
         
         # 标题
-        title = Label(
-            text='Kivy UI 组件演示',
-            font_size='24sp',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(60),
-            color=(0.2, 0.6, 1, 1)
-        )
-        layout.add_widget(title)
+        layout.add_widget(make_label('Kivy UI 组件演示', 'app_title'))
         
         # 导航按钮
         nav_buttons = [
@@ -130,657 +4141,230 @@ class KivyUIDemo(App):
             ('布局管理', 'layout'),
             ('输入组件', 'input'),
             ('媒体组件', 'media'),
-            ('高级组件', 'advanced')
+            ('高级组件', 'advanced'),
+            ('布局压力测试', 'stress')
         ]
         
         for text, screen_name in nav_buttons:
-            btn = Button(
-                text=text,
-                font_name='Chinese',
-                size_hint_y=None,
-                height=dp(50),
-                background_color=(0.3, 0.7, 0.9, 1)
-            )
-            btn.bind(on_press=partial(self.switch_screen, screen_name))
-            layout.add_widget(btn)
-        
-        screen.add_widget(layout)
-        return screen
-    
-    def create_basic_widgets_screen(self):
-        """创建基础组件演示屏幕"""
-        screen = Screen(name='basic_widgets')
-        
-        # 使用滚动视图
-        scroll = ScrollView()
-        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10), size_hint_y=None)
-        layout.bind(minimum_height=layout.setter('height'))
-        
-        # 标题
-        title = Label(
-            text='基础组件演示',
-            font_size='20sp',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            color=(1, 0.5, 0, 1)
-        )
-        layout.add_widget(title)
-        
-        # 各种标签
-        labels = [
-            ('普通标签', '16sp', (1, 1, 1, 1)),
-            ('大号标签', '20sp', (0, 1, 0, 1)),
-            ('彩色标签', '18sp', (1, 0, 1, 1))
-        ]
-        
-        for text, font_size, color in labels:
-            label = Label(
-                text=text,
-                font_size=font_size,
-                font_name='Chinese',
-                color=color,
-                size_hint_y=None,
-                height=dp(40)
-            )
-            layout.add_widget(label)
-        
-        # 各种按钮
-        buttons = [
-            ('普通按钮', (0.2, 0.6, 1, 1)),
-            ('绿色按钮', (0.2, 0.8, 0.2, 1)),
-            ('红色按钮', (0.8, 0.2, 0.2, 1))
-        ]
-        
-        for text, color in buttons:
-            btn = Button(
-                text=text,
-                font_name='Chinese',
-                background_color=color,
-                size_hint_y=None,
-                height=dp(50)
-            )
-            btn.bind(on_press=partial(self.show_popup, f'{text}被点击了！'))
+            btn = make_button(text, 'nav_button')
+            if self.prewarm_transitions:
+                # 按下时开始准备目标屏幕，松开时再切换
+                btn.bind(on_press=partial(self.prewarm_transition, screen_name),
+                         on_release=partial(self.switch_screen, screen_name),
+                         on_touch_up=partial(self.cancel_prewarm_transition, screen_name))
+            else:
+                btn.bind(on_press=partial(self.switch_screen, screen_name))
             layout.add_widget(btn)
         
-        # 进度条
-        progress_label = Label(
-            text='进度条演示',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(progress_label)
-        
-        self.progress_bar = ProgressBar(
-            max=100,
-            value=30,
-            size_hint_y=None,
-            height=dp(20)
-        )
-        layout.add_widget(self.progress_bar)
-        
-        # 启动进度条动画
-        Clock.schedule_interval(self.update_progress, 0.1)
+        # 驻留屏幕调试信息与性能面板开关
+        if self.screen_debug:
+            self.resident_label = make_label('', 'caption', font_size='12sp', color=(0.7, 0.7, 0.7, 1))
+            layout.add_widget(self.resident_label)
+            overlay_btn = make_button('性能面板', 'back_button')
+            overlay_btn.bind(on_press=self.toggle_perf_overlay)
+            layout.add_widget(overlay_btn)
         
-        # 返回按钮
-        back_btn = Button(
-            text='返回主页',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.5, 0.5, 0.5, 1)
-        )
-        back_btn.bind(on_press=partial(self.switch_screen, 'main'))
-        layout.add_widget(back_btn)
+        # 其余屏幕的后台构建进度，全部完成后移除
+        if self.prewarm_screens:
+            self.build_status = make_label('正在准备其他页面...', 'caption', font_size='12sp',
+                                           color=(0.7, 0.7, 0.7, 1))
+            layout.add_widget(self.build_status)
+            self.build_progress = uix.ProgressBar(max=1, value=0, size_hint_y=None, height=dp(6))
+            layout.add_widget(self.build_progress)
         
-        scroll.add_widget(layout)
-        screen.add_widget(scroll)
+        screen.add_widget(layout)
         return screen
     
-    def create_layout_screen(self):
-        """创建布局管理演示屏幕"""
-        screen = Screen(name='layout')
-        main_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
-        
-        # 标题
-        title = Label(
-            text='布局管理演示',
-            font_size='20sp',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            color=(1, 0.5, 0, 1)
-        )
-        main_layout.add_widget(title)
-        
-        # 网格布局演示
-        grid_label = Label(
-            text='网格布局 (GridLayout)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        main_layout.add_widget(grid_label)
-        
-        grid = GridLayout(cols=3, size_hint_y=None, height=dp(120), spacing=dp(5))
-        for i in range(9):
-            btn = Button(
-                text=f'G{i+1}',
-                background_color=(0.3 + i*0.08, 0.5, 0.8, 1)
-            )
-            grid.add_widget(btn)
-        main_layout.add_widget(grid)
-        
-        # 水平布局演示
-        h_label = Label(
-            text='水平布局 (BoxLayout)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        main_layout.add_widget(h_label)
-        
-        h_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(60), spacing=dp(5))
-        for i, color in enumerate([(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.3, 1, 1)]):
-            btn = Button(
-                text=f'H{i+1}',
-                background_color=color
-            )
-            h_layout.add_widget(btn)
-        main_layout.add_widget(h_layout)
-        
-        # 浮动布局演示
-        float_label = Label(
-            text='浮动布局 (FloatLayout)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        main_layout.add_widget(float_label)
-        
-        float_layout = FloatLayout(size_hint_y=None, height=dp(150))
-        
-        # 添加背景色
-        with float_layout.canvas.before:
-            Color(0.1, 0.1, 0.1, 1)
-            Rectangle(pos=float_layout.pos, size=float_layout.size)
-        
-        positions = [
-            {'pos_hint': {'x': 0.1, 'y': 0.7}, 'size_hint': (0.2, 0.2)},
-            {'pos_hint': {'x': 0.4, 'y': 0.4}, 'size_hint': (0.2, 0.2)},
-            {'pos_hint': {'x': 0.7, 'y': 0.1}, 'size_hint': (0.2, 0.2)}
-        ]
-        
-        for i, pos_info in enumerate(positions):
-            btn = Button(
-                text=f'F{i+1}',
-                background_color=(0.8, 0.4 + i*0.2, 0.6, 1),
-                **pos_info
-            )
-            float_layout.add_widget(btn)
-        
-        main_layout.add_widget(float_layout)
-        
-        # 返回按钮
-        back_btn = Button(
-            text='返回主页',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.5, 0.5, 0.5, 1)
-        )
-        back_btn.bind(on_press=partial(self.switch_screen, 'main'))
-        main_layout.add_widget(back_btn)
-        
-        screen.add_widget(main_layout)
-        return screen
+    def setup_basic_widgets_screen(self, screen, ids):
+        """进度条动画只在本屏幕可见时运行"""
+        timers = self.screen_timers[screen.name] = ScreenTimers(screen)
+        timers.schedule_interval(self.update_progress, 0.1)
     
-    def create_input_screen(self):
-        """创建输入组件演示屏幕"""
-        screen = Screen(name='input')
-        
-        scroll = ScrollView()
-        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10), size_hint_y=None)
-        layout.bind(minimum_height=layout.setter('height'))
-        
-        # 标题
-        title = Label(
-            text='输入组件演示',
-            font_size='20sp',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            color=(1, 0.5, 0, 1)
-        )
-        layout.add_widget(title)
-        
-        # 文本输入
-        text_label = Label(
-            text='文本输入框:',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(text_label)
-        
-        text_input = TextInput(
-            text='请输入文本...',
-            font_name='Chinese',
-            multiline=False,
-            size_hint_y=None,
-            height=dp(40)
-        )
-        layout.add_widget(text_input)
-        
-        # 多行文本输入
-        multiline_label = Label(
-            text='多行文本输入:',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(multiline_label)
-        
-        multiline_input = TextInput(
-            text='这是多行文本输入框\n可以输入多行内容',
-            font_name='Chinese',
-            multiline=True,
-            size_hint_y=None,
-            height=dp(80)
-        )
-        layout.add_widget(multiline_input)
-        
-        # 滑块
-        slider_label = Label(
-            text='滑块控件:',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(slider_label)
-        
-        self.slider_value_label = Label(
-            text='值: 50',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(self.slider_value_label)
-        
-        slider = Slider(
-            min=0,
-            max=100,
-            value=50,
-            size_hint_y=None,
-            height=dp(40)
-        )
-        slider.bind(value=self.on_slider_value)
-        layout.add_widget(slider)
-        
-        # 复选框
-        checkbox_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40))
-        checkbox_layout.add_widget(Label(text='复选框:', font_name='Chinese'))
-        
-        checkbox = CheckBox(active=True, size_hint_x=None, width=dp(50))
-        checkbox.bind(active=self.on_checkbox_active)
-        checkbox_layout.add_widget(checkbox)
-        
-        self.checkbox_label = Label(text='已选中', font_name='Chinese')
-        checkbox_layout.add_widget(self.checkbox_label)
-        
-        layout.add_widget(checkbox_layout)
-        
-        # 开关
-        switch_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40))
-        switch_layout.add_widget(Label(text='开关:', font_name='Chinese'))
-        
-        switch = Switch(active=False, size_hint_x=None, width=dp(80))
-        switch.bind(active=self.on_switch_active)
-        switch_layout.add_widget(switch)
-        
-        self.switch_label = Label(text='关闭', font_name='Chinese')
-        switch_layout.add_widget(self.switch_label)
-        
-        layout.add_widget(switch_layout)
-        
-        # 下拉选择器
-        spinner_label = Label(
-            text='下拉选择器:',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(spinner_label)
-        
-        spinner = Spinner(
-            text='选择选项',
-            font_name='Chinese',
-            values=['选项1', '选项2', '选项3', '选项4'],
-            size_hint_y=None,
-            height=dp(40)
-        )
-        spinner.bind(text=self.on_spinner_select)
-        layout.add_widget(spinner)
-        
-        self.spinner_result = Label(
-            text='未选择',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(self.spinner_result)
-        
-        # 返回按钮
-        back_btn = Button(
-            text='返回主页',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.5, 0.5, 0.5, 1)
-        )
-        back_btn.bind(on_press=partial(self.switch_screen, 'main'))
-        layout.add_widget(back_btn)
-        
-        scroll.add_widget(layout)
-        screen.add_widget(scroll)
-        return screen
+    def setup_input_screen(self, screen, ids):
+        """标签按恢复后的控件值初始化"""
+        self.slider_value_label.text = f'值: {int(ids["slider"].value)}'
+        self.checkbox_label.text = '已选中' if ids['checkbox'].active else '未选中'
+        self.switch_label.text = '开启' if ids['switch'].active else '关闭'
     
-    def create_media_screen(self):
-        """创建媒体组件演示屏幕"""
-        screen = Screen(name='media')
-        
-        scroll = ScrollView()
-        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10), size_hint_y=None)
-        layout.bind(minimum_height=layout.setter('height'))
-        
-        # 标题
-        title = Label(
-            text='媒体组件演示',
-            font_size='20sp',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            color=(1, 0.5, 0, 1)
-        )
-        layout.add_widget(title)
-        
-        # 图像占位符（由于没有实际图片文件）
-        image_label = Label(
-            text='图像组件 (Image)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(image_label)
-        
-        # 创建一个带背景色的标签作为图像占位符
-        image_placeholder = Label(
-            text='图像占位符\n(实际应用中可加载图片)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(100),
-            color=(1, 1, 1, 1)
-        )
-        
-        with image_placeholder.canvas.before:
-            Color(0.3, 0.6, 0.9, 1)
-            Rectangle(pos=image_placeholder.pos, size=image_placeholder.size)
-        
-        layout.add_widget(image_placeholder)
-        
-        # 颜色选择器
-        color_label = Label(
-            text='颜色选择器 (ColorPicker)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(color_label)
-        
-        color_picker = ColorPicker(
-            size_hint_y=None,
-            height=dp(200)
-        )
-        color_picker.bind(color=self.on_color_change)
-        layout.add_widget(color_picker)
-        
-        self.color_result = Label(
-            text='选择的颜色: RGB(1.0, 1.0, 1.0)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(self.color_result)
-        
-        # 文件选择器
-        file_label = Label(
-            text='文件选择器 (FileChooser)',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(file_label)
-        
-        file_chooser = FileChooserListView(
-            size_hint_y=None,
-            height=dp(200)
-        )
-        file_chooser.bind(selection=self.on_file_select)
-        layout.add_widget(file_chooser)
-        
-        self.file_result = Label(
-            text='未选择文件',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        layout.add_widget(self.file_result)
-        
-        # 返回按钮
-        back_btn = Button(
-            text='返回主页',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.5, 0.5, 0.5, 1)
-        )
-        back_btn.bind(on_press=partial(self.switch_screen, 'main'))
-        layout.add_widget(back_btn)
-        
-        scroll.add_widget(layout)
-        screen.add_widget(scroll)
-        return screen
+    def setup_media_screen(self, screen, ids):
+        """回到上次浏览的目录；预览控件都创建后再恢复上次选择的文件"""
+        file_browser = ids['file_browser']
+        last_dir = self.state_store.get('media.dir')
+        file_browser.path = last_dir if last_dir and os.path.isdir(last_dir) else os.getcwd()
+        self.screen_manager.track_state('media', 'dir', file_browser, 'path')
+        self.screen_manager.track_state('media', 'file', file_browser, 'selection')
+        screen.fbind('on_pre_enter', self._resume_file_info, file_browser)
     
-    def create_advanced_screen(self):
-        """创建高级组件演示屏幕"""
-        screen = Screen(name='advanced')
-        
-        # 使用选项卡面板
-        tab_panel = TabbedPanel(do_default_tab=False)
-        
-        # 手风琴选项卡
-        accordion_tab = TabbedPanelItem(text='手风琴')
-        accordion = Accordion()
-        
-        for i in range(3):
-            item = AccordionItem(title=f'手风琴项目 {i+1}')
-            content = BoxLayout(orientation='vertical', padding=dp(10))
-            content.add_widget(Label(text=f'这是手风琴项目 {i+1} 的内容', font_name='Chinese'))
-            content.add_widget(Button(text=f'按钮 {i+1}', font_name='Chinese', size_hint_y=None, height=dp(40)))
-            item.add_widget(content)
-            accordion.add_widget(item)
-        
-        accordion_tab.add_widget(accordion)
-        tab_panel.add_widget(accordion_tab)
-        
-        # 轮播图选项卡
-        carousel_tab = TabbedPanelItem(text='轮播图')
-        carousel = Carousel(direction='right')
-        
-        colors = [(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.3, 1, 1), (1, 1, 0.3, 1)]
-        for i, color in enumerate(colors):
-            slide = Label(
-                text=f'轮播页面 {i+1}\n左右滑动切换',
-                font_name='Chinese',
-                color=(0, 0, 0, 1) if i == 3 else (1, 1, 1, 1)
-            )
-            with slide.canvas.before:
-                Color(*color)
-                Rectangle(pos=slide.pos, size=slide.size)
-            carousel.add_widget(slide)
-        
-        carousel_tab.add_widget(carousel)
-        tab_panel.add_widget(carousel_tab)
-        
-        # 分割器选项卡
-        splitter_tab = TabbedPanelItem(text='分割器')
-        splitter = Splitter(sizable_from='right')
-        
-        left_panel = BoxLayout(orientation='vertical', padding=dp(10))
-        left_panel.add_widget(Label(text='左侧面板', font_name='Chinese'))
-        left_panel.add_widget(Button(text='左侧按钮', font_name='Chinese', size_hint_y=None, height=dp(40)))
-        
-        right_panel = BoxLayout(orientation='vertical', padding=dp(10))
-        right_panel.add_widget(Label(text='右侧面板\n可拖拽分割线调整大小', font_name='Chinese'))
-        right_panel.add_widget(Button(text='右侧按钮', font_name='Chinese', size_hint_y=None, height=dp(40)))
-        
-        splitter.add_widget(left_panel)
-        splitter.add_widget(right_panel)
-        
-        splitter_tab.add_widget(splitter)
-        tab_panel.add_widget(splitter_tab)
-        
-        # 控制选项卡
-        control_tab = TabbedPanelItem(text='控制')
-        control_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
-        
-        # 弹窗按钮
-        popup_btn = Button(
-            text='显示弹窗',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.8, 0.4, 0.8, 1)
-        )
-        popup_btn.bind(on_press=self.show_custom_popup)
-        control_layout.add_widget(popup_btn)
+    def create_stress_screen(self):
+        """创建布局压力测试屏幕"""
+        screen = Screen(name='stress')
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
         
-        # 模态视图按钮
-        modal_btn = Button(
-            text='显示模态视图',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.4, 0.8, 0.8, 1)
-        )
-        modal_btn.bind(on_press=self.show_modal_view)
-        control_layout.add_widget(modal_btn)
+        layout.add_widget(make_label('布局压力测试', 'title'))
         
-        # 气泡按钮
-        bubble_btn = Button(
-            text='显示气泡',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.8, 0.8, 0.4, 1)
-        )
-        bubble_btn.bind(on_press=self.show_bubble)
-        control_layout.add_widget(bubble_btn)
+        stress = LayoutStressTest()
+        layout.add_widget(stress)
+        # 离开屏幕时停止测试并释放测试控件
+        screen.bind(on_leave=lambda *args: stress.cancel())
         
-        # 返回主页按钮
-        back_btn = Button(
-            text='返回主页',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.5, 0.5, 0.5, 1)
-        )
+        back_btn = make_button('返回主页', 'back_button')
         back_btn.bind(on_press=partial(self.switch_screen, 'main'))
-        control_layout.add_widget(back_btn)
-        
-        control_tab.add_widget(control_layout)
-        tab_panel.add_widget(control_tab)
+        layout.add_widget(back_btn)
         
-        screen.add_widget(tab_panel)
+        screen.add_widget(layout)
         return screen
     
     # 事件处理方法
+    def prewarm_transition(self, screen_name, instance):
+        """按下导航按钮时预热目标屏幕"""
+        self.root.prewarm_screen(screen_name)
+    
+    def cancel_prewarm_transition(self, screen_name, instance, touch):
+        """按下后拖出按钮再松开不会切换屏幕，放弃预热"""
+        if touch.grab_current is instance and not instance.collide_point(*touch.pos):
+            self.root.cancel_prewarm(screen_name)
+    
     def switch_screen(self, screen_name, instance):
-        """切换屏幕"""
-        self.root.current = screen_name
+        """切换屏幕，目标屏幕在首次访问时构建"""
+        self.root.show_screen(screen_name)
+        if self.prewarm_screens:
+            self.root.schedule_prewarm()
     
-    def show_popup(self, message, instance):
-        """显示简单弹窗"""
-        popup = Popup(
+    def build_message_popup(self):
+        """构建简单弹窗（由弹窗池复用）"""
+        popup = uix.Popup(
             title='提示',
-            content=Label(text=message),
+            title_font=FONT_NAME,
+            content=make_label(''),
             size_hint=(0.8, 0.4)
         )
-        popup.open()
+        popup.message_label = popup.content
+        return popup
     
-    def show_custom_popup(self, instance):
-        """显示自定义弹窗"""
+    def build_custom_popup(self):
+        """构建自定义弹窗（由弹窗池复用）"""
         content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
-        content.add_widget(Label(text='这是一个自定义弹窗', font_name='Chinese'))
-        content.add_widget(TextInput(text='可以在这里输入内容', font_name='Chinese', multiline=False))
+        content.add_widget(make_label('这是一个自定义弹窗'))
+        text_input = uix.TextInput(text='', font_name=FONT_NAME, multiline=False)
+        content.add_widget(text_input)
         
         btn_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(50))
         
-        ok_btn = Button(text='确定', font_name='Chinese', background_color=(0.2, 0.8, 0.2, 1))
-        cancel_btn = Button(text='取消', font_name='Chinese', background_color=(0.8, 0.2, 0.2, 1))
+        ok_btn = make_button('确定', 'text', background_color=(0.2, 0.8, 0.2, 1))
+        cancel_btn = make_button('取消', 'text', background_color=(0.8, 0.2, 0.2, 1))
         
         btn_layout.add_widget(ok_btn)
         btn_layout.add_widget(cancel_btn)
         content.add_widget(btn_layout)
         
-        popup = Popup(
+        popup = uix.Popup(
             title='自定义弹窗',
+            title_font=FONT_NAME,
             content=content,
             size_hint=(0.9, 0.6)
         )
+        popup.text_input = text_input
         
         ok_btn.bind(on_press=popup.dismiss)
         cancel_btn.bind(on_press=popup.dismiss)
-        
-        popup.open()
+        return popup
     
-    def show_modal_view(self, instance):
-        """显示模态视图"""
-        modal = ModalView(size_hint=(0.8, 0.6))
+    def build_modal_view(self):
+        """构建模态视图（由弹窗池复用）"""
+        modal = uix.ModalView(size_hint=(0.8, 0.6))
         
         content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
-        content.add_widget(Label(text='这是一个模态视图\n点击外部区域关闭', font_name='Chinese', font_size='18sp'))
+        content.add_widget(make_label('这是一个模态视图\n点击外部区域关闭', font_size='18sp'))
         
-        close_btn = Button(
-            text='关闭',
-            font_name='Chinese',
-            size_hint_y=None,
-            height=dp(50),
-            background_color=(0.8, 0.2, 0.2, 1)
-        )
+        close_btn = make_button('关闭', background_color=(0.8, 0.2, 0.2, 1))
         close_btn.bind(on_press=modal.dismiss)
         content.add_widget(close_btn)
         
         modal.add_widget(content)
-        modal.open()
+        return modal
     
-    def show_bubble(self, instance):
-        """显示气泡"""
-        bubble = Bubble(
+    def build_viewer_popup(self):
+        """构建大文件查看器弹窗（由弹窗池复用），关闭时解除文件映射"""
+        viewer = LargeFileViewer()
+        popup = uix.Popup(
+            title='文件查看器',
+            title_font=FONT_NAME,
+            content=viewer,
+            size_hint=(0.95, 0.9)
+        )
+        popup.viewer = viewer
+        popup.bind(on_dismiss=lambda *args: viewer.close())
+        return popup
+    
+    def build_bubble(self):
+        """构建气泡（由弹窗池复用）"""
+        bubble = uix.Bubble(
             size_hint=(None, None),
             size=(dp(200), dp(100)),
             pos_hint={'center_x': 0.5, 'center_y': 0.7}
         )
         
-        bubble.add_widget(BubbleButton(text='选项1', font_name='Chinese'))
-        bubble.add_widget(BubbleButton(text='选项2', font_name='Chinese'))
-        bubble.add_widget(BubbleButton(text='选项3', font_name='Chinese'))
+        content = uix.BubbleContent()
+        content.add_widget(styled(uix.BubbleButton, '选项1'))
+        content.add_widget(styled(uix.BubbleButton, '选项2'))
+        content.add_widget(styled(uix.BubbleButton, '选项3'))
+        bubble.add_widget(content)
+        return bubble
+    
+    def show_popup(self, message, instance):
+        """显示简单弹窗"""
+        popup = self.dialog_pools['message'].acquire()
+        popup.message_label.text = message
+        popup.open()
+    
+    def show_file_viewer(self, instance):
+        """在大文件查看器中打开当前选择的文本文件"""
+        path = getattr(self, '_viewer_path', None)
+        if not path:
+            return
+        popup = self.dialog_pools['viewer'].acquire()
+        popup.title = os.path.basename(path)
+        try:
+            popup.viewer.open(path)
+        except (OSError, ValueError) as e:
+            file_log.warning('无法打开文件 %s: %s', path, e)
+            self.dialog_pools['viewer'].release(popup)
+            return
+        popup.open()
+    
+    def show_custom_popup(self, instance):
+        """显示自定义弹窗"""
+        popup = self.dialog_pools['custom'].acquire()
+        popup.text_input.text = '可以在这里输入内容'
+        popup.open()
+    
+    def show_modal_view(self, instance):
+        """显示模态视图"""
+        self.dialog_pools['modal'].acquire().open()
+    
+    def show_bubble(self, instance):
+        """显示气泡，同时显示的气泡数量受 max_bubbles 限制"""
+        if len(self.active_bubbles) >= self.max_bubbles:
+            # 达到上限时回收最早的气泡
+            self.hide_bubble(self.active_bubbles[0][0])
         
+        bubble = self.dialog_pools['bubble'].acquire()
         self.root.current_screen.add_widget(bubble)
         
         # 3秒后自动移除气泡
-        Clock.schedule_once(lambda dt: self.root.current_screen.remove_widget(bubble), 3)
+        event = Clock.schedule_once(lambda dt: self.hide_bubble(bubble), 3)
+        self.active_bubbles.append((bubble, event))
+    
+    def hide_bubble(self, bubble):
+        """移除气泡并放回弹窗池"""
+        for entry in self.active_bubbles:
+            if entry[0] is bubble:
+                self.active_bubbles.remove(entry)
+                entry[1].cancel()
+                break
+        if bubble.parent is not None:
+            bubble.parent.remove_widget(bubble)
+        self.dialog_pools['bubble'].release(bubble)
     
     def update_progress(self, dt):
         """更新进度条"""
@@ -793,63 +4377,309 @@ class KivyUIDemo(App):
         """滑块值变化事件"""
         if hasattr(self, 'slider_value_label'):
             self.slider_value_label.text = f'值: {int(value)}'
-            self.slider_value_label.font_name = 'Chinese'
     
     def on_checkbox_active(self, instance, value):
         """复选框状态变化事件"""
         if hasattr(self, 'checkbox_label'):
             self.checkbox_label.text = '已选中' if value else '未选中'
-            self.checkbox_label.font_name = 'Chinese'
     
     def on_switch_active(self, instance, value):
         """开关状态变化事件"""
         if hasattr(self, 'switch_label'):
             self.switch_label.text = '开启' if value else '关闭'
-            self.switch_label.font_name = 'Chinese'
     
     def on_spinner_select(self, instance, text):
         """下拉选择器选择事件"""
         if hasattr(self, 'spinner_result'):
             self.spinner_result.text = f'选择了: {text}'
-            self.spinner_result.font_name = 'Chinese'
     
     def on_color_change(self, instance, color):
         """颜色选择器颜色变化事件"""
         if hasattr(self, 'color_result'):
             r, g, b, a = color
             self.color_result.text = f'选择的颜色: RGB({r:.2f}, {g:.2f}, {b:.2f})'
-            self.color_result.font_name = 'Chinese'
     
     def on_file_select(self, instance, selection):
-        """文件选择器选择事件"""
+        """文件选择器选择事件，文件信息在后台读取"""
+        task = getattr(self, '_file_info_task', None)
+        if task is not None:
+            task.cancel()
+            self._file_info_task = None
+        if not hasattr(self, 'file_result'):
+            return
+        self._viewer_path = None
+        if hasattr(self, 'view_file_button'):
+            self.view_file_button.disabled = True
+        if not selection:
+            self.file_result.text = '未选择文件'
+            if hasattr(self, 'file_preview'):
+                self.file_preview.show_message()
+            return
+        path = selection[0]
+        self.file_result.text = f'选择的文件: {os.path.basename(path)}（读取中…）'
+        self._file_info_task = workers.submit(
+            load_preview, path, self.thumbnails,
+            name='file_preview',
+            screen=owning_screen(instance),
+            on_done=self.on_file_info,
+            on_error=partial(self.on_file_info_error, path)
+        )
+    
+    def _resume_file_info(self, file_browser, screen):
+        """离开屏幕时被取消的文件信息读取，回到屏幕时重新读取"""
+        task = getattr(self, '_file_info_task', None)
+        if task is not None and task.cancelled:
+            self.on_file_select(file_browser, file_browser.selection)
+    
+    def on_file_info(self, info):
+        """后台读取的文件信息与预览交付到主线程"""
+        self._file_info_task = None
         if hasattr(self, 'file_result'):
-            if selection:
-                filename = selection[0].split('/')[-1] if '/' in selection[0] else selection[0].split('\\')[-1]
-                self.file_result.text = f'选择的文件: {filename}'
-            else:
-                self.file_result.text = '未选择文件'
-            self.file_result.font_name = 'Chinese'
+            modified = time.strftime('%Y-%m-%d %H:%M', time.localtime(info['mtime']))
+            self.file_result.text = f'选择的文件: {info["name"]}  {format_size(info["size"])}  {modified}'
+        preview = getattr(self, 'file_preview', None)
+        if preview is None:
+            return
+        if info['kind'] == 'image':
+            preview.show_thumbnail(info['thumbnail'])
+            file_log.debug('缩略图 %s（%s），缓存 %s', info['name'],
+                           '缓存命中' if info['cached'] else '重新解码', self.thumbnails.stats())
+        elif info['kind'] == 'text':
+            preview.show_text(info['text'])
+            self._viewer_path = info['path']
+            if hasattr(self, 'view_file_button'):
+                self.view_file_button.disabled = False
+        else:
+            preview.show_message(f'{info["name"]}\n(无法预览此类型的文件)')
+    
+    def on_file_info_error(self, path, error):
+        self._file_info_task = None
+        file_log.warning('读取文件信息失败 %s: %s', path, error)
+        if hasattr(self, 'file_result'):
+            self.file_result.text = f'选择的文件: {os.path.basename(path)}（无法读取）'
+        if hasattr(self, 'file_preview'):
+            self.file_preview.show_message(f'{os.path.basename(path)}\n(无法读取)')
+    
+    def toggle_perf_overlay(self, *args):
+        """显示或隐藏性能面板"""
+        overlay = getattr(self, '_perf_overlay', None)
+        if overlay is None:
+            overlay = self._perf_overlay = PerfOverlay(self)
+        if overlay.attached:
+            overlay.detach()
+        else:
+            overlay.attach(self.root_window)
+    
+    def on_keyboard(self, window, key, scancode, codepoint, modifiers):
+        # F12 切换性能面板
+        if key == 293:
+            self.toggle_perf_overlay()
+            return True
+        return False
+    
+    def on_screen_built(self, manager, screen):
+        """新屏幕的控件会一直驻留到被卸载，空闲时回收后冻结"""
+        scheduler = getattr(self, 'gc_scheduler', None)
+        if scheduler is not None:
+            scheduler.freeze_new()
+    
+    def on_screen_unloaded(self, manager, screen):
+        """屏幕被卸载时停止其定时器并释放应用对其控件的引用"""
+        timers = self.screen_timers.pop(screen.name, None)
+        if timers is not None:
+            timers.stop()
+        workers.cancel_screen(screen.name)
+        for widget in screen.walk(restrict=True):
+            if isinstance(widget, FileBrowser):
+                widget.cancel_listing()
+        for bubble, event in list(self.active_bubbles):
+            if bubble.parent is screen:
+                self.hide_bubble(bubble)
+        for attr, value in list(vars(self).items()):
+            if isinstance(value, Widget) and is_descendant(value, screen):
+                delattr(self, attr)
+        # 卸载的控件可能已被冻结，解冻后才能在完整回收中释放
+        scheduler = getattr(self, 'gc_scheduler', None)
+        if scheduler is not None:
+            scheduler.thaw()
+    
+    def on_resident_changed(self, manager):
+        """刷新驻留屏幕调试信息"""
+        # 统计纹理需要遍历所有驻留屏幕，只在确实需要输出时计算
+        has_label = hasattr(self, 'resident_label')
+        if not (has_label or screen_log.is_enabled(logging.DEBUG)):
+            return
+        report = manager.describe_resident()
+        screen_log.debug('%s', report)
+        if has_label:
+            self.resident_label.text = report
     
     def on_start(self):
         try:
-            Logger.info("KivyUIDemo: 应用启动完成")
+            app_log.info('应用启动完成')
+            if self.root_window is not None:
+                self.root_window.fbind('on_flip', self._on_first_flip)
+            else:
+                Clock.schedule_once(self.on_first_frame)
+            if self.root_window is not None:
+                self.root_window.bind(on_keyboard=self.on_keyboard)
+                if self.render_mode == 'on_demand':
+                    self.render_governor = RenderGovernor(self.max_fps, self.idle_fps)
+                    self.render_governor.attach(self.root_window)
+                if self.gc_scheduling:
+                    self.gc_scheduler = GcScheduler(getattr(self, 'render_governor', None))
+                    self.gc_scheduler.attach(self.root_window)
+                if self.perf_overlay:
+                    self.toggle_perf_overlay()
+            elif self.gc_scheduling:
+                gc.enable()
         except Exception as e:
-            Logger.error(f"KivyUIDemo: 启动时发生错误: {str(e)}")
+            app_log.error('启动时发生错误: %s', e)
+    
+    def _on_first_flip(self, window):
+        """记录首帧耗时：从进程启动到第一帧绘制完成
+
+        on_flip 紧跟在 on_draw 之后派发，绑定的处理函数在交换缓冲区之前执行，
+        此时第一帧的绘图指令已全部提交。其余启动工作放到下一帧，不推迟这次交换。
+        """
+        window.funbind('on_flip', self._on_first_flip)
+        first_frame = metrics.since_start()
+        metrics.record('startup.first_frame', first_frame)
+        perf_log.info('启动计时 - 构建 %.1fms, 首帧 %.1fms',
+                      metrics.last('startup.build', 0) * 1000, first_frame * 1000)
+        Clock.schedule_once(self.on_first_frame)
+    
+    def on_first_frame(self, dt):
+        """首帧绘制后输出导入耗时报告，并开始分段构建其余屏幕"""
+        self.log_import_report()
+        if self.prewarm_screens and isinstance(self.root, LazyScreenManager):
+            self.root.queue_build(self.root.registered_screens, prebuild=True)
+            if not self.root.building:
+                self.on_startup_complete()
+        else:
+            self.freeze_long_lived()
+    
+    def log_import_report(self):
+        """输出启动阶段的模块导入耗时报告，然后停止导入计时"""
+        import_timer.uninstall()
+        total = import_timer.total
+        metrics.record('startup.imports', total)
+        perf_log.info('启动导入耗时 %.1fms（%d 个模块），累计耗时最多的模块:',
+                      total * 1000, len(import_timer.records))
+        for name, own, cumulative in import_timer.top(10):
+            perf_log.info('  %-32s 累计 %7.1fms  自身 %6.1fms', name, cumulative * 1000, own * 1000)
+    
+    def on_build_progress(self, manager, name, done, total):
+        """更新主页上的后台构建进度"""
+        if hasattr(self, 'build_progress'):
+            self.build_progress.max = total
+            self.build_progress.value = done
+            self.build_status.text = f'正在准备其他页面 {done}/{total}'
+        if done >= total and 'startup.interactive' not in metrics.timings:
+            self.on_startup_complete()
+    
+    def on_startup_complete(self):
+        """启动阶段的后台构建全部完成"""
+        interactive = metrics.since_start()
+        metrics.record('startup.interactive', interactive)
+        perf_log.info('启动计时 - 首帧 %.1fms, 完全可交互 %.1fms',
+                      metrics.last('startup.first_frame', 0) * 1000, interactive * 1000)
+        applied = metrics.timings.get('state.apply', ())
+        if applied:
+            perf_log.info('界面状态恢复 - 读取快照 %.2fms, 应用到 %d 个控件 %.2fms',
+                          metrics.last('startup.state_restore', 0) * 1000, len(applied), sum(applied) * 1000)
+        for attr in ('build_status', 'build_progress'):
+            widget = getattr(self, attr, None)
+            if widget is not None:
+                if widget.parent is not None:
+                    widget.parent.remove_widget(widget)
+                delattr(self, attr)
+        self.freeze_long_lived()
+    
+    def freeze_long_lived(self):
+        """启动阶段创建的控件会一直存活，冻结后完整回收不再扫描它们"""
+        scheduler = getattr(self, 'gc_scheduler', None)
+        if scheduler is not None:
+            scheduler.freeze()
+    
+    def on_pause(self):
+        """应用进入后台时停止所有屏幕定时器并切换到低功耗渲染配置"""
+        ScreenTimers.stop_all()
+        governor = getattr(self, 'render_governor', None)
+        if governor is not None:
+            governor.set_profile('low_power')
+        # 后台没有需要流畅绘制的帧，正好做一次完整回收
+        scheduler = getattr(self, 'gc_scheduler', None)
+        if scheduler is not None:
+            scheduler.collect(2)
+        # 进入后台后进程可能被系统回收，立即写入尚未保存的界面状态
+        store = getattr(self, 'state_store', None)
+        if store is not None:
+            try:
+                store.flush()
+            except OSError as e:
+                app_log.warning('保存界面状态失败: %s', e)
+        app_log.info('应用已暂停，活动周期回调数 %d', ScreenTimers.total_active())
+        return True
+    
+    def on_resume(self):
+        """回到前台时恢复当前屏幕的定时器"""
+        governor = getattr(self, 'render_governor', None)
+        if governor is not None:
+            governor.set_profile('normal')
+        timers = self.screen_timers.get(self.root.current) if isinstance(self.root, LazyScreenManager) else None
+        if timers is not None:
+            timers.start()
+        app_log.info('应用已恢复，活动周期回调数 %d', ScreenTimers.total_active())
     
     def on_stop(self):
         try:
-            Logger.info("KivyUIDemo: 应用正在停止")
+            app_log.info('应用正在停止')
+            counters = metrics.counters
+            for name in ('slider', 'color', 'spinner'):
+                raw = counters.get(f'events.{name}.raw', 0)
+                if raw:
+                    applied = counters.get(f'events.{name}.applied', 0)
+                    perf_log.info('事件合并 %s: 原始 %d 次, 实际更新 %d 次', name, raw, applied)
+            perf_log.info('标签纹理重建共 %d 次', counters.get('label.texture_rebuild', 0))
+            perf_log.info('文字纹理缓存 %s', label_texture_cache.stats())
+            if profiler.running:
+                profiler.stop()
+                perf_log.info('采样分析结果 %s', profiler.top(10))
+            tasks = workers.stats()
+            if tasks['submitted']:
+                perf_log.info('后台任务 %s', tasks)
+            if getattr(self, 'thumbnails', None) is not None and metrics.counters.get('thumbs.decoded'):
+                perf_log.info('缩略图缓存 %s', self.thumbnails.stats())
+            workers.shutdown()
+            store = getattr(self, 'state_store', None)
+            if store is not None:
+                store.stop()
+            governor = getattr(self, 'render_governor', None)
+            if governor is not None:
+                frames, ticks = governor.per_minute()
+                perf_log.info('渲染 最近每分钟绘制 %.0f 帧，主循环唤醒 %.0f 次，进入空闲 %d 次',
+                              frames, ticks, counters.get('render.idle_enter', 0))
+                governor.detach()
+            scheduler = getattr(self, 'gc_scheduler', None)
+            if scheduler is not None:
+                perf_log.info('垃圾回收 %s', scheduler.stats())
+                scheduler.detach()
+            applog.stop_writer()
         except Exception as e:
-            Logger.error(f"KivyUIDemo: 停止时发生错误: {str(e)}")
+            app_log.error('停止时发生错误: %s', e)
 
 if __name__ == "__main__":
     try:
-        Logger.info("主程序: 开始启动Kivy UI演示应用")
+        main_log.info('开始启动Kivy UI演示应用')
         app = KivyUIDemo()
         app.run()
-        Logger.info("主程序: 应用正常退出")
+        main_log.info('应用正常退出')
     except Exception as e:
-        Logger.error(f"主程序: 发生未捕获的异常: {str(e)}")
-        Logger.error(f"主程序: 异常详情: {traceback.format_exc()}")
+        main_log.error('发生未捕获的异常: %s', e)
+        main_log.error('异常详情: %s', traceback.format_exc())
+        crash_log = applog.dump('未捕获的异常')
+        if crash_log:
+            print(f"最近日志已转储到: {crash_log}")
         print(f"应用崩溃: {str(e)}")
         print(f"详细错误信息: {traceback.format_exc()}")
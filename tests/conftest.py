@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""测试使用 benchmarks/headless.py 提供的无窗口环境，必须在导入 kivy 或 main 之前加载"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import headless  # noqa: E402,F401
+
+headless.install_window()
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""DialogPool 的归还时机"""
+import headless
+from kivy.uix.modalview import ModalView
+
+from main import DialogPool
+
+
+def test_reopen_during_fade_out_shows_dialog():
+    window = headless.install_window()
+    pool = DialogPool('test', ModalView, max_idle=2)
+    dialog = pool.acquire()
+    dialog.open()
+    headless.pump_for(0.3)
+    dialog.dismiss()
+    # 淡出动画还没结束时再次打开
+    reopened = pool.acquire()
+    reopened.open()
+    headless.pump_for(0.3)
+    assert reopened.parent is window
+    reopened.dismiss(animation=False)
+
+
+def test_dialog_returns_to_pool_after_removal():
+    pool = DialogPool('test', ModalView, max_idle=2)
+    dialog = pool.acquire()
+    dialog.open()
+    headless.pump_for(0.3)
+    dialog.dismiss()
+    assert pool.acquire() is not dialog
+    headless.pump_for(0.3)
+    assert pool.acquire() is dialog
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""FileBrowser 在设置目录之前的排序与筛选"""
+import pytest
+from kivy.core.text import LabelBase
+from kivy.resources import resource_find
+
+from main import DEFAULT_FONT_FILE, FONT_NAME, UI_FONT_NAME, FileBrowser
+
+
+@pytest.fixture(autouse=True)
+def fonts():
+    for name in (FONT_NAME, UI_FONT_NAME):
+        LabelBase.register(name=name, fn_regular=resource_find(DEFAULT_FONT_FILE))
+
+
+def test_sort_and_filter_without_path():
+    browser = FileBrowser()
+    browser.cycle_sort()
+    browser.filter_text = 'abc'
+    browser._refresh_visible()
+    assert browser.list_view.data == []
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""媒体屏幕的文件信息读取与屏幕切换"""
+import headless
+import pytest
+
+from main import FileBrowser, KivyUIDemo
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestApp(KivyUIDemo):
+        @property
+        def user_data_dir(self):
+            return str(tmp_path)
+
+    app = headless.start_app(TestApp, prewarm_screens=False)
+    yield app
+    headless.stop_app(app)
+
+
+def test_read_cancelled_by_leaving_resumes_on_return(app, tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('第一行\n', encoding='utf-8')
+    app.switch_screen('media', None)
+    headless.pump_for(0.6)
+    browser = next(w for w in app.root.get_screen('media').walk() if isinstance(w, FileBrowser))
+
+    browser.selection = [str(path)]
+    # 结果交付之前离开屏幕，读取被取消
+    app.switch_screen('main', None)
+    headless.pump_for(0.6)
+    assert '读取中' in app.file_result.text
+
+    app.switch_screen('media', None)
+    headless.pump_for(0.6)
+    assert '读取中' not in app.file_result.text
+    assert app.file_result.text.startswith('选择的文件: notes.txt')
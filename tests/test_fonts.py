@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""启动时的字体使用：主屏幕只用界面子集字体"""
+import headless
+import pytest
+from kivy.core.text import LabelBase
+
+from main import FONT_NAME, UI_FONT_NAME, KivyUIDemo
+
+
+@pytest.fixture
+def resolved(monkeypatch):
+    names = []
+    resolve = LabelBase.resolve_font_name
+
+    def record(self):
+        names.append(self.options['font_name'])
+        return resolve(self)
+
+    monkeypatch.setattr(LabelBase, 'resolve_font_name', record)
+    return names
+
+
+def test_main_screen_never_resolves_full_font(resolved, tmp_path):
+    class TestApp(KivyUIDemo):
+        screen_debug = True
+
+        @property
+        def user_data_dir(self):
+            return str(tmp_path)
+
+    app = headless.start_app(TestApp)
+    try:
+        # 只绘制第一帧，其余屏幕的后台构建从下一帧开始
+        headless.pump(1)
+        assert UI_FONT_NAME in resolved
+        assert FONT_NAME not in resolved
+    finally:
+        headless.stop_app(app)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""GcScheduler 的冻结时机"""
+import gc
+import weakref
+
+import headless
+import pytest
+
+from main import GcScheduler
+
+
+class Node:
+    pass
+
+
+def make_cycle():
+    node = Node()
+    node.self = node
+    return weakref.ref(node)
+
+
+@pytest.fixture
+def no_auto_gc():
+    gc.unfreeze()
+    gc.disable()
+    yield
+    gc.unfreeze()
+    gc.enable()
+
+
+def test_freeze_new_does_not_pin_garbage(no_auto_gc):
+    ref = make_cycle()
+    GcScheduler().freeze_new()
+    assert ref() is None
+    assert gc.get_freeze_count() > 0
+
+
+def test_freeze_new_waits_for_idle_frame(no_auto_gc):
+    scheduler = GcScheduler()
+    scheduler.attach(headless.install_window())
+    try:
+        ref = make_cycle()
+        scheduler.freeze_new()
+        scheduler.freeze_new()
+        assert gc.get_freeze_count() == 0
+        headless.pump(2)
+        assert ref() is None
+        assert gc.get_freeze_count() > 0
+    finally:
+        scheduler.detach()
+        gc.disable()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""LazyScreenManager 的分段构建与预热"""
+import signal
+
+import headless
+import pytest
+from kivy.uix.screenmanager import NoTransition, Screen, ScreenManagerException
+
+from main import LazyScreenManager
+
+
+def sliced_factory(name, slices=3):
+    def factory():
+        screen = Screen(name=name)
+        for _ in range(slices):
+            yield
+        return screen
+    return factory
+
+
+class Hang(BaseException):
+    """不是 Exception 的子类，不会被预热的错误处理吞掉"""
+
+
+@pytest.fixture
+def watchdog():
+    """构建循环卡死时让测试失败而不是挂起"""
+    def timeout(signum, frame):
+        raise Hang('构建循环没有结束')
+    previous = signal.signal(signal.SIGALRM, timeout)
+    signal.alarm(5)
+    yield
+    signal.alarm(0)
+    signal.signal(signal.SIGALRM, previous)
+
+
+@pytest.fixture
+def manager():
+    sm = LazyScreenManager(max_resident=0)
+    for name in ('main', 'target'):
+        sm.register_screen(name, sliced_factory(name))
+    sm.ensure_screen('main')
+    sm.current = 'main'
+    return sm
+
+
+def test_show_screen_after_build_queue_finishes_prewarm_task(manager, watchdog):
+    # 按下导航按钮开始预热，随后启动阶段的后台构建队列完成了同一个构建任务
+    manager.prewarm_screen('target')
+    next(manager._prewarming['target'])
+    manager.queue_build(['target'])
+    while manager.building:
+        manager._build_slice(0)
+    assert manager.has_screen('target')
+
+    manager.show_screen('target')
+    assert manager.current == 'target'
+    assert 'target' not in manager._prewarming
+
+
+def test_prewarm_finishes_when_build_queue_installs_screen(manager, watchdog):
+    manager.prewarm_screen('target')
+    next(manager._prewarming['target'])
+    manager.queue_build(['target'])
+    while manager.building:
+        manager._build_slice(0)
+    steps = manager._prewarming.pop('target')
+    assert manager._run_prewarm('target', steps, deadline=None)
+
+
+def test_factory_without_screen_raises(watchdog):
+    def broken():
+        yield
+    sm = LazyScreenManager(max_resident=0)
+    sm.register_screen('broken', broken)
+    with pytest.raises(ScreenManagerException):
+        sm.ensure_screen('broken')
+    assert 'broken' not in sm._building
+
+
+def build_queue_manager(max_resident):
+    sm = LazyScreenManager(max_resident=max_resident, transition=NoTransition())
+    for name in ('main', 'a', 'b', 'c', 'd'):
+        sm.register_screen(name, sliced_factory(name, slices=1))
+    sm.ensure_screen('main')
+    sm.current = 'main'
+    progress = []
+    sm.bind(on_build_progress=lambda manager, name, done, total: progress.append((name, done, total)))
+    return sm, progress
+
+
+def test_startup_prebuild_ignores_resident_budget(watchdog):
+    sm, progress = build_queue_manager(max_resident=2)
+    sm.queue_build(sm.registered_screens, prebuild=True)
+    while sm.building:
+        sm._build_slice(0)
+    assert all(sm.has_screen(name) for name in sm.registered_screens)
+    assert progress[-1][1:] == (4, 4)
+
+    # 预构建后未显示过的屏幕不计入预算，显示过的屏幕按 LRU 卸载
+    for name in ('a', 'b', 'c'):
+        sm.show_screen(name)
+        headless.pump(2)
+        sm._trim(0)
+    assert sm.has_screen('c') and sm.has_screen('d')
+    assert not sm.has_screen('a') and not sm.has_screen('b')
+
+
+def test_skipped_builds_are_not_reported_as_done(watchdog):
+    sm, progress = build_queue_manager(max_resident=2)
+    sm.queue_build(['a', 'b', 'c'])
+    while sm.building:
+        sm._build_slice(0)
+    assert sm.has_screen('a')
+    assert not sm.has_screen('b') and not sm.has_screen('c')
+    assert progress[-1][1:] == (1, 1)
+
+
+def test_cancelled_prewarm_is_not_reported_as_prewarmed(manager, watchdog):
+    manager.prewarm_screen('target')
+    while manager._prewarming:
+        manager._prewarm_slice(0)
+    assert 'target' in manager._prewarmed
+    manager.cancel_prewarm('target')
+
+    manager.show_screen('target')
+    headless.pump_for(0.7)
+    assert manager.last_transition['prewarmed'] is False
+
+
+def test_nav_press_dragged_off_cancels_prewarm(tmp_path, watchdog):
+    from kivy.tests.common import UnitTestTouch
+
+    from main import KivyUIDemo
+
+    class TestApp(KivyUIDemo):
+        @property
+        def user_data_dir(self):
+            return str(tmp_path)
+
+    app = headless.start_app(TestApp, prewarm_screens=False, prewarm_transitions=True)
+    try:
+        headless.pump(2)
+        button = next(w for w in app.root.get_screen('main').walk() if getattr(w, 'text', None) == '布局管理')
+        touch = UnitTestTouch(*button.center)
+        touch.touch_down()
+        headless.pump(2)
+        touch.touch_move(button.right + 50, button.top + 50)
+        touch.touch_up()
+        headless.pump(2)
+        assert app.root.current == 'main'
+        assert 'layout' not in app.root._prewarming
+        assert 'layout' not in app.root._prewarmed
+    finally:
+        headless.stop_app(app)
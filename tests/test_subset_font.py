@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""tools/subset_font.py 的界面文字收集"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import subset_font  # noqa: E402
+
+SOURCE = '''
+def build():
+    screen_log.info('已卸载屏幕 %s', name)
+    font_log.warning('字体缓存损坏')
+    self.log.error('写入失败')
+    applog.dump('未捕获的异常')
+    make_label('界面')
+    Button(text='按钮')
+'''
+
+
+def collect(tmp_path, source):
+    path = tmp_path / 'source.py'
+    path.write_text(source, encoding='utf-8')
+    return subset_font.collect_chars([str(path)])
+
+
+def test_log_only_strings_are_excluded(tmp_path):
+    chars = collect(tmp_path, SOURCE)
+    assert set('界面按钮') <= chars
+    assert not set('已卸载屏幕字体缓存损坏写入失败未捕获的异常') & chars
+
+
+def test_main_log_messages_are_excluded():
+    # “卸载”只出现在 main.py 的日志里
+    chars = subset_font.collect_chars(subset_font.DEFAULT_SOURCES)
+    assert '按' in chars
+    assert '卸' not in chars
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""标签纹理重建计数：只统计真正的文字渲染"""
+import pytest
+from kivy.core.text import LabelBase
+from kivy.resources import resource_find
+from kivy.uix.label import Label
+
+from main import (DEFAULT_FONT_FILE, FONT_NAME, UI_FONT_NAME, label_texture_cache, make_label, metrics,
+                  styled)
+
+
+@pytest.fixture(autouse=True)
+def fonts():
+    for name in (FONT_NAME, UI_FONT_NAME):
+        LabelBase.register(name=name, fn_regular=resource_find(DEFAULT_FONT_FILE))
+    label_texture_cache.clear()
+
+
+def rebuilds():
+    return metrics.counters.get('label.texture_rebuild', 0)
+
+
+def test_cache_hits_are_not_rebuilds():
+    before = rebuilds()
+    first = make_label('texture rebuild')
+    first.texture_update()
+    assert rebuilds() == before + 1
+    second = make_label('texture rebuild')
+    second.texture_update()
+    assert second.texture is first.texture
+    assert rebuilds() == before + 1
+
+
+def test_uncached_label_counts_each_render_once():
+    label = styled(Label, 'first')
+    label.texture_update()
+    before = rebuilds()
+    label.text = 'second'
+    label.texture_update()
+    assert rebuilds() == before + 1
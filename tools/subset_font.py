@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""构建期中文字体子集化
+
+从 main.py 中提取界面文字用到的所有字符，生成只包含这些字形
+（外加 ASCII 可见字符作为兜底）的子集字体，setup_chinese_font() 把它注册为
+界面固定文字使用的 UI_FONT_NAME。
+同时输出子集化前后的字体大小与加载耗时对比。
+
+用法:
+    python tools/subset_font.py /usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc --font-number 2
+
+依赖 fontTools（pip install fonttools），只在构建机上需要，不会打包进 APK。
+"""
+import argparse
+import ast
+import os
+import string
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOURCES = [os.path.join(ROOT_DIR, 'main.py')]
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, 'fonts', 'ui_subset.ttf')
+
+# 以位置参数接收界面文字的工厂函数
+TEXT_FACTORIES = {'make_label', 'make_button', 'styled'}
+# 以关键字参数接收界面文字的参数名
+TEXT_KEYWORDS = {'text', 'title'}
+# 这些调用中的字符串只写入日志，不会显示在界面上
+LOG_CALLEES = {'Logger', 'logging', 'print', 'log', 'applog'}
+# main.py 中的日志通道（app_log、font_log 等）以 _log 结尾
+LOG_SUFFIX = '_log'
+LOG_METHODS = {'debug', 'info', 'warning', 'error', 'exception', 'critical'}
+
+# 数字、字母与常用标点，保证动态拼接的文字也能显示
+FALLBACK_CHARS = string.printable.strip() + ' '
+
+
+def _callee_name(node):
+    func = node.func
+    while isinstance(func, ast.Attribute):
+        func = func.value
+    return func.id if isinstance(func, ast.Name) else None
+
+
+def is_log_call(node):
+    """调用是否只写日志：Logger/logging 等，或者日志通道的 debug/info/warning/error"""
+    callee = _callee_name(node)
+    if callee in LOG_CALLEES or (callee or '').endswith(LOG_SUFFIX):
+        return True
+    return isinstance(node.func, ast.Attribute) and node.func.attr in LOG_METHODS
+
+
+def _strings(node):
+    """节点中所有字符串常量（包括 f-string 的常量部分）"""
+    for child in ast.walk(node):
+        if isinstance(child, ast.Constant) and isinstance(child.value, str):
+            yield child.value
+
+
+class TextCollector(ast.NodeVisitor):
+    """收集界面文字
+
+    text=/title= 关键字参数和文字工厂的第一个位置参数一定是界面文字；
+    此外，非 ASCII 字符串多来自导航表、下拉选项等数据表，也一并收集。
+    日志调用和文档字符串中的字符串会被跳过。
+    """
+
+    def __init__(self):
+        self.chars = set()
+
+    def visit_Call(self, node):
+        if is_log_call(node):
+            return
+        callee = _callee_name(node)
+        for keyword in node.keywords:
+            if keyword.arg in TEXT_KEYWORDS:
+                self._add(keyword.value)
+        if callee in TEXT_FACTORIES:
+            for arg in node.args[:2]:
+                self._add(arg)
+        self.generic_visit(node)
+
+    def visit_Expr(self, node):
+        # 单独成句的字符串常量是文档字符串
+        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            return
+        self.generic_visit(node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, str) and not node.value.isascii():
+            self.chars.update(node.value)
+
+    def _add(self, node):
+        for value in _strings(node):
+            self.chars.update(value)
+
+
+def collect_chars(paths):
+    collector = TextCollector()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            collector.visit(ast.parse(f.read(), filename=path))
+    chars = collector.chars | set(FALLBACK_CHARS)
+    return {c for c in chars if c.isprintable() or c == ' '}
+
+
+def measure_load(path, font_number=0, repeat=3):
+    """加载字体并解析全部字形所需的时间（取多次中的最小值）"""
+    from fontTools.ttLib import TTFont
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        font = TTFont(path, fontNumber=font_number, lazy=False)
+        glyphs = font.getGlyphSet()
+        for name in font.getGlyphOrder():
+            glyphs[name]
+        font.close()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def subset_font(source, output, chars, font_number=0):
+    from fontTools import subset
+    options = subset.Options()
+    options.font_number = font_number
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    options.desubroutinize = True
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=[ord(c) for c in chars])
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    subset.save_font(font, output, options)
+    font.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成只包含界面文字的中文子集字体')
+    parser.add_argument('font', help='源字体文件（.ttf/.otf/.ttc）')
+    parser.add_argument('--font-number', type=int, default=0, help='.ttc 字体集合中的字体序号')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='子集字体输出路径')
+    parser.add_argument('--source', action='append', help='提取文字的源文件，可重复，默认 main.py')
+    args = parser.parse_args(argv)
+
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        print('需要 fontTools: pip install fonttools', file=sys.stderr)
+        return 1
+
+    chars = collect_chars(args.source or DEFAULT_SOURCES)
+    cjk = sum(1 for c in chars if not c.isascii())
+    print(f'界面字符 {len(chars)} 个（其中非 ASCII {cjk} 个）')
+
+    subset_font(args.font, args.output, chars, args.font_number)
+
+    before_bytes = os.path.getsize(args.font)
+    after_bytes = os.path.getsize(args.output)
+    before_load = measure_load(args.font, args.font_number)
+    after_load = measure_load(args.output)
+    print(f'字体大小: {before_bytes / 1024:.1f}KB -> {after_bytes / 1024:.1f}KB '
+          f'({after_bytes / before_bytes:.1%})')
+    print(f'加载耗时: {before_load * 1000:.1f}ms -> {after_load * 1000:.1f}ms')
+    print(f'已生成 {os.path.relpath(args.output, ROOT_DIR)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())